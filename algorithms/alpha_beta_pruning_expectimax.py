@@ -1,7 +1,9 @@
 import math
-from typing import Callable, List
+from typing import Callable, List, Tuple
 
-from algorithms.abstract_state import AbstractState, AbstractMove
+import numpy as np
+
+from algorithms.abstract_state import AbstractState, AbstractMove, AbstractRandomMove
 from algorithms.timeoutable_algorithm import TimeoutableAlgorithm
 from players.abstract_player import AbstractPlayer
 
@@ -10,7 +12,13 @@ class AlphaBetaExpectimax(TimeoutableAlgorithm):
     def __init__(self, is_maximizing_player: Callable[[AbstractPlayer], bool],
                  evaluate_heuristic_value: Callable[[AbstractState], float],
                  timeout_seconds=5,
-                 filter_moves: Callable[[List[AbstractMove]], List[AbstractMove]]=lambda l: l):
+                 filter_moves: Callable[[List[AbstractMove]], List[AbstractMove]]=lambda l: l,
+                 chance_node_samples_count: int=None,
+                 chance_node_probability_threshold: float=0.0,
+                 seed: int=None,
+                 encode_state: Callable[[AbstractState], np.ndarray]=None,
+                 evaluate_heuristic_values: Callable[[np.ndarray], np.ndarray]=None,
+                 generate_moves: Callable[[AbstractState], List[AbstractMove]]=None):
         """
         wrapper of the expectiamx with alpha-beta pruning algorithm
         it inherits from TimeoutableAlgorithm to enable iterative deepening
@@ -21,6 +29,20 @@ class AlphaBetaExpectimax(TimeoutableAlgorithm):
             lambda player: player == self
         :param evaluate_heuristic_value: a function that returns a number to
         heuristically evaluate the current state
+        :param chance_node_samples_count: if given, chance nodes with more random moves than this are estimated from
+        this many stratified samples (weighted by the random moves' probabilities) instead of being fully expanded
+        :param chance_node_probability_threshold: random moves less probable than this are pruned from chance nodes,
+        and the rest of the probabilities are normalized
+        :param seed: seed of the random state used to sample chance nodes
+        :param encode_state: a function that encodes the current state as a feature vector, from the maximizing
+        player's perspective (see game/features.py)
+        :param evaluate_heuristic_values: a function that given a matrix of feature vectors (a row per state), returns
+        the heuristic values of all the states. if given together with encode_state, the children of nodes at depth 1
+        (all of them leaves) are encoded, and evaluated in a single call, instead of calling evaluate_heuristic_value
+        for each one
+        :param generate_moves: a function that given the current state, returns the moves to develop from it.
+        if given, it's used instead of filtering all the next moves by filter_moves, so a generator that samples the
+        moves as they are generated never has to hold all of them
         :return: best move
         """
         super().__init__(timeout_seconds)
@@ -30,6 +52,20 @@ class AlphaBetaExpectimax(TimeoutableAlgorithm):
         self._is_maximizing_player = is_maximizing_player
         self.evaluate_heuristic_value = evaluate_heuristic_value
 
+        assert chance_node_samples_count is None or chance_node_samples_count > 0
+        assert 0 <= chance_node_probability_threshold < 1
+        self.chance_node_samples_count = chance_node_samples_count
+        self.chance_node_probability_threshold = chance_node_probability_threshold
+        self._random_uniform = np.random.RandomState(seed).uniform
+        self.encode_state = encode_state
+        self.evaluate_heuristic_values = evaluate_heuristic_values
+        self.generate_moves = generate_moves
+
+        # statistics of the estimation error of the chance nodes, in the last search
+        self.estimated_chance_nodes_count = 0
+        self.max_chance_node_standard_error = 0.0
+        self.max_chance_node_pruned_probability = 0.0
+
     def get_best_move(self, state: AbstractState, max_depth: int):
         """
         get best move, based on the expectimax with alpha-beta pruning algorithm
@@ -44,6 +80,9 @@ class AlphaBetaExpectimax(TimeoutableAlgorithm):
 
         self.state = state
         self.max_depth = max_depth
+        self.estimated_chance_nodes_count = 0
+        self.max_chance_node_standard_error = 0.0
+        self.max_chance_node_pruned_probability = 0.0
         _, best_move = self._alpha_beta_expectimax(self.max_depth, -math.inf, math.inf, False)
         return best_move
 
@@ -65,18 +104,42 @@ class AlphaBetaExpectimax(TimeoutableAlgorithm):
         if depth == 0 or self.state.is_final():
             return self.evaluate_heuristic_value(self.state), None
 
+        is_frontier = depth == 1 and self.encode_state is not None and self.evaluate_heuristic_values is not None
+
         if is_random_event:
+            random_moves_and_weights, is_sampled = self._get_random_moves_and_weights()
+            if is_frontier:
+                values = self._evaluate_frontier([random_move for random_move, _ in random_moves_and_weights],
+                                                 self.state.make_random_move, self.state.unmake_random_move)
+            else:
+                values = []
+                for random_move, _ in random_moves_and_weights:
+                    self.state.make_random_move(random_move)
+                    u, _ = self._alpha_beta_expectimax(depth - 1, alpha, beta, False)
+                    values.append(u)
+                    self.state.unmake_random_move(random_move)
             v = 0
-            for random_move in self.state.get_next_random_moves():
-                self.state.make_random_move(random_move)
-                u, _ = self._alpha_beta_expectimax(depth - 1, alpha, beta, False)
-                v += random_move.probability * u
-                self.state.unmake_random_move(random_move)
+            for u, (_, weight) in zip(values, random_moves_and_weights):
+                v += weight * u
+            if is_sampled:
+                self._update_estimation_error(v, values, [weight for _, weight in random_moves_and_weights])
             return v, None
+        elif is_frontier:
+            moves = list(self._get_moves())
+            values = self._evaluate_frontier(moves, self.state.make_move, self.state.unmake_move)
+            if not self._is_maximizing_player(self.state.get_current_player()):
+                return min(values, default=math.inf), None
+            v = -math.inf
+            best_move = None
+            for u, move in zip(values, moves):
+                if u > v:
+                    v = u
+                    best_move = move
+            return v, best_move
         elif self._is_maximizing_player(self.state.get_current_player()):
             v = -math.inf
             best_move = None
-            for move in self.filter_moves(self.state.get_next_moves(), self.state):
+            for move in self._get_moves():
                 self.state.make_move(move)
                 u, _ = self._alpha_beta_expectimax(depth - 1, alpha, beta, True)
                 if u > v:
@@ -90,7 +153,7 @@ class AlphaBetaExpectimax(TimeoutableAlgorithm):
             return v, best_move
         else:
             v = math.inf
-            for move in self.filter_moves(self.state.get_next_moves(), self.state):
+            for move in self._get_moves():
                 self.state.make_move(move)
                 u, _ = self._alpha_beta_expectimax(depth - 1, alpha, beta, True)
                 v = min(v, u)
@@ -100,3 +163,83 @@ class AlphaBetaExpectimax(TimeoutableAlgorithm):
                 if beta <= alpha:
                     break
             return v, None
+
+    def _get_moves(self) -> List[AbstractMove]:
+        """
+        :return: the moves to develop from the current state, by generate_moves if given, by filter_moves otherwise
+        """
+        if self.generate_moves is not None:
+            return self.generate_moves(self.state)
+        return self.filter_moves(self.state.get_next_moves(), self.state)
+
+    def _evaluate_frontier(self, moves: List, make_move: Callable, unmake_move: Callable) -> List[float]:
+        """
+        evaluate the leaves reached by each of the given moves from the current state in a single batch:
+        every move is made, the reached state is encoded as a feature row, and the move is unmade.
+        then all the rows are evaluated at once by self.evaluate_heuristic_values
+        :param moves: the moves (or random moves) that lead to the leaves
+        :param make_move: the method that makes a move (make_move or make_random_move)
+        :param unmake_move: the method that reverts a move (unmake_move or unmake_random_move)
+        :return: List[float], the heuristic values of the leaves, in the order of the moves
+        """
+        if self.ran_out_of_time or len(moves) == 0:
+            return [0] * len(moves)
+        rows = []
+        for move in moves:
+            make_move(move)
+            rows.append(self.encode_state(self.state))
+            unmake_move(move)
+        return np.asarray(self.evaluate_heuristic_values(np.stack(rows)), dtype=float).tolist()
+
+    def _get_random_moves_and_weights(self) -> Tuple[List[Tuple[AbstractRandomMove, float]], bool]:
+        """
+        get the random moves to expand in the current chance node, and the weight of each one in the expectation.
+        when neither sampling nor pruning is configured, these are all the random moves, weighted by their probability
+        :return: tuple of (list of random moves and their weights, whether the random moves were sampled).
+        the weights sum to 1
+        """
+        random_moves = self.state.get_next_random_moves()
+        probabilities = [random_move.probability for random_move in random_moves]
+
+        if self.chance_node_probability_threshold > 0:
+            kept = [i for i, p in enumerate(probabilities) if p >= self.chance_node_probability_threshold]
+            if kept and len(kept) < len(random_moves):
+                self.max_chance_node_pruned_probability = max(self.max_chance_node_pruned_probability,
+                                                              sum(probabilities) - sum(probabilities[i] for i in kept))
+                random_moves = [random_moves[i] for i in kept]
+                probabilities = [probabilities[i] for i in kept]
+
+        probabilities_sum = sum(probabilities)
+        if self.chance_node_samples_count is None or len(random_moves) <= self.chance_node_samples_count:
+            return [(random_move, p / probabilities_sum) for random_move, p in zip(random_moves, probabilities)], False
+        return self._stratified_sample(random_moves, probabilities, probabilities_sum), True
+
+    def _stratified_sample(self, random_moves: List[AbstractRandomMove], probabilities: List[float],
+                           probabilities_sum: float) -> List[Tuple[AbstractRandomMove, float]]:
+        """
+        systematic (stratified) sampling of self.chance_node_samples_count random moves.
+        the cumulative probability is split into equal strata, and a single uniform offset picks a point in each one.
+        a random move that is picked several times is expanded once, with the weight of all of its picks
+        :return: list of the sampled random moves and their weights. the weights sum to 1
+        """
+        samples_count = self.chance_node_samples_count
+        cumulative_probabilities = np.cumsum(probabilities) / probabilities_sum
+        points = (np.arange(samples_count) + self._random_uniform()) / samples_count
+        indices = np.minimum(np.searchsorted(cumulative_probabilities, points, side='right'), len(random_moves) - 1)
+        indices, counts = np.unique(indices, return_counts=True)
+        return [(random_moves[i], count / float(samples_count)) for i, count in zip(indices, counts)]
+
+    def _update_estimation_error(self, estimate: float, values: List[float], weights: List[float]):
+        """
+        update the statistics of the chance nodes estimated by sampling.
+        the standard error is approximated by the weighted standard deviation of the sampled values,
+        divided by the square root of the number of samples
+        :param estimate: the estimated value of the chance node
+        :param values: the values of the sampled random moves
+        :param weights: the weights of the sampled random moves
+        :return: None
+        """
+        variance = sum(weight * (value - estimate) ** 2 for value, weight in zip(values, weights))
+        standard_error = math.sqrt(variance / self.chance_node_samples_count)
+        self.estimated_chance_nodes_count += 1
+        self.max_chance_node_standard_error = max(self.max_chance_node_standard_error, standard_error)
@@ -1,4 +1,7 @@
+import copy
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Executor, wait
 from typing import Iterable, Any
 
 AbstractHillClimbingState = Any
@@ -76,3 +79,74 @@ def first_choice_hill_climbing(space: AbstractHillClimbableSpace, initial_state:
 
     return best_state
 
+
+def parallel_first_choice_hill_climbing(space: AbstractHillClimbableSpace, initial_state: AbstractHillClimbingState,
+                                        executor: Executor, speculative_neighbors_count: int) \
+        -> AbstractHillClimbingState:
+    """
+    first_choice_hill_climbing, that evaluates (and compares to the best state) several neighbors at a time,
+    concurrently on the executor. the neighbors are still taken in their order: the first better neighbor is chosen,
+    and the evaluations of the neighbors after it are cancelled (those that already started are waited for, and
+    ignored). so the result is the one of first_choice_hill_climbing, in spaces whose evaluations and comparisons
+    don't depend on the order they're made in.
+    the evaluations run on the executor's threads, so the space has to be thread-safe. enough_iterations is called as
+    by first_choice_hill_climbing, once per neighbor taken, so it's where a space should count its iterations
+    (rather than in evaluate_state, that's also called for the neighbors that are evaluated speculatively)
+    :param space: the space on which to find approximately best state
+    :param initial_state: the state to begin the search from
+    :param executor: the executor to evaluate the neighbors on (a thread pool)
+    :param speculative_neighbors_count: the number of neighbors evaluated at a time
+    :return: the best state found given the iterations limit in the space.enough_iterations method
+    """
+    def evaluate_neighbor(neighbor_state: AbstractHillClimbingState, evaluation: AbstractHillClimbingStateEvaluation):
+        neighbor_evaluation = space.evaluate_state(neighbor_state)
+        return neighbor_evaluation, space.is_better(neighbor_evaluation, evaluation)
+
+    best_state = initial_state
+    best_evaluation = space.evaluate_state(best_state)
+
+    while True:
+        previous_best_state = best_state
+        neighbors = iter(space.get_neighbors(best_state))
+        # the neighbors being evaluated, in their order, with the futures of their evaluations
+        evaluated_neighbors = deque()
+        try:
+            while True:
+                while len(evaluated_neighbors) < speculative_neighbors_count:
+                    neighbor_state = next(neighbors, None)
+                    if neighbor_state is None:
+                        break
+                    # get_neighbors may change the state it yielded when the next one is taken, so it's copied
+                    neighbor_state = copy.deepcopy(neighbor_state)
+                    evaluated_neighbors.append(
+                        (neighbor_state, executor.submit(evaluate_neighbor, neighbor_state, best_evaluation)))
+                if not evaluated_neighbors:
+                    break
+
+                neighbor_state, future = evaluated_neighbors.popleft()
+                neighbor_evaluation, is_better = future.result()
+                if is_better:
+                    best_evaluation = neighbor_evaluation
+                    best_state = neighbor_state
+
+                    if space.enough_iterations():
+                        return best_state
+                    break
+
+                if space.enough_iterations():
+                    return best_state
+        finally:
+            _cancel_evaluations([future for _, future in evaluated_neighbors])
+
+        if previous_best_state is best_state:
+            break
+
+    return best_state
+
+
+def _cancel_evaluations(futures):
+    for future in futures:
+        future.cancel()
+    # evaluations that already started can't be cancelled. they're waited for, so they don't run alongside the
+    # evaluations of the next step
+    wait(futures)
@@ -0,0 +1,120 @@
+from unittest import TestCase
+
+import numpy as np
+
+from algorithms.abstract_state import AbstractState, AbstractRandomMove
+from algorithms.alpha_beta_pruning_expectimax import AlphaBetaExpectimax
+
+
+class FakeRandomMove(AbstractRandomMove):
+    def __init__(self, value, probability):
+        self.value = value
+        self._probability = probability
+
+    @property
+    def probability(self):
+        return self._probability
+
+
+class FakeState(AbstractState):
+    """
+    a single decision of the maximizing player, followed by a single chance node.
+    the value of the leaf is the value of the rolled random move, plus the value of the chosen move
+    """
+
+    def __init__(self, moves_values, random_moves):
+        self.moves_values = moves_values
+        self.random_moves = random_moves
+        self.value = 0
+
+    def is_final(self):
+        return False
+
+    def get_next_moves(self):
+        return self.moves_values
+
+    def make_move(self, move):
+        self.value += move
+
+    def unmake_move(self, move):
+        self.value -= move
+
+    def get_current_player(self):
+        return 'max'
+
+    def get_next_random_moves(self):
+        return self.random_moves
+
+    def make_random_move(self, move):
+        self.value += move.value
+
+    def unmake_random_move(self, move):
+        self.value -= move.value
+
+
+class TestAlphaBetaExpectimax(TestCase):
+    def setUp(self):
+        # like dice values 2 to 12, where the rare values are worth a lot
+        self.random_moves = [FakeRandomMove(value, probability / 36.0) for value, probability in
+                             [(100, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 5), (0, 4), (0, 3), (0, 2),
+                              (100, 1)]]
+        self.state = FakeState([0, 1], self.random_moves)
+
+    def create_expectimax(self, **kwargs):
+        return AlphaBetaExpectimax(is_maximizing_player=lambda p: p == 'max',
+                                   evaluate_heuristic_value=lambda s: s.value,
+                                   filter_moves=lambda moves, state: moves,
+                                   **kwargs)
+
+    def test_expands_all_random_moves_by_default(self):
+        expectimax = self.create_expectimax()
+        expectimax.state = self.state
+        v, best_move = expectimax._alpha_beta_expectimax(2, -float('inf'), float('inf'), False)
+        self.assertEqual(best_move, 1)
+        self.assertAlmostEqual(v, 1 + 200 / 36.0)
+        self.assertEqual(expectimax.estimated_chance_nodes_count, 0)
+
+    def test_probability_threshold_prunes_rare_random_moves(self):
+        expectimax = self.create_expectimax(chance_node_probability_threshold=1.5 / 36)
+        expectimax.state = self.state
+        v, _ = expectimax._alpha_beta_expectimax(2, -float('inf'), float('inf'), False)
+        self.assertAlmostEqual(v, 1)
+        self.assertAlmostEqual(expectimax.max_chance_node_pruned_probability, 2 / 36.0)
+
+    def test_sampling_expands_at_most_samples_count_random_moves_and_reports_error(self):
+        expectimax = self.create_expectimax(chance_node_samples_count=4, seed=1)
+        expectimax.state = self.state
+        random_moves_and_weights, is_sampled = expectimax._get_random_moves_and_weights()
+        self.assertTrue(is_sampled)
+        self.assertLessEqual(len(random_moves_and_weights), 4)
+        self.assertAlmostEqual(sum(weight for _, weight in random_moves_and_weights), 1)
+
+        expectimax.get_best_move(self.state, 2)
+        self.assertEqual(expectimax.estimated_chance_nodes_count, 2)
+        self.assertGreaterEqual(expectimax.max_chance_node_standard_error, 0)
+
+    def test_sampling_is_unbiased(self):
+        expectimax = self.create_expectimax(chance_node_samples_count=3, seed=1)
+        expectimax.state = self.state
+        estimates = [expectimax._alpha_beta_expectimax(1, -float('inf'), float('inf'), True)[0]
+                     for _ in range(3000)]
+        self.assertAlmostEqual(sum(estimates) / len(estimates), 200 / 36.0, delta=0.5)
+
+    def test_batched_frontier_evaluation_gives_same_result(self):
+        evaluated_batches = []
+
+        def evaluate_heuristic_values(features):
+            evaluated_batches.append(len(features))
+            return features[:, 0]
+
+        batched = self.create_expectimax(encode_state=lambda s: np.array([s.value]),
+                                         evaluate_heuristic_values=evaluate_heuristic_values)
+        expectimax = self.create_expectimax()
+        for depth in [1, 2]:
+            expectimax.state, batched.state = self.state, self.state
+            expected = expectimax._alpha_beta_expectimax(depth, -float('inf'), float('inf'), False)
+            actual = batched._alpha_beta_expectimax(depth, -float('inf'), float('inf'), False)
+            self.assertAlmostEqual(actual[0], expected[0])
+            self.assertEqual(actual[1], expected[1])
+        # a batch of the root moves at depth 1, and a batch of each chance node at depth 2
+        self.assertListEqual(evaluated_batches, [2, 11, 11])
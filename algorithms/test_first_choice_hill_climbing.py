@@ -1,6 +1,9 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 
-from algorithms.first_choice_hill_climbing import AbstractHillClimbableSpace, first_choice_hill_climbing
+from algorithms.first_choice_hill_climbing import AbstractHillClimbableSpace, first_choice_hill_climbing, \
+    parallel_first_choice_hill_climbing
 
 
 class FakeHillClimbableSpace(AbstractHillClimbableSpace):
@@ -24,6 +27,39 @@ class FakeHillClimbableSpace(AbstractHillClimbableSpace):
         return first > second
 
 
+class FakeVectorsSpace(AbstractHillClimbableSpace):
+    """
+    climbs to a target vector. like WeightsSpace, get_neighbors changes the neighbor it yielded when the next one
+    is taken
+    """
+
+    def __init__(self, max_iterations=1000):
+        self.iterations_count = 0
+        self.max_iterations = max_iterations
+        self.evaluated = []
+        self._lock = threading.Lock()
+
+    def enough_iterations(self) -> bool:
+        self.iterations_count += 1
+        return self.iterations_count >= self.max_iterations
+
+    def get_neighbors(self, state):
+        neighbor = list(state)
+        for i in range(len(neighbor)):
+            for delta in [1, -1]:
+                neighbor[i] += delta
+                yield neighbor
+                neighbor[i] -= delta
+
+    def evaluate_state(self, state) -> int:
+        with self._lock:
+            self.evaluated.append(list(state))
+        return -sum((x - target) ** 2 for x, target in zip(state, [3, -2, 5, 0]))
+
+    def is_better(self, first: int, second: int) -> bool:
+        return first > second
+
+
 class TestFirstChoiceHillClimbing(TestCase):
     def test_first_choice_hill_climbing_returns_best_found(self):
         result = first_choice_hill_climbing(FakeHillClimbableSpace(), 1)
@@ -32,3 +68,21 @@ class TestFirstChoiceHillClimbing(TestCase):
     def test_first_choice_hill_climbing_stops_eventually(self):
         first_choice_hill_climbing(FakeHillClimbableSpace(), 4)
         # test fails if it never stopped
+
+    def test_parallel_first_choice_hill_climbing_returns_the_sequential_result(self):
+        with ThreadPoolExecutor(4) as executor:
+            for initial_state in range(1, 6):
+                parallel_result = parallel_first_choice_hill_climbing(FakeHillClimbableSpace(), initial_state,
+                                                                      executor, 3)
+                self.assertEqual(parallel_result, first_choice_hill_climbing(FakeHillClimbableSpace(), initial_state))
+
+            for max_iterations in [5, 17, 1000]:
+                sequential_space, parallel_space = FakeVectorsSpace(max_iterations), FakeVectorsSpace(max_iterations)
+                sequential_result = first_choice_hill_climbing(sequential_space, [0, 0, 0, 0])
+                parallel_result = parallel_first_choice_hill_climbing(parallel_space, [0, 0, 0, 0], executor, 4)
+                self.assertListEqual(list(parallel_result), list(sequential_result))
+                self.assertEqual(parallel_space.iterations_count, sequential_space.iterations_count)
+                # the neighbors after the chosen one are evaluated only speculatively, at most 3 per step
+                self.assertLessEqual(len(parallel_space.evaluated),
+                                     len(sequential_space.evaluated) + 3 * sequential_space.iterations_count)
+            self.assertListEqual(list(parallel_result), [3, -2, 5, 0])
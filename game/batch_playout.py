@@ -0,0 +1,337 @@
+from typing import Sequence
+
+import numpy as np
+
+from game import players_arrays
+from game.board import Board, Harbor
+from game.pieces import Colony, Road
+from game.resource import Resource
+
+"""
+Structure
+---------
+A batch playout plays many independent games at once, in lockstep: every step of a turn (rolling the dice,
+producing, moving the robber, building) is a NumPy operation over the whole batch, with a leading games axis.
+All the games have the same number of players, so the player to move is the same in all of them.
+Games that end are masked out of the following turns. The arrays are:
+ -per board (built once from the Board of every game): the lands around every location (games x locations x lands),
+  the dice value and resource of every land, the score of every location (the dice combinations around it),
+  and the harbors of every location
+ -per game: the owner (-1 if uncolonised) and colony of every location, the owner of every path (-1 if unpaved),
+  and the resources, pieces, trade ratios and score of every player
+The players follow a single greedy policy (as playout.GreedyPlayoutPolicy does, without development-cards):
+they build cities before settlements, and pave roads only when there's no location to settle on, always on the
+most productive options, trading with the bank (at their harbors' ratios) when a build needs it.
+The rules are simplified where they are costly to vectorise:
+ -development-cards aren't purchased
+ -the longest-road card is held by the player with the most roads (at least 5)
+ -a player that drops resources on 7 drops them in proportion to its resources
+"""
+
+_paths = Board.get_paths()
+# the topology is kept in floats, so its dot products go through BLAS
+# locations x paths, whether the location is an end of the path
+_locations_paths = np.zeros((Board.locations_count, Board.paths_count), dtype=np.float32)
+for _path_index, _path in enumerate(_paths):
+    _locations_paths[list(_path), _path_index] = 1
+# locations x locations, whether there's a path between the locations
+_neighbours = np.minimum(_locations_paths.dot(_locations_paths.T), 1)
+np.fill_diagonal(_neighbours, 0)
+_paths_ends = np.array(_paths)
+
+_settlement_column = players_arrays.pieces_order.index(Colony.Settlement)
+_city_column = players_arrays.pieces_order.index(Colony.City)
+_road_column = players_arrays.pieces_order.index(Road.Paved)
+_winning_score = 10
+_longest_road_minimal_length = 5
+
+
+class BatchPlayout:
+    def __init__(self, boards: Sequence[Board], players_count: int, random_state: np.random.RandomState = None):
+        """
+        prepare a batch of games, a game per board. the boards aren't changed
+        :param boards: the boards of the games (only their layouts are used)
+        :param players_count: the number of players in every game
+        :param random_state: the random generator of the dice
+        """
+        self.games_count = games_count = len(boards)
+        self.players_count = players_count
+        self._random_state = random_state if random_state is not None else np.random.RandomState()
+
+        self._locations_lands = np.zeros((games_count, Board.locations_count, Board.lands_count), dtype=np.int64)
+        self._lands_dice_values = np.zeros((games_count, Board.lands_count), dtype=np.int64)
+        self._lands_resources = np.zeros((games_count, Board.lands_count, len(Resource)), dtype=np.int64)
+        self._locations_harbors = np.zeros((games_count, Board.locations_count, len(Harbor)), dtype=bool)
+        self._initial_robber_lands = np.zeros(games_count, dtype=np.int64)
+        for game, board in enumerate(boards):
+            for identifier in range(Board.lands_count):
+                land = board.get_land(identifier)
+                self._locations_lands[game, land.locations, identifier] = 1
+                if land.resource is not None:
+                    self._lands_dice_values[game, identifier] = land.dice_value
+                    self._lands_resources[game, identifier, land.resource.value] = 1
+            for location in range(Board.locations_count):
+                for harbor in board.get_harbors_of_location(location):
+                    self._locations_harbors[game, location, harbor.value] = True
+            self._initial_robber_lands[game] = board.get_robber_land().identifier
+        dice_combinations = np.where(self._lands_dice_values > 0, 6 - np.abs(7 - self._lands_dice_values), 0)
+        self._lands_dice_combinations = dice_combinations
+        # float copies for the production, whose products go through BLAS (the counts are small, so they're exact)
+        self._locations_lands_floats = self._locations_lands.astype(np.float32)
+        self._lands_resources_floats = self._lands_resources.astype(np.float32)
+        self.locations_scores = np.einsum('glk,gk->gl', self._locations_lands, dice_combinations)
+
+    def play(self, max_turns: int = 1000) -> np.ndarray:
+        """
+        play all the games from their empty boards to their ends
+        :param max_turns: the number of moves after which the games that didn't end are stopped
+        :return: np.ndarray of (games x players), the final scores. self.winners holds the winner of every game
+        (-1 for games that were stopped), and self.dice_values the last roll of every game (0 before the first)
+        """
+        games_count, players_count = self.games_count, self.players_count
+        self.owners = np.full((games_count, Board.locations_count), -1, dtype=np.int64)
+        self.colonies = np.zeros((games_count, Board.locations_count), dtype=np.int64)
+        self.roads = np.full((games_count, Board.paths_count), -1, dtype=np.int64)
+        self.resources = np.zeros((games_count, players_count, len(Resource)), dtype=np.int64)
+        self.pieces = np.tile(np.array([players_arrays.initial_pieces[piece] for piece in players_arrays.pieces_order]),
+                              (games_count, players_count, 1))
+        self.trade_ratios = np.full((games_count, players_count, len(Resource)), 4, dtype=np.int64)
+        self.scores = np.zeros((games_count, players_count), dtype=np.int64)
+        self.longest_road_players = np.full(games_count, -1, dtype=np.int64)
+        self.robber_lands = self._initial_robber_lands.copy()
+        self.winners = np.full(games_count, -1, dtype=np.int64)
+        self.dice_values = np.zeros(games_count, dtype=np.int64)
+
+        for turn in range(max_turns):
+            playing = self.winners == -1
+            if not playing.any():
+                break
+            player = turn % players_count
+            if turn < players_count * 2:
+                self._play_initialisation_move(player, is_second=turn >= players_count)
+                # the dice are rolled at the end of the last initialisation move, for the first regular move
+                if turn < players_count * 2 - 1:
+                    continue
+            else:
+                self._place_robber(player, playing & (self.dice_values == 7))
+                self._build(player, playing)
+                self.winners[playing & (self.scores[:, player] >= _winning_score)] = player
+
+            playing = self.winners == -1
+            self.dice_values = dice_values = self._random_state.randint(1, 7, size=(games_count, 2)).sum(axis=1)
+            self._produce(dice_values, playing & (dice_values != 7))
+            self._drop_resources(playing & (dice_values == 7))
+        return self.scores
+
+    def _play_initialisation_move(self, player: int, is_second: bool):
+        games = np.arange(self.games_count)
+        locations = np.argmax(np.where(self._get_free_locations(games), self.locations_scores, -1), axis=1)
+        self._set_settlements(player, games, locations)
+        if is_second:
+            self.resources[games, player] += np.einsum('gk,gkr->gr', self._locations_lands[games, locations],
+                                                       self._lands_resources)
+        # the road leads to the most productive free location next to the settlement
+        paths_scores = np.where((self.roads == -1) & (_locations_paths[locations] == 1),
+                                self._get_paths_scores(self._get_free_locations(games), self.locations_scores), -2)
+        self._pave(player, games, np.argmax(paths_scores, axis=1))
+
+    def _build(self, player: int, playing: np.ndarray):
+        """
+        build greedily, until no game can afford anything more. every round looks only at the games that built in
+        the round before
+        """
+        games = np.flatnonzero(playing)
+        while len(games) > 0:
+            resources, ratios = self.resources[games, player], self.trade_ratios[games, player]
+            pieces = self.pieces[games, player]
+            own_settlements = (self.owners[games] == player) & (self.colonies[games] == Colony.Settlement.value)
+            can_build_city = (pieces[:, _city_column] > 0) & own_settlements.any(axis=1) & \
+                _is_affordable(resources, players_arrays.city_cost, ratios)
+
+            free_locations = self._get_free_locations(games)
+            settleable = free_locations & self._get_roads_ends(player, games)
+            can_settle = settleable.any(axis=1)
+            can_build_settlement = ~can_build_city & (pieces[:, _settlement_column] > 0) & can_settle & \
+                _is_affordable(resources, players_arrays.settlement_cost, ratios)
+
+            paveable = self._get_paveable_paths(player, games)
+            can_pave = ~can_build_city & ~can_settle & (pieces[:, _road_column] > 0) & paveable.any(axis=1) & \
+                _is_affordable(resources, players_arrays.road_cost, ratios)
+
+            if can_build_city.any():
+                g = games[can_build_city]
+                locations = np.argmax(np.where(own_settlements[can_build_city], self.locations_scores[g], -1), axis=1)
+                self._pay(player, g, players_arrays.city_cost)
+                self.colonies[g, locations] = Colony.City.value
+                self.pieces[g, player, _city_column] -= 1
+                self.pieces[g, player, _settlement_column] += 1
+                self.scores[g, player] += 1
+            if can_build_settlement.any():
+                g = games[can_build_settlement]
+                locations = np.argmax(np.where(settleable[can_build_settlement], self.locations_scores[g], -1), axis=1)
+                self._pay(player, g, players_arrays.settlement_cost)
+                self._set_settlements(player, g, locations)
+            if can_pave.any():
+                g = games[can_pave]
+                paths_scores = self._get_paths_scores(free_locations[can_pave], self.locations_scores[g])
+                paths_scores = np.where(paveable[can_pave], paths_scores, -2)
+                self._pay(player, g, players_arrays.road_cost)
+                self._pave(player, g, np.argmax(paths_scores, axis=1))
+            is_building = can_build_city | can_build_settlement | can_pave
+            games = games[is_building & (self.scores[games, player] < _winning_score)]
+
+    def _get_free_locations(self, games: np.ndarray) -> np.ndarray:
+        """
+        :param games: the indices of the games to look at
+        :return: np.ndarray of (games x locations), whether the location and all its neighbours are uncolonised
+        """
+        colonised = (self.owners[games] != -1).astype(np.float32)
+        return (colonised + colonised.dot(_neighbours)) == 0
+
+    def _get_roads_ends(self, player: int, games: np.ndarray) -> np.ndarray:
+        """
+        :param games: the indices of the games to look at
+        :return: np.ndarray of (games x locations), whether the location is at the end of a road of the player
+        """
+        return (self.roads[games] == player).astype(np.float32).dot(_locations_paths.T) > 0
+
+    def _get_paveable_paths(self, player: int, games: np.ndarray) -> np.ndarray:
+        """
+        :param games: the indices of the games to look at
+        :return: np.ndarray of (games x paths), whether the player can pave the path,
+        by the rules of Board.get_unpaved_paths_near_player
+        """
+        roads, owners = self.roads[games], self.owners[games]
+        own_roads_count = (roads == player).sum(axis=1)
+        ends = np.where((own_roads_count < 2)[:, np.newaxis],
+                        (owners == player) & (self.colonies[games] == Colony.Settlement.value),
+                        self._get_roads_ends(player, games) & ((owners == -1) | (owners == player)))
+        return (roads == -1) & (ends.astype(np.float32).dot(_locations_paths) > 0)
+
+    @staticmethod
+    def _get_paths_scores(free_locations: np.ndarray, locations_scores: np.ndarray) -> np.ndarray:
+        """
+        :param free_locations: games x locations, the locations that can be settled on (see _get_free_locations)
+        :param locations_scores: games x locations, the scores of the locations
+        :return: np.ndarray of (games x paths), the score of the most productive free location at an end of
+        every path or next to it (-1 if there's none)
+        """
+        free_scores = np.where(free_locations, locations_scores, -1)
+        reachable_scores = np.maximum(free_scores, np.where(_neighbours, free_scores[:, np.newaxis, :], -1).max(axis=2))
+        return np.maximum(reachable_scores[:, _paths_ends[:, 0]], reachable_scores[:, _paths_ends[:, 1]])
+
+    def _set_settlements(self, player: int, games: np.ndarray, locations: np.ndarray):
+        self.owners[games, locations] = player
+        self.colonies[games, locations] = Colony.Settlement.value
+        self.pieces[games, player, _settlement_column] -= 1
+        self.scores[games, player] += 1
+
+        harbors = self._locations_harbors[games, locations]
+        ratios = self.trade_ratios[games, player]
+        ratios = np.where(harbors[:, Harbor.HarborGeneric.value, np.newaxis], np.minimum(ratios, 3), ratios)
+        self.trade_ratios[games, player] = np.where(harbors[:, :len(Resource)], 2, ratios)
+
+    def _pave(self, player: int, games: np.ndarray, paths: np.ndarray):
+        self.roads[games, paths] = player
+        self.pieces[games, player, _road_column] -= 1
+
+        holders = self.longest_road_players[games]
+        roads = self.roads[games]
+        roads_count = (roads == player).sum(axis=1)
+        holders_roads_count = np.where(holders == -1, _longest_road_minimal_length - 1,
+                                       (roads == holders[:, np.newaxis]).sum(axis=1))
+        taking = (holders != player) & (roads_count > holders_roads_count)
+        losers = games[taking & (holders != -1)]
+        self.scores[losers, self.longest_road_players[losers]] -= 2
+        self.scores[games[taking], player] += 2
+        self.longest_road_players[games[taking]] = player
+
+    def _pay(self, player: int, games: np.ndarray, cost: np.ndarray):
+        """
+        pay the cost of a build in every one of given games, trading with the bank for the missing resources.
+        every trade gives the resource with the most surplus trades (the build must be affordable)
+        """
+        resources, ratios = self.resources[games, player], self.trade_ratios[games, player]
+        rows = np.arange(len(games))
+        while True:
+            missing = resources < cost
+            trading = missing.any(axis=1)
+            if not trading.any():
+                break
+            rows_trading = rows[trading]
+            sources = np.argmax((resources - cost) // ratios, axis=1)[trading]
+            targets = np.argmax(missing, axis=1)[trading]
+            resources[rows_trading, sources] -= ratios[rows_trading, sources]
+            resources[rows_trading, targets] += 1
+        self.resources[games, player] = resources - cost
+
+    def _place_robber(self, player: int, placing: np.ndarray):
+        """
+        place the robber on the land that blocks the most production of the other players, and none of the player's
+        """
+        if not placing.any():
+            return
+        games = np.flatnonzero(placing)
+        owners, locations_lands = self.owners[games], self._locations_lands[games]
+        others_colonies = np.where((owners != -1) & (owners != player), self.colonies[games], 0)
+        blocked = np.einsum('glk,gl->gk', locations_lands, others_colonies) * self._lands_dice_combinations[games]
+        blocked[np.einsum('glk,gl->gk', locations_lands, (owners == player).astype(np.int64)) > 0] = -1
+        blocked[np.arange(len(games)), self.robber_lands[games]] = -2
+        self.robber_lands[games] = np.argmax(blocked, axis=1)
+
+    def _produce(self, dice_values: np.ndarray, producing: np.ndarray):
+        if not producing.any():
+            return
+        games = np.flatnonzero(producing)
+        active_lands = (self._lands_dice_values[games] == dice_values[games, np.newaxis]) & \
+            (np.arange(Board.lands_count) != self.robber_lands[games, np.newaxis])
+        # games x players x locations, the colonies of every player
+        owners = self.owners[games, np.newaxis, :] == np.arange(self.players_count)[:, np.newaxis]
+        players_colonies = np.where(owners, self.colonies[games, np.newaxis, :], 0).astype(np.float32)
+        lands_colonies = np.matmul(players_colonies, self._locations_lands_floats[games]) * \
+            active_lands[:, np.newaxis, :]
+        self.resources[games] += np.matmul(lands_colonies, self._lands_resources_floats[games]).astype(np.int64)
+
+    def _drop_resources(self, dropping: np.ndarray):
+        """
+        players with more than 7 resources drop half of them, in proportion to their resources
+        """
+        totals = self.resources.sum(axis=2)
+        dropping = dropping[:, np.newaxis] & (totals > 7)
+        if not dropping.any():
+            return
+        counts = np.where(dropping, (totals + 1) // 2, 0)
+        drops = self.resources * counts[:, :, np.newaxis] // np.maximum(totals, 1)[:, :, np.newaxis]
+        # the remainders of the proportions are dropped from the most plentiful resources
+        left = counts - drops.sum(axis=2)
+        while (left > 0).any():
+            games, players = np.nonzero(left > 0)
+            drops[games, players, np.argmax(self.resources - drops, axis=2)[games, players]] += 1
+            left[games, players] -= 1
+        self.resources -= drops
+
+
+def _is_affordable(resources: np.ndarray, cost: np.ndarray, trade_ratios: np.ndarray) -> np.ndarray:
+    """
+    :param resources: games x resources
+    :param cost: the cost of the build
+    :param trade_ratios: games x resources
+    :return: np.ndarray of games, whether the resources pay the cost, with trades at given ratios
+    """
+    missing = np.maximum(cost - resources, 0).sum(axis=1)
+    tradeable = (np.maximum(resources - cost, 0) // trade_ratios).sum(axis=1)
+    return tradeable >= missing
+
+
+def play_seeded_games(seeds: Sequence[int], players_count: int, seed: int = None, max_turns: int = 1000) \
+        -> np.ndarray:
+    """
+    play a game on the board of every seed (see Board), in a single batch
+    :param seeds: the seeds of the boards
+    :param players_count: the number of players in every game
+    :param seed: seed of the dice
+    :param max_turns: the number of moves after which the games that didn't end are stopped
+    :return: np.ndarray of (games x players), the final scores
+    """
+    return BatchPlayout([Board(board_seed) for board_seed in seeds], players_count,
+                        np.random.RandomState(seed)).play(max_turns)
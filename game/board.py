@@ -5,6 +5,7 @@ from itertools import chain
 from operator import itemgetter
 from pprint import pformat
 from textwrap import wrap
+from types import MappingProxyType
 from typing import List, Tuple, Set, Dict
 
 import networkx
@@ -108,9 +109,57 @@ def path_key(edge):
     return min(edge) * 100 + max(edge)
 
 
+class LayoutTables(namedtuple('LayoutTablesTuple', ['locations_lands', 'lands_production',
+                                                    'locations_dice_combinations', 'paths_dice_combinations',
+                                                    'surrounding_resources', 'surrounding_dice_values',
+                                                    'adjacent_to_paths_dice_values'])):
+    """
+    Immutable tables of a board's layout, built once per board (lands never move after the board is created).
+    The robber isn't taken in account in the tables, see Board.get_robber_mask. It has (in this order):
+     -np.ndarray (locations x lands) of 0/1, whether each location is adjacent to each land
+     -np.ndarray (lands x resources), the probability a dice roll produces each resource on each land
+     -the dice combinations (out of 36) that roll the numbers around each location
+     -mapping of path_key -> the dice combinations that roll the numbers adjacent to the path
+     -the resources around each location
+     -the numbers around each location
+     -mapping of path_key -> the numbers adjacent to the path
+    """
+
+    def __deepcopy__(self, memo_dict=None):
+        return self
+
+
+class BoardLayout(namedtuple('BoardLayoutTuple', ['lands_resources', 'lands_dice_values', 'locations_by_harbors'])):
+    """
+    The random part of a board, drawn from its seed (see Board.draw_layout). It has (in this order):
+     -the resource of each land, by identifier (None for the desert, which is always the last land)
+     -the number of each land, by identifier (0 for the desert)
+     -mapping of Harbor -> the locations of the harbor
+    """
+
+
+class _Topology(namedtuple('_TopologyTuple', ['locations_lands', 'edges', 'paths_lands', 'lands_locations',
+                                              'wrapping_edges', 'locations_lands_table'])):
+    """
+    The static part of a board, the same for every board, so it's built once (see Board._get_topology).
+    Lands are referred to by their identifiers. It has (in this order):
+     -the lands around each location
+     -the edges of the graph, in the order they're added to it, with the lands adjacent to each of them
+     -mapping of path_key -> the lands adjacent to the path, in the order of the graph's edges
+     -the locations around each land
+     -the paths on the shore, in order around the board (the harbors are on some of them)
+     -np.ndarray (locations x lands) of 0/1, whether each location is adjacent to each land
+    """
+
+
 class Board:
     player = 'p'
     lands = 'l'
+    _topology = None
+    # the longest road of a set of roads depends only on the topology, that all the boards share. by the path keys of
+    # the roads, so a search (e.g. encoding every leaf, see game/features.py) doesn't traverse unchanged roads again
+    _longest_road_lengths = {}
+    _max_longest_road_lengths_count = 1 << 16
 
     def __init__(self, seed: int = None):
         """
@@ -119,14 +168,60 @@ class Board:
         """
         assert seed is None or (isinstance(seed, int) and seed > 0)
 
-        self._shuffle = np.random.RandomState(seed).shuffle
         self._player_colonies_points = defaultdict(int)
-        self._players_by_roads = {}
+        # for each (player, piece-type), the number of dice combinations (out of 36) that roll
+        # the numbers around the player's pieces of that type. kept up to date by set_location & set_path
+        self._dice_combinations_by_players_pieces = defaultdict(int)
+        # for each (player, harbor), the number of the player's colonies on the harbor's locations,
+        # and the trade ratios of every player that has a colony on some harbor
+        self._harbors_colonies_counts = defaultdict(int)
+        self._trade_ratios_by_players = {}
+
+        # only the layout is drawn per board, the topology is shared by all of them
+        topology = Board._get_topology()
+        layout = Board.draw_layout(seed)
+        self._create_lands(topology, layout)
+        self._create_graph(topology)
+        self._locations_by_harbors = layout.locations_by_harbors
+        self._create_layout_tables(topology)
+
+    @staticmethod
+    def draw_layout(seed: int = None, random_state: np.random.RandomState = None) -> BoardLayout:
+        """
+        draw the lands, numbers and harbors of a board, without creating the board
+        :param seed: the seed of the board (see __init__)
+        :param random_state: optional generator to reseed with seed and draw with, instead of creating one
+        (reseeding is much faster, when drawing many layouts)
+        :return: BoardLayout, the layout of Board(seed)
+        """
+        if random_state is None:
+            random_state = np.random.RandomState(seed)
+        else:
+            random_state.seed(seed)
+        shuffle = random_state.shuffle
+        land_numbers = [2, 12] + [i for i in range(3, 12) if i != 7] * 2
+        land_resources = [Resource.Lumber, Resource.Wool, Resource.Grain
+                          ] * 4 + [Resource.Brick, Resource.Ore] * 3
+        shuffle(land_numbers)
+        shuffle(land_resources)
+
+        # get_lands_to_place_robber_on relies on the fact the 'desert' land.resource is None
+        land_resources.append(None)
+        land_numbers.append(0)
+
+        harbors = [Harbor.HarborBrick, Harbor.HarborLumber, Harbor.HarborWool, Harbor.HarborGrain, Harbor.HarborOre]
+        shuffle(harbors)
+        wrapping_edges = Board._get_topology().wrapping_edges
+        offsets = [4] * 3 + [3] * 6
+        shuffle(offsets)
+        indices = [offsets[0] - 2]
+        for i in range(1, len(offsets)):
+            indices.append(offsets[i] + indices[i - 1])
+        edges = [wrapping_edges[i] for i in indices]
 
-        self._create_and_shuffle_lands()
-        self._create_graph()
-        self._set_attributes()
-        self._create_harbors()
+        locations_by_harbors = {harbor: list(edge) for harbor, edge in zip(harbors, edges[0:len(harbors)])}
+        locations_by_harbors[Harbor.HarborGeneric] = list(chain(*edges[len(harbors):]))
+        return BoardLayout(land_resources, land_numbers, locations_by_harbors)
 
     def get_settleable_locations_by_player(self, player) -> List[Location]:
         """
@@ -229,14 +324,22 @@ class Board:
                 for v in self._roads_and_colonies.neighbors(u)
                 if self.has_road_been_paved_by(None, (u, v))]
 
+    def get_unpaved_paths_at_location(self, location: Location) -> List[Path]:
+        """
+        get the unpaved paths that lead from given location
+        :param location: the location to get the paths of
+        :return: list of the unpaved paths
+        """
+        return [(max(location, v), min(location, v)) for v in self._roads_and_colonies.neighbors(location)
+                if self.has_road_been_paved_by(None, (location, v))]
+
     def get_surrounding_resources(self, location: Location) -> List[Resource]:
         """
         get resources surrounding the settlement in this location
         :param location: the location to get the resources around
         :return: list of resources
         """
-        return [land.resource for land in self._roads_and_colonies.node[location][Board.lands]
-                if land.resource is not None]
+        return list(self._tables.surrounding_resources[location])
 
     def get_surrounding_dice_values(self, location: Location) -> List[int]:
         """
@@ -244,8 +347,7 @@ class Board:
         :param location: the location to get the numbers around
         :return: list of numbers
         """
-        return [land.dice_value for land in self._roads_and_colonies.node[location][Board.lands]
-                if land.resource is not None]
+        return list(self._tables.surrounding_dice_values[location])
 
     def get_adjacent_to_path_dice_values(self, path: Path):
         """
@@ -253,8 +355,40 @@ class Board:
         :param path: the path to get the numbers around
         :return: list of numbers
         """
-        return [land.dice_value for land in self._roads_and_colonies[path[0]][path[1]][Board.lands]
-                if land.resource is not None]
+        return list(self._tables.adjacent_to_paths_dice_values[path_key(path)])
+
+    def get_robber_mask(self) -> np.ndarray:
+        """
+        get a mask of the lands that produce resources when their number is rolled
+        :return: np.ndarray of shape (lands_count,), 0 on the land the robber is on, 1 on the others
+        """
+        mask = np.ones(Board.lands_count)
+        mask[self._robber_land.identifier] = 0
+        return mask
+
+    def get_locations_production(self, consider_robber: bool = True) -> np.ndarray:
+        """
+        get the expected amount of each resource a settlement produces per dice roll, for every location
+        :param consider_robber: if True, the land the robber is on doesn't produce
+        :return: np.ndarray of shape (locations_count, resources count), indexed by location and Resource.value
+        """
+        lands_production = self._tables.lands_production
+        if consider_robber:
+            lands_production = lands_production * self.get_robber_mask()[:, np.newaxis]
+        return self._tables.locations_lands.dot(lands_production)
+
+    def get_locations_scores(self, resources_weights: np.ndarray = None, consider_robber: bool = True) -> np.ndarray:
+        """
+        score all the locations on the board at once, by the weighted expected production of a settlement there
+        the score doesn't take in account whether the location can be settled
+        :param resources_weights: optional weight per resource (indexed by Resource.value). defaults to 1 for all
+        :param consider_robber: if True, the land the robber is on doesn't produce
+        :return: np.ndarray of shape (locations_count,), the score of every location
+        """
+        production = self.get_locations_production(consider_robber)
+        if resources_weights is None:
+            return production.sum(axis=1)
+        return production.dot(resources_weights)
 
     def get_colonies_score(self, player) -> int:
         """
@@ -274,12 +408,22 @@ class Board:
         :param player: the player fir whom the longest road is calculated
         :return: max(4, the length of the longest road of specified player)
         """
-        roads_paved_by_player = [e for e in self._roads_and_colonies.edges()
-                                 if self.has_road_been_paved_by(player, e)]
-
         roads_threshold = 4
-        if len(roads_paved_by_player) <= roads_threshold:
+        roads_keys = frozenset(key for key, road_player in self._players_by_roads.items() if road_player is player)
+        if len(roads_keys) <= roads_threshold:
             return roads_threshold
+        longest_road_length = Board._longest_road_lengths.get(roads_keys)
+        if longest_road_length is None:
+            if len(Board._longest_road_lengths) >= Board._max_longest_road_lengths_count:
+                Board._longest_road_lengths.clear()
+            longest_road_length = Board._compute_longest_road_length_of_roads(
+                [(key // 100, key % 100) for key in roads_keys])
+            Board._longest_road_lengths[roads_keys] = longest_road_length
+        return longest_road_length
+
+    @staticmethod
+    def _compute_longest_road_length_of_roads(roads_paved_by_player: List[Path]) -> int:
+        roads_threshold = 4
         sub_graph_of_player = networkx.Graph(roads_paved_by_player)
         max_road_length = roads_threshold
 
@@ -319,6 +463,38 @@ class Board:
                     players_to_resources[player][land.resource] += colony.value
         return players_to_resources
 
+    def get_dice_values_equivalence_classes(self) -> List[List[int]]:
+        """
+        group the dice values (other than 7) into classes of values that give exactly the same resources to the players.
+        values no colony produces on (i.e all their lands are blocked by the robber) fall in the same class.
+        the classes are ordered by their smallest dice value, and the values in each class are sorted
+        :return: List[List[int]], the equivalence classes of the dice values
+        """
+        production_by_dice_values = {dice_value: defaultdict(int) for dice_value in range(2, 13) if dice_value != 7}
+        for land in self._lands:
+            if land.resource is None or land is self._robber_land:
+                continue
+            production = production_by_dice_values[land.dice_value]
+            for location in land.locations:
+                player, colony = self._roads_and_colonies.node[location][Board.player]
+                if player is not None:
+                    production[(player, land.resource)] += colony.value
+
+        dice_values_by_production = {}
+        for dice_value, production in sorted(production_by_dice_values.items()):
+            dice_values_by_production.setdefault(frozenset(production.items()), []).append(dice_value)
+        return list(dice_values_by_production.values())
+
+    def get_dice_combinations_count(self, player, piece) -> int:
+        """
+        get the number of dice combinations (out of 36) that roll the numbers surrounding the pieces of given type
+        of given player. a number is counted once for every piece it is adjacent to, and the robber is ignored
+        :param player: the player to get the count of
+        :param piece: the piece type (Colony.Settlement, Colony.City or Road.Paved)
+        :return: int, the sum of the dice combinations
+        """
+        return self._dice_combinations_by_players_pieces[(player, piece)]
+
     def get_colony_type_at_location(self, location: Location) -> Colony:
         return self._roads_and_colonies.node[location][Board.player][1]
 
@@ -334,10 +510,22 @@ class Board:
 
         vertex_attributes = self._roads_and_colonies.node[location]
 
-        previous_colony = self.get_colony_type_at_location(location)
+        previous_player, previous_colony = vertex_attributes[Board.player]
         self._player_colonies_points[player] -= previous_colony.value
         self._player_colonies_points[player] += colony.value
 
+        dice_combinations = self._tables.locations_dice_combinations[location]
+        if previous_colony is not Colony.Uncolonised:
+            self._dice_combinations_by_players_pieces[(previous_player, previous_colony)] -= dice_combinations
+        if colony is not Colony.Uncolonised:
+            self._dice_combinations_by_players_pieces[(player, colony)] += dice_combinations
+        if previous_player is not player or colony is Colony.Uncolonised:
+            for harbor in self.get_harbors_of_location(location):
+                if previous_colony is not Colony.Uncolonised:
+                    self._add_harbor_colony(previous_player, harbor, -1)
+                if colony is not Colony.Uncolonised:
+                    self._add_harbor_colony(player, harbor, 1)
+
         if colony is colony.Uncolonised and previous_colony is not colony.Uncolonised:
             for land in vertex_attributes[Board.lands]:
                 land.colonies.pop()
@@ -372,9 +560,113 @@ class Board:
         assert not (player is None and road != Road.Unpaved)
         if road == Road.Unpaved:
             player = None
-        self._roads_and_colonies[path[0]][path[1]][Board.player] = (player, road)
+        edge_attributes = self._roads_and_colonies[path[0]][path[1]]
+        previous_player = self._players_by_roads[path_key(path)]
+        dice_combinations = self._tables.paths_dice_combinations[path_key(path)]
+        if previous_player is not None:
+            self._dice_combinations_by_players_pieces[(previous_player, Road.Paved)] -= dice_combinations
+        if player is not None:
+            self._dice_combinations_by_players_pieces[(player, Road.Paved)] += dice_combinations
+        edge_attributes[Board.player] = (player, road)
         self._players_by_roads[path_key(path)] = player
 
+    def get_occupancy(self, player_indices: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        get a compact encoding of the colonies and roads on the board
+        :param player_indices: dictionary of the players to their indices in the game (must be smaller than 32,
+        so (index << 2) | colony.value fits in an int8)
+        :return: tuple of two np.int8 arrays:
+        the locations occupancy, indexed by location. (player index << 2) | colony.value, 0 if uncolonised
+        the paths occupancy, ordered by path_key. player index + 1, 0 if unpaved
+        """
+        locations_occupancy = np.zeros(len(Board._vertices), dtype=np.int8)
+        for location in Board._vertices:
+            player, colony = self._roads_and_colonies.node[location][Board.player]
+            if player is not None:
+                locations_occupancy[location] = (player_indices[player] << 2) | colony.value
+        paths_occupancy = np.array([0 if self._players_by_roads[key] is None
+                                    else player_indices[self._players_by_roads[key]] + 1
+                                    for key in sorted(self._players_by_roads.keys())], dtype=np.int8)
+        return locations_occupancy, paths_occupancy
+
+    def set_occupancy(self, players: List, locations_occupancy: np.ndarray, paths_occupancy: np.ndarray):
+        """
+        set the colonies and roads on the board, from the encoding returned by get_occupancy
+        everything that was on the board before is overridden
+        :param players: the players of the game, ordered by their indices
+        :param locations_occupancy: the locations occupancy, as returned by get_occupancy
+        :param paths_occupancy: the paths occupancy, as returned by get_occupancy
+        :return: None
+        """
+        self._player_colonies_points = defaultdict(int)
+        for player in players:
+            self._player_colonies_points[player] = 0
+        self._dice_combinations_by_players_pieces = defaultdict(int)
+        self._harbors_colonies_counts = defaultdict(int)
+        self._trade_ratios_by_players = {}
+        for land in self._lands:
+            del land.colonies[:]
+        for location, code in zip(Board._vertices, locations_occupancy.tolist()):
+            vertex_attributes = self._roads_and_colonies.node[location]
+            if code == 0:
+                vertex_attributes[Board.player] = (None, Colony.Uncolonised)
+                continue
+            player, colony = players[code >> 2], Colony(code & 3)
+            vertex_attributes[Board.player] = (player, colony)
+            self._player_colonies_points[player] += colony.value
+            self._dice_combinations_by_players_pieces[(player, colony)] += \
+                self._tables.locations_dice_combinations[location]
+            for harbor in self.get_harbors_of_location(location):
+                self._add_harbor_colony(player, harbor, 1)
+            for land in vertex_attributes[Board.lands]:
+                land.colonies.append(colony)
+
+        for key, code in zip(sorted(self._players_by_roads.keys()), paths_occupancy.tolist()):
+            player, road = (None, Road.Unpaved) if code == 0 else (players[code - 1], Road.Paved)
+            edge_attributes = self._roads_and_colonies[key // 100][key % 100]
+            edge_attributes[Board.player] = (player, road)
+            self._players_by_roads[key] = player
+            if player is not None:
+                self._dice_combinations_by_players_pieces[(player, road)] += self._tables.paths_dice_combinations[key]
+
+    def copy_layout(self):
+        """
+        get an empty board with the same lands, numbers and harbors as this one.
+        the static data is shared, and only the graph and lands are copied (without the colonies and roads on them)
+        :return: Board, an empty copy of this board
+        """
+        board = Board.__new__(Board)
+        board._player_colonies_points = defaultdict(int)
+        board._players_by_roads = {key: None for key in self._players_by_roads.keys()}
+        board._dice_combinations_by_players_pieces = defaultdict(int)
+        board._harbors_colonies_counts = defaultdict(int)
+        board._trade_ratios_by_players = {}
+        board._lands = [Land(land.resource, land.dice_value, land.identifier, land.locations, [])
+                        for land in self._lands]
+        board._robber_land = board._lands[self._robber_land.identifier]
+        board._locations_by_harbors = self._locations_by_harbors
+        board._tables = self._tables
+
+        def copied_lands(lands):
+            return [board._lands[land.identifier] for land in lands]
+
+        board._roads_and_colonies = networkx.Graph()
+        board._roads_and_colonies.add_nodes_from(
+            (v, {Board.lands: copied_lands(attributes[Board.lands]), Board.player: (None, Colony.Uncolonised)})
+            for v, attributes in self._roads_and_colonies.nodes_iter(data=True))
+        board._roads_and_colonies.add_edges_from(
+            (u, v, {Board.lands: copied_lands(attributes[Board.lands]), Board.player: (None, Road.Unpaved)})
+            for u, v, attributes in self._roads_and_colonies.edges_iter(data=True))
+        return board
+
+    @staticmethod
+    def get_paths() -> List[Path]:
+        """
+        get all the paths of the board. they are the same for every board
+        :return: List[Path], the paths ordered by path_key (the order of the paths occupancy, see get_occupancy)
+        """
+        return sorted(Board._create_edges(), key=path_key)
+
     def get_robber_land(self) -> Land:
         """
         get the land where the robber currently lays
@@ -509,14 +801,81 @@ class Board:
         :param harbor: harbor-type to check if given player is settled nearby
         :return: True if player settled near the harbor-type, false otherwise
         """
-        for location in self._locations_by_harbors[harbor]:
-            if self.is_colonised_by(player, location):
-                return True
-        return False
+        return self._harbors_colonies_counts.get((player, harbor), 0) > 0
+
+    def get_trade_ratio(self, player, resource: Resource) -> int:
+        """
+        get the number of cards of given resource the player gives in a trade with the bank, for a single card
+        :param player: the player that trades
+        :param resource: the resource the player gives
+        :return: 2 if the player is on the harbor of the resource, otherwise 3 if on a generic harbor, otherwise 4
+        """
+        return self._trade_ratios_by_players.get(player, Board._default_trade_ratios)[resource.value]
+
+    _default_trade_ratios = (4,) * len(Resource)
+
+    def get_harbors_of_location(self, location: Location) -> List[Harbor]:
+        """
+        :param location: the location to get the harbors of
+        :return: List[Harbor], the harbors a colony on given location trades at
+        """
+        return [harbor for harbor, locations in self._locations_by_harbors.items() if location in locations]
+
+    def _add_harbor_colony(self, player, harbor: Harbor, count: int):
+        """
+        update the count of given player's colonies on the given harbor, and the player's trade ratios
+        :param player: the player that settled on/was removed from the harbor
+        :param harbor: the harbor
+        :param count: 1 when a colony was put on the harbor, -1 when it was removed
+        :return: None
+        """
+        self._harbors_colonies_counts[(player, harbor)] += count
+        generic_ratio = 3 if self.is_player_on_harbor(player, Harbor.HarborGeneric) else 4
+        self._trade_ratios_by_players[player] = tuple(
+            2 if self.is_player_on_harbor(player, Harbor(resource.value)) else generic_ratio for resource in Resource)
+
+    def get_land(self, identifier: int) -> Land:
+        """
+        get the land with given identifier
+        :param identifier: the identifier of the land
+        :return: Land, the land with that identifier
+        """
+        return self._lands[identifier]
 
     def get_lands_to_place_robber_on(self) -> List[Land]:
         return [land for land in self._lands if land.identifier != self._robber_land.identifier]
 
+    def get_robber_placement_equivalence_classes(self) -> List[List[Land]]:
+        """
+        group the lands the robber can be placed on into classes of lands that block exactly the same production.
+        lands without adjacent colonies (and the desert) block nothing, so they all fall in the same class.
+        lands with the same resource and dice value, that block the same amount from the same players are equivalent too
+        the classes are ordered by their first land, and the lands in each class keep the order of the lands array
+        :return: List[List[Land]], the equivalence classes of the possible robber placements
+        """
+        classes_by_blocked_production = {}
+        for land in self.get_lands_to_place_robber_on():
+            blocked_production = self._get_production_blocked_by_robber_on(land)
+            classes_by_blocked_production.setdefault(blocked_production, []).append(land)
+        return list(classes_by_blocked_production.values())
+
+    def _get_production_blocked_by_robber_on(self, land: Land):
+        """
+        get a hashable description of the production the robber blocks when placed on given land
+        :param land: the land the robber is placed on
+        :return: None if nothing is blocked, otherwise (dice value, resource, frozenset of (player, amount) pairs)
+        """
+        if land.resource is None:
+            return None
+        amounts_by_players = defaultdict(int)
+        for location in land.locations:
+            player, colony = self._roads_and_colonies.node[location][Board.player]
+            if player is not None:
+                amounts_by_players[player] += colony.value
+        if not amounts_by_players:
+            return None
+        return land.dice_value, land.resource, frozenset(amounts_by_players.items())
+
     _vertices_rows = [
         [i for i in range(0, 3)],
         [i for i in range(3, 7)],
@@ -532,6 +891,9 @@ class Board:
         [i for i in range(51, 54)]
     ]
     _vertices = [v for vertices_row in _vertices_rows for v in vertices_row]
+    locations_count = len(_vertices)
+    paths_count = 72
+    lands_count = 19
 
     @staticmethod
     def _compute_longest_road_length(g: networkx.Graph, u: Location, visited: Set[Path]):
@@ -546,63 +908,96 @@ class Board:
             visited.remove((u, v))
         return max_road_length
 
-    def _create_and_shuffle_lands(self):
-        land_numbers = [2, 12] + [i for i in range(3, 12) if i != 7] * 2
-        land_resources = [Resource.Lumber, Resource.Wool, Resource.Grain
-                          ] * 4 + [Resource.Brick, Resource.Ore] * 3
-        self._shuffle(land_numbers)
-        self._shuffle(land_resources)
-
-        # get_lands_to_place_robber_on relies on the fact the 'desert' land.resource is None
-        land_resources.append(None)
-        land_numbers.append(0)
-
-        ids = range(len(land_resources))
-        locations = [[] for _ in range(len(land_resources))]
-        surrounding_colonies = [[] for _ in range(len(land_resources))]
-
-        lands = zip(land_resources, land_numbers, ids, locations, surrounding_colonies)
-        self._lands = [Land(*land) for land in lands]
+    def _create_lands(self, topology: _Topology, layout: BoardLayout):
+        lands = zip(layout.lands_resources, layout.lands_dice_values, topology.lands_locations)
+        self._lands = [Land(resource, dice_value, identifier, list(locations), [])
+                       for identifier, (resource, dice_value, locations) in enumerate(lands)]
 
         self._robber_land = self._lands[-1]
         # Note how the robber location relies on the fact that the last
         # land in the list is the desert
 
-    def _create_graph(self):
+    def _create_graph(self, topology: _Topology):
+        lands = self._lands
         self._roads_and_colonies = networkx.Graph()
-        self._roads_and_colonies.add_nodes_from(Board._vertices)
-        self._roads_and_colonies.add_edges_from(Board._create_edges())
+        self._roads_and_colonies.add_nodes_from(
+            (v, {Board.lands: [lands[i] for i in identifiers], Board.player: (None, Colony.Uncolonised)})
+            for v, identifiers in zip(Board._vertices, topology.locations_lands))
+        self._roads_and_colonies.add_edges_from(
+            (u, v, {Board.lands: [lands[i] for i in identifiers], Board.player: (None, Road.Unpaved)})
+            for u, v, identifiers in topology.edges)
+        self._players_by_roads = dict.fromkeys(topology.paths_lands)
+
+    def _create_layout_tables(self, topology: _Topology):
+        desert = self._robber_land.identifier
+        lands_resources = [land.resource for land in self._lands]
+        lands_dice_values = [land.dice_value for land in self._lands]
+        lands_dice_combinations = [6 - abs(7 - dice_value) for dice_value in lands_dice_values]
+        lands_dice_combinations[desert] = 0
+        lands_production = np.zeros((Board.lands_count, len(Resource)))
+        for land in self._lands:
+            if land.identifier != desert:
+                lands_production[land.identifier, land.resource.value] = \
+                    lands_dice_combinations[land.identifier] / 36.0
+
+        surrounding_resources, surrounding_dice_values, locations_dice_combinations = [], [], []
+        for identifiers in topology.locations_lands:
+            surrounding_resources.append(tuple(lands_resources[i] for i in identifiers if i != desert))
+            surrounding_dice_values.append(tuple(lands_dice_values[i] for i in identifiers if i != desert))
+            locations_dice_combinations.append(sum(lands_dice_combinations[i] for i in identifiers))
+
+        adjacent_to_paths_dice_values, paths_dice_combinations = {}, {}
+        for key, identifiers in topology.paths_lands.items():
+            adjacent_to_paths_dice_values[key] = tuple(lands_dice_values[i] for i in identifiers if i != desert)
+            paths_dice_combinations[key] = sum(lands_dice_combinations[i] for i in identifiers)
+
+        lands_production.flags.writeable = False
+        self._tables = LayoutTables(topology.locations_lands_table, lands_production,
+                                    tuple(locations_dice_combinations), MappingProxyType(paths_dice_combinations),
+                                    tuple(surrounding_resources), tuple(surrounding_dice_values),
+                                    MappingProxyType(adjacent_to_paths_dice_values))
 
-    def _create_harbors(self):
-        harbors = [Harbor.HarborBrick, Harbor.HarborLumber, Harbor.HarborWool, Harbor.HarborGrain, Harbor.HarborOre]
-        self._shuffle(harbors)
-        edges = self._get_harbors_edges()
+    @staticmethod
+    def _get_topology() -> _Topology:
+        if Board._topology is None:
+            Board._topology = Board._create_topology()
+        return Board._topology
 
-        self._locations_by_harbors = {harbor: list(edge) for harbor, edge in zip(harbors, edges[0:len(harbors)])}
-        self._locations_by_harbors[Harbor.HarborGeneric] = list(chain(*edges[len(harbors):]))
+    @staticmethod
+    def _create_topology() -> _Topology:
+        vertices_to_lands = Board._create_vertices_to_lands_mapping(list(range(Board.lands_count)))
+        edges = Board._create_edges()
+        graph = networkx.Graph()
+        graph.add_nodes_from(Board._vertices)
+        graph.add_edges_from(edges)
+        assert len(graph.edges()) == Board.paths_count
+
+        paths_lands = {path_key((u, v)): tuple(land for land in vertices_to_lands[u] if land in vertices_to_lands[v])
+                       for u, v in graph.edges()}
+        lands_locations = [[] for _ in range(Board.lands_count)]
+        for location, lands in vertices_to_lands.items():
+            for land in lands:
+                lands_locations[land].append(location)
 
-    def _get_harbors_edges(self):
-        wrapping_edges = self._get_wrapping_edges()
-        offsets = [4] * 3 + [3] * 6
-        self._shuffle(offsets)
-        indices = [offsets[0] - 2]
-        for i in range(1, len(offsets)):
-            indices.append(offsets[i] + indices[i - 1])
-        return [wrapping_edges[i] for i in indices]
+        def is_wrapping_edge(w, x):
+            return len(paths_lands[path_key((w, x))]) == 1
 
-    def _get_wrapping_edges(self):
         u, v = (3, 0)
         wrapping_edges = [(u, v)]
         while (u, v) != (7, 3):
-            assert len([w for w in self._roads_and_colonies.neighbors(v)
-                        if w != u and self._is_wrapping_edge(v, w)]) == 1
-            w = next(w for w in self._roads_and_colonies.neighbors(v) if w != u and self._is_wrapping_edge(v, w))
+            assert len([w for w in graph.neighbors(v) if w != u and is_wrapping_edge(v, w)]) == 1
+            w = next(w for w in graph.neighbors(v) if w != u and is_wrapping_edge(v, w))
             wrapping_edges.append((v, w))
             u, v = v, w
-        return wrapping_edges
 
-    def _is_wrapping_edge(self, u, v):
-        return len(self._roads_and_colonies[u][v][Board.lands]) == 1
+        locations_lands_table = np.zeros((Board.locations_count, Board.lands_count))
+        for land, locations in enumerate(lands_locations):
+            locations_lands_table[locations, land] = 1
+        locations_lands_table.flags.writeable = False
+        return _Topology(tuple(tuple(vertices_to_lands[v]) for v in Board._vertices),
+                         tuple((u, v, paths_lands[path_key((u, v))]) for u, v in edges),
+                         MappingProxyType(paths_lands), tuple(tuple(locations) for locations in lands_locations),
+                         tuple(wrapping_edges), locations_lands_table)
 
     @staticmethod
     def _create_edges():
@@ -631,19 +1026,14 @@ class Board:
             edges.append((smaller_row[i], larger_row[i]))
             edges.append((smaller_row[i], larger_row[i + 1]))
 
-    def _set_attributes(self):
-        vertices_to_lands = self._create_vertices_to_lands_mapping()
-        self._set_vertices_attributes(vertices_to_lands)
-        self._set_edges_attributes(vertices_to_lands)
-        self._set_lands_attributes(vertices_to_lands)
-
-    def _create_vertices_to_lands_mapping(self):
+    @staticmethod
+    def _create_vertices_to_lands_mapping(lands):
         land_rows = [
-            self._lands[0:3],
-            self._lands[3:7],
-            self._lands[7:12],
-            self._lands[12:16],
-            self._lands[16:19]
+            lands[0:3],
+            lands[3:7],
+            lands[7:12],
+            lands[12:16],
+            lands[16:19]
         ]
         vertices_rows_per_land_row = [
             Board._vertices_rows[0:3] + [Board._vertices_rows[3][1:-1]],
@@ -660,26 +1050,6 @@ class Board:
             Board._create_top_vertex_mapping(vertices_map, vertices_rows[3], land_row)
         return vertices_map
 
-    def _set_vertices_attributes(self, vertices_to_lands):
-        networkx.set_node_attributes(self._roads_and_colonies, Board.lands, vertices_to_lands)
-        vertices_to_players = {v: (None, Colony.Uncolonised) for v in Board._vertices}
-        networkx.set_node_attributes(self._roads_and_colonies, Board.player, vertices_to_players)
-
-    def _set_edges_attributes(self, vertices_to_lands):
-        for edge in self._roads_and_colonies.edges():
-            lands_intersection = [land for land in vertices_to_lands[edge[0]]
-                                  if land in vertices_to_lands[edge[1]]]
-            edge_attributes = self._roads_and_colonies[edge[0]][edge[1]]
-            edge_attributes[Board.lands] = lands_intersection
-            edge_attributes[Board.player] = (None, Road.Unpaved)
-            self._players_by_roads[path_key(edge)] = None
-
-    @staticmethod
-    def _set_lands_attributes(vertices_to_lands):
-        for location, lands in vertices_to_lands.items():
-            for land in lands:
-                land.locations.append(location)
-
     @staticmethod
     def _create_top_vertex_mapping(vertices_map, vertices, lands):
         for vertex, land in zip(vertices, lands):
@@ -0,0 +1,109 @@
+from typing import Sequence
+
+import numpy as np
+
+from game.board import Board
+from game.resource import Resource
+
+"""
+Structure
+---------
+A board corpus holds the layouts of many seeded boards (see Board.draw_layout), with statistics of each of them,
+so boards can be selected (e.g. balanced boards for a tournament) without creating them: Board(seed) of a chosen
+record is the board it describes.
+The corpus is a NumPy structured array, saved as a .npy file, with a fixed-size record per seed, so it's loaded as
+a memory map, and only the fields and records that are used are read from disk. Every record has:
+ -the seed
+ -the resource of each land, by identifier (Resource.value, -1 for the desert)
+ -the number of each land (0 for the desert)
+ -the harbor of each location (Harbor.value, -1 if there's none)
+and the statistics, where the pips of a number are the dice combinations (out of 36) that roll it:
+ -the pips of each resource (the sum over its lands)
+ -the pips of the most productive location
+ -the number of pairs of adjacent lands that are both 6 or 8
+"""
+
+corpus_dtype = np.dtype([('seed', np.int64),
+                         ('lands_resources', np.int8, Board.lands_count),
+                         ('lands_dice_values', np.int8, Board.lands_count),
+                         ('locations_harbors', np.int8, Board.locations_count),
+                         ('resources_pips', np.int16, len(Resource)),
+                         ('max_location_pips', np.int8),
+                         ('adjacent_red_numbers', np.int8)])
+
+_board = Board()
+_lands = [_board.get_land(identifier) for identifier in range(Board.lands_count)]
+_lands_locations = [land.locations for land in _lands]
+_resources_lands_counts = np.bincount([land.resource.value for land in _lands if land.resource is not None],
+                                      minlength=len(Resource))
+# lands x locations, whether the location is around the land
+_lands_locations_table = np.zeros((Board.lands_count, Board.locations_count), dtype=np.int64)
+for _identifier, _locations in enumerate(_lands_locations):
+    _lands_locations_table[_identifier, _locations] = 1
+# adjacent lands share a path, i.e. two locations
+_adjacent_lands = np.array([(u, v) for u in range(Board.lands_count) for v in range(u + 1, Board.lands_count)
+                            if len(set(_lands_locations[u]) & set(_lands_locations[v])) == 2])
+
+
+def create_board_corpus(file_name: str, seeds: Sequence[int], chunk_size: int = 65536) -> np.ndarray:
+    """
+    create a corpus of the boards of given seeds. the records are written a chunk at a time,
+    so the corpus can be larger than the memory
+    :param file_name: the .npy file to write the corpus to
+    :param seeds: the seeds of the boards, positive integers (see Board.__init__)
+    :param chunk_size: the number of records created at a time
+    :return: np.ndarray, the corpus, memory-mapped to the file
+    """
+    corpus = np.lib.format.open_memmap(file_name, mode='w+', dtype=corpus_dtype, shape=(len(seeds),))
+    for start in range(0, len(seeds), chunk_size):
+        chunk_seeds = seeds[start:start + chunk_size]
+        corpus[start:start + len(chunk_seeds)] = _create_records(chunk_seeds)
+    corpus.flush()
+    return corpus
+
+
+def load_board_corpus(file_name: str) -> np.ndarray:
+    """
+    :param file_name: the .npy file of the corpus (see create_board_corpus)
+    :return: np.ndarray, the corpus, memory-mapped (read-only) to the file
+    """
+    return np.load(file_name, mmap_mode='r')
+
+
+def get_balanced_seeds(corpus: np.ndarray, count: int) -> np.ndarray:
+    """
+    get the seeds of the most balanced boards of a corpus: boards without adjacent 6 and 8 lands,
+    ordered by how evenly the resources are produced (the spread of their pips per land)
+    :param corpus: the corpus to select from
+    :param count: the number of seeds to get
+    :return: np.ndarray, the seeds, from the most balanced board. fewer than count if there are no more balanced boards
+    """
+    candidates = np.flatnonzero(corpus['adjacent_red_numbers'] == 0)
+    spreads = np.ptp(corpus['resources_pips'][candidates] / _resources_lands_counts, axis=1)
+    return corpus['seed'][candidates[np.argsort(spreads, kind='mergesort')[:count]]]
+
+
+def _create_records(seeds: Sequence[int]) -> np.ndarray:
+    resources = np.empty((len(seeds), Board.lands_count), dtype=np.int64)
+    dice_values = np.empty((len(seeds), Board.lands_count), dtype=np.int64)
+    harbors = np.full((len(seeds), Board.locations_count), -1, dtype=np.int64)
+    random_state = np.random.RandomState()
+    for i, seed in enumerate(seeds):
+        layout = Board.draw_layout(int(seed), random_state)
+        resources[i] = [resource.value if resource is not None else -1 for resource in layout.lands_resources]
+        dice_values[i] = layout.lands_dice_values
+        for harbor, locations in layout.locations_by_harbors.items():
+            harbors[i, locations] = harbor.value
+
+    records = np.zeros(len(seeds), dtype=corpus_dtype)
+    records['seed'] = seeds
+    records['lands_resources'] = resources
+    records['lands_dice_values'] = dice_values
+    records['locations_harbors'] = harbors
+    pips = np.where(resources != -1, 6 - np.abs(7 - dice_values), 0)
+    for resource in Resource:
+        records['resources_pips'][:, resource.value] = np.where(resources == resource.value, pips, 0).sum(axis=1)
+    records['max_location_pips'] = pips.dot(_lands_locations_table).max(axis=1)
+    red = (dice_values == 6) | (dice_values == 8)
+    records['adjacent_red_numbers'] = (red[:, _adjacent_lands[:, 0]] & red[:, _adjacent_lands[:, 1]]).sum(axis=1)
+    return records
@@ -3,7 +3,6 @@ from typing import Dict
 
 from algorithms.abstract_state import AbstractMove, AbstractRandomMove
 from game.development_cards import DevelopmentCard
-from players.abstract_player import AbstractPlayer
 
 
 class CatanMove(AbstractMove):
@@ -50,36 +49,36 @@ class RandomMove(AbstractRandomMove):
         self._probability = probability
         self._state = state
         self._previous_rolled_dice = self._state.current_dice_number
-        self._resources_by_players = {}
+        self._resources_delta = None
 
     def apply(self):
         if self._state.is_initialisation_phase():
             return
         if self._rolled_dice == 7:
-            update_method = AbstractPlayer.remove_resource
-            self._resources_by_players = {player: player.choose_resources_to_drop() for player in self._state.players}
+            resources_by_players = {player: player.choose_resources_to_drop() for player in self._state.players}
+            self._resources_delta = -self._state.get_resources_matrix(resources_by_players)
         else:
-            update_method = AbstractPlayer.add_resource
-            self._resources_by_players = self._state.board.get_players_to_resources_by_dice_value(self._rolled_dice)
-        AbstractPlayer.update_players_resources(self._resources_by_players, update_method)
+            resources_by_players = self._state.board.get_players_to_resources_by_dice_value(self._rolled_dice)
+            self._resources_delta = self._state.get_resources_matrix(resources_by_players)
+        self._state.players_resources += self._resources_delta
         self._state.current_dice_number = self._rolled_dice
 
         player = self._state.get_current_player()
         for card, amount in self._development_card_purchases.items():
             for _ in range(amount):
                 player.add_unexposed_development_card(card)
+        self._state.add_victory_point_development_cards_points(
+            player, self._development_card_purchases.get(DevelopmentCard.VictoryPoint, 0))
 
     def revert(self):
         if self._state.is_initialisation_phase():
             return
-        if self._rolled_dice == 7:
-            update_method = AbstractPlayer.add_resource
-        else:
-            update_method = AbstractPlayer.remove_resource
-        AbstractPlayer.update_players_resources(self._resources_by_players, update_method)
+        self._state.players_resources -= self._resources_delta
         self._state.current_dice_number = self._previous_rolled_dice
 
         player = self._state.get_current_player()
         for card, amount in self._development_card_purchases.items():
             for _ in range(amount):
                 player.remove_unexposed_development_card(card)
+        self._state.add_victory_point_development_cards_points(
+            player, -self._development_card_purchases.get(DevelopmentCard.VictoryPoint, 0))
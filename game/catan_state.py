@@ -1,13 +1,18 @@
 import copy
+import struct
 from collections import defaultdict
 from collections import namedtuple
+from functools import lru_cache
 from itertools import combinations_with_replacement
-from typing import List, Tuple, Dict, Union
+from math import factorial
+from types import MappingProxyType
+from typing import List, Tuple, Dict, Union, Callable, Sequence
 
 import numpy as np
 
 from algorithms.abstract_state import AbstractState
-from game.board import Board, Harbor, Location, Path
+from game import players_arrays
+from game.board import Board, Land, Location, Path
 from game.catan_moves import CatanMove, RandomMove
 from game.development_cards import DevelopmentCard
 from game.pieces import Colony, Road
@@ -16,19 +21,111 @@ from players.abstract_player import AbstractPlayer
 
 ResourceExchange = namedtuple('ResourceExchange', ['source_resource', 'target_resource', 'count'])
 PurchaseOption = namedtuple('PurchaseOption', ['purchased_cards_counters', 'probability'])
+MovesCount = namedtuple('MovesCount', ['total', 'exposing_development_cards', 'trading', 'paving_roads',
+                                       'building_settlements', 'building_cities', 'purchasing_development_cards'])
+"""
+The number of the next moves of a state, and how many of them do each kind of action
+(a move usually does several, so the categories overlap):
+ -total: the number of moves, len(get_next_moves())
+ -exposing_development_cards: dictionary of DevelopmentCard -> the number of moves that expose it
+ -trading, paving_roads, building_settlements, building_cities, purchasing_development_cards: the number of moves
+  that trade with the bank, pave at least one road, etc.
+"""
 KnightCardsCount = int
 
+"""
+Snapshot format
+---------------
+A snapshot is a compact binary encoding of a game position (little-endian):
+ -header: turns count (uint16), then a byte for each of: players count, current player index, current dice number,
+  purchased development-cards count, robber land id, deck size, largest army stack size, longest road stack size
+ -locations occupancy: int8 per location (see Board.get_occupancy)
+ -paths occupancy: int8 per path (see Board.get_occupancy)
+ -unexposed development-cards counters: int8 per DevelopmentCard
+ -deck: int8 per card left in the deck, DevelopmentCard.value
+ -largest army stack, then longest road stack: (player index, size) int8 pairs
+ -players buffer: int16 per cell (see game/players_arrays.py)
+The lands, numbers and harbors aren't part of the snapshot. It has to be restored to a state with the same board
+i.e a state created with the same seed, or a clone.
+"""
+_snapshot_header = struct.Struct('<H8B')
+
+
+def _binomial(n: int, k: int) -> int:
+    if k > n:
+        return 0
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+
+@lru_cache(maxsize=512)
+def _get_development_cards_purchase_options(unexposed_cards_counts: Tuple[int, ...], cards_to_purchase_count: int) \
+        -> Tuple[PurchaseOption, ...]:
+    """
+    compute the multivariate-hypergeometric distribution of purchasing cards_to_purchase_count cards from a deck with
+    given counts of cards, in closed form:
+    P(purchased counts == (x_1, ..., x_n)) = C(K_1, x_1) * ... * C(K_n, x_n) / C(K_1 + ... + K_n, purchased count)
+    the options are ordered by descending counts of the cards, in the order of DevelopmentCard
+    :param unexposed_cards_counts: the number of unexposed cards of each DevelopmentCard, in the enum's order
+    :param cards_to_purchase_count: the number of cards purchased
+    :return: Tuple[PurchaseOption, ...], all the purchase options with probability greater than 0
+    """
+    cards_count = sum(unexposed_cards_counts)
+    if cards_count < cards_to_purchase_count:
+        return ()
+    all_combinations_count = _binomial(cards_count, cards_to_purchase_count)
+
+    cards = list(DevelopmentCard)
+    purchase_options = []
+    purchased_counts = [0] * len(cards)
+
+    def add_purchase_options(card_index: int, cards_left_to_purchase: int, cards_left_in_deck: int,
+                             combinations_count: int):
+        if cards_left_to_purchase == 0:
+            purchased_cards_counters = MappingProxyType({card: count for card, count in zip(cards, purchased_counts)})
+            probability = combinations_count / float(all_combinations_count)
+            purchase_options.append(PurchaseOption(purchased_cards_counters, probability))
+            return
+        card_count = unexposed_cards_counts[card_index]
+        cards_left_in_deck -= card_count
+        for count in range(min(card_count, cards_left_to_purchase), -1, -1):
+            if cards_left_to_purchase - count > cards_left_in_deck:
+                break
+            purchased_counts[card_index] = count
+            add_purchase_options(card_index + 1, cards_left_to_purchase - count, cards_left_in_deck,
+                                 combinations_count * _binomial(card_count, count))
+        purchased_counts[card_index] = 0
+
+    add_purchase_options(0, cards_to_purchase_count, cards_count, 1)
+    return tuple(purchase_options)
+
 
 class CatanState(AbstractState):
-    def __init__(self, players: List[AbstractPlayer], seed=None):
+    def __init__(self, players: List[AbstractPlayer], seed=None, prune_equivalent_robber_placements=False):
+        """
+        state of the game settlers of catan
+        :param players: the players of the game, in the order of their turns
+        :param seed: optional parameter. send the same number to get the same game
+        :param prune_equivalent_robber_placements: if True, moves that place the robber are generated only for a
+        single representative land out of every class of lands that block the same production
+        (see Board.get_robber_placement_equivalence_classes)
+        """
         assert seed is None or (isinstance(seed, int) and seed > 0)
 
+        self.prune_equivalent_robber_placements = prune_equivalent_robber_placements
+
         random_state = np.random.RandomState(seed)
         self._random_choice = random_state.choice
 
         self.players = players
         self.board = Board(seed)
 
+        # the state of all the players is owned by the state, in a single buffer (see game/players_arrays.py)
+        self.players_buffer = players_arrays.create_players_buffer(len(players))
+        self.players_resources = self.players_buffer[:, players_arrays.resources_columns]
+        for player, row in zip(players, self.players_buffer):
+            player.bind_state_row(row)
+        self._player_indices = {player: i for i, player in enumerate(players)}
+
         self.turns_count = 0
         self._current_player_index = 0
         self.current_dice_number = 0
@@ -48,6 +145,10 @@ class CatanState(AbstractState):
         self._player_with_largest_army = []
         self._player_with_longest_road = []
 
+        # points of the longest-road and largest-army cards, and of victory-point development cards.
+        # together with the colonies points kept by the board, these are the scores of the players
+        self._cards_points_by_player = {player: 0 for player in players}
+
         self.probabilities_by_dice_values = {}
         for i, p in zip(range(2, 7), range(1, 6)):
             self.probabilities_by_dice_values[i] = p / 36.0
@@ -64,23 +165,32 @@ class CatanState(AbstractState):
         Returns:
             bool: indicating whether the current state is a final one
         """
-        players_points_count = self.get_scores_by_player()
-
-        highest_score = max(players_points_count.values())
-        return highest_score >= 10
+        for player in self.players:
+            if self.get_score_of_player(player) >= 10:
+                return True
+        return False
 
     def get_scores_by_player(self):
-        players_points_count = {player: self.board.get_colonies_score(player)
-                                for player in self.players}
-        player, _ = self._get_largest_army_player_and_size()
-        if player is not None:
-            players_points_count[player] += 2
-        player, _ = self._get_longest_road_player_and_length()
-        if player is not None:
-            players_points_count[player] += 2
-        for player in self.players:
-            players_points_count[player] += player.get_victory_point_development_cards_count()
-        return players_points_count
+        return {player: self.get_score_of_player(player) for player in self.players}
+
+    def get_score_of_player(self, player) -> int:
+        """
+        get the score of given player, from the running counters of the state and the board
+        :param player: the player to get the score of
+        :return: int, the score of the player
+        """
+        return self.board.get_colonies_score(player) + self._cards_points_by_player[player]
+
+    def add_victory_point_development_cards_points(self, player, count: int):
+        """
+        update the score of given player when victory-point development-cards are purchased/un-purchased, or
+        exposed/un-exposed (only unexposed cards count, as in restore)
+        :param player: the player that holds the cards
+        :param count: the number of victory-point cards purchased (or un-exposed). negative to revert the purchase
+        (or to expose them)
+        :return: None
+        """
+        self._cards_points_by_player[player] += count
 
     def get_next_moves(self):
         """computes the next moves available from the current state
@@ -90,12 +200,7 @@ class CatanState(AbstractState):
         if self.is_initialisation_phase():
             return self._get_initialisation_moves()
 
-        if self.current_dice_number != 7:
-            empty_move = CatanMove(self.board.get_robber_land())
-            moves = [empty_move]
-        else:
-            moves = [CatanMove(land) for land in self.board.get_lands_to_place_robber_on()]
-        moves = self._get_all_possible_development_cards_exposure_moves(moves)
+        moves = self._get_robber_and_development_cards_exposure_moves()
         # _get_all_possible_trade_moves is assuming it's after dev_cards moves and nothing else
         moves = self._get_all_possible_trade_moves(moves)
         moves = self._get_all_possible_paths_moves(moves)
@@ -104,6 +209,67 @@ class CatanState(AbstractState):
         moves = self._get_all_possible_development_cards_purchase_count_moves(moves)
         return moves
 
+    def sample_moves(self, k: int, random_state: np.random.RandomState, uniformity: float = 1.0) -> List[CatanMove]:
+        """
+        draw k of the next moves (independently, with replacement) without generating all of them.
+        a move is drawn stage by stage: robber & development-card exposure, trades, roads, settlements, cities and
+        development-cards purchases. each option of a stage is chosen with probability proportional to
+        (the number of moves that complete it) ** uniformity. only the options of the first three stages are
+        enumerated, the rest are counted in closed form
+        :param k: the number of moves to draw
+        :param random_state: the random generator to draw with
+        :param uniformity: 1 to draw uniformly from the moves (as picking from get_next_moves() does),
+        0 to choose uniformly between the options of every stage (favouring simpler moves). values between blend the two
+        :return: List[CatanMove], the drawn moves
+        """
+        if self.is_initialisation_phase():
+            moves = self._get_initialisation_moves()
+            return [moves[i] for i in random_state.randint(len(moves), size=k)]
+        moves_tree = _NextMovesTree(self, uniformity)
+        return [moves_tree.sample(random_state) for _ in range(k)]
+
+    def count_next_moves(self) -> MovesCount:
+        """
+        count the next moves, and the moves of every category, without generating them
+        the options of the robber & development-card exposure, trades and roads stages are enumerated,
+        the settlements, cities and development-cards purchases that complete them are counted in closed form
+        :return: MovesCount, where total == len(get_next_moves())
+        """
+        if self.is_initialisation_phase():
+            moves_count = self._count_initialisation_moves()
+            return MovesCount(moves_count, {card: 0 for card in DevelopmentCard}, 0, moves_count, moves_count, 0, 0)
+        return _NextMovesTree(self).count_by_categories()
+
+    def get_next_moves_sequence(self, prefix_filter: Callable[[CatanMove], bool] = None) -> Sequence[CatanMove]:
+        """
+        get the next moves as a lazy sequence: its length is counted as in count_next_moves, and a move is generated
+        only when it is accessed (by its index), so sampling k moves costs k moves, not all of them.
+        the order of the moves is not the order of get_next_moves. the sequence is valid while the state is unchanged
+        :param prefix_filter: optional predicate on the robber & development-card exposure stage of the moves
+        (e.g on the robber placement). moves whose first stage fails it are not in the sequence,
+        unless it fails for all the moves
+        :return: Sequence[CatanMove], the next moves
+        """
+        if self.is_initialisation_phase():
+            return self._get_initialisation_moves()
+        moves = _NextMovesSequence(_NextMovesTree(self, prefix_filter=prefix_filter))
+        if prefix_filter is not None and len(moves) == 0:
+            return self.get_next_moves_sequence()
+        return moves
+
+    def play_out(self, policies: List = None, random_state: np.random.RandomState = None, max_turns: int = 1000) \
+            -> List[int]:
+        """
+        play the game from the current state to its end, in a fast playout that doesn't generate moves (see
+        game/playout.py). the state isn't changed
+        :param policies: the PlayoutPolicy of every player, in the order of self.players. random by default
+        :param random_state: the random generator of the playout
+        :param max_turns: the number of moves after which the playout is stopped, even if no player won
+        :return: List[int], the final scores of the players, in the order of self.players
+        """
+        from game.playout import Playout
+        return Playout(self, policies, random_state).play(max_turns)
+
     def make_move(self, move: CatanMove):
         """
         apply move
@@ -136,11 +302,14 @@ class CatanState(AbstractState):
         if self.is_initialisation_phase():
             return [RandomMove(2, 1.0, self)]
         random_moves = []
-        for dice_value, dice_probability in self.probabilities_by_dice_values.items():
-            for purchase_option, purchase_probability in self._get_all_possible_development_cards_purchase_options(
-                    self._purchased_development_cards_in_current_turn_amount):
+        purchase_options = self._get_all_possible_development_cards_purchase_options(
+            self._purchased_development_cards_in_current_turn_amount)
+        # dice values that give the same resources lead to the same state, so each class is a single random move
+        for dice_values in self.board.get_dice_values_equivalence_classes() + [[7]]:
+            dice_probability = sum(self.probabilities_by_dice_values[dice_value] for dice_value in dice_values)
+            for purchase_option, purchase_probability in purchase_options:
                 random_moves.append(
-                    RandomMove(dice_value, dice_probability * purchase_probability, self, purchase_option))
+                    RandomMove(dice_values[0], dice_probability * purchase_probability, self, purchase_option))
         return random_moves
 
     def make_random_move(self, random_move: RandomMove = None):
@@ -168,6 +337,117 @@ class CatanState(AbstractState):
         """returns the player that should play next"""
         return self.players[self._current_player_index]
 
+    def snapshot(self) -> bytes:
+        """
+        get a compact binary snapshot of the current position (see the snapshot format above)
+        :return: bytes, the snapshot
+        """
+        locations_occupancy, paths_occupancy = self.board.get_occupancy(self._player_indices)
+        stacks = [np.array([(self._player_indices[player], size) for player, size in stack], dtype=np.int8)
+                  for stack in (self._player_with_largest_army, self._player_with_longest_road)]
+        header = _snapshot_header.pack(self.turns_count, len(self.players), self._current_player_index,
+                                       self.current_dice_number,
+                                       self._purchased_development_cards_in_current_turn_amount,
+                                       self.board.get_robber_land().identifier, len(self._dev_cards),
+                                       len(self._player_with_largest_army), len(self._player_with_longest_road))
+        return b''.join([
+            header,
+            locations_occupancy.tobytes(),
+            paths_occupancy.tobytes(),
+            np.array([self._unexposed_dev_cards_counters[card] for card in DevelopmentCard], dtype=np.int8).tobytes(),
+            np.array([card.value for card in self._dev_cards], dtype=np.int8).tobytes(),
+            stacks[0].tobytes(),
+            stacks[1].tobytes(),
+            self.players_buffer.astype('<i2').tobytes()
+        ])
+
+    def restore(self, snapshot: bytes):
+        """
+        restore the position of given snapshot. everything in the current position is overridden
+        NOTE: the snapshot must be taken from a state with the same board, and the same number of players
+        :param snapshot: bytes, a snapshot returned by CatanState.snapshot
+        :return: None
+        """
+        (self.turns_count, players_count, self._current_player_index, self.current_dice_number,
+         self._purchased_development_cards_in_current_turn_amount, robber_land_id, deck_size,
+         largest_army_stack_size, longest_road_stack_size) = _snapshot_header.unpack_from(snapshot)
+        assert players_count == len(self.players)
+
+        offset = _snapshot_header.size
+
+        def read(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(snapshot, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        locations_occupancy = read(np.int8, Board.locations_count)
+        paths_occupancy = read(np.int8, Board.paths_count)
+        self.board.set_occupancy(self.players, locations_occupancy, paths_occupancy)
+        self.board.set_robber_land(self.board.get_land(robber_land_id))
+
+        self._unexposed_dev_cards_counters = {card: int(count) for card, count in
+                                              zip(DevelopmentCard, read(np.int8, len(DevelopmentCard)).tolist())}
+        self._dev_cards = [DevelopmentCard(value) for value in read(np.int8, deck_size).tolist()]
+        self._player_with_largest_army = [(self.players[i], size) for i, size in
+                                          read(np.int8, 2 * largest_army_stack_size).reshape(-1, 2).tolist()]
+        self._player_with_longest_road = [(self.players[i], size) for i, size in
+                                          read(np.int8, 2 * longest_road_stack_size).reshape(-1, 2).tolist()]
+        self.players_buffer[:] = read('<i2', self.players_buffer.size).reshape(self.players_buffer.shape)
+
+        self._cards_points_by_player = {player: player.get_victory_point_development_cards_count()
+                                        for player in self.players}
+        for player_with_special_card, _ in (self._get_largest_army_player_and_size(),
+                                            self._get_longest_road_player_and_length()):
+            self._transfer_special_card_points(None, player_with_special_card)
+
+    def clone(self, players: List[AbstractPlayer]):
+        """
+        get a copy of this state, that can be changed independently.
+        the board's layout is shared, the random state (of the dice and the deck) is copied, so it continues from
+        where this state's is, without advancing it, and the position is copied via a snapshot
+        :param players: the players of the cloned state, new players that aren't in any other game, in the order of
+        this state's players. players aren't copied here, since copies would share what they hold of this state
+        (e.g. the search of an expectimax player evaluates the players of this state)
+        :return: CatanState, the cloned state
+        """
+        assert len(players) == len(self.players)
+        assert not set(players) & set(self.players)
+
+        state = CatanState.__new__(CatanState)
+        state.__dict__.update(self.__dict__)
+        state._random_choice = copy.deepcopy(self._random_choice.__self__).choice
+        state.players = players
+        state.board = self.board.copy_layout()
+        state.players_buffer = self.players_buffer.copy()
+        state.players_resources = state.players_buffer[:, players_arrays.resources_columns]
+        for player, row in zip(players, state.players_buffer):
+            player.bind_state_row(row)
+        state._player_indices = {player: i for i, player in enumerate(players)}
+        state.restore(self.snapshot())
+        return state
+
+    def get_resources_matrix(self, resources_amounts_by_players: Dict[AbstractPlayer, Dict[Resource, int]]) \
+            -> np.ndarray:
+        """
+        convert resources histograms of players to a matrix of resource amounts, shaped like self.players_resources
+        so that updating the resources of all the players is a single vector operation
+        :param resources_amounts_by_players: dictionary of players to their resources histograms
+        :return: np.ndarray of shape (players count, resources count)
+        """
+        matrix = np.zeros(self.players_resources.shape, dtype=self.players_resources.dtype)
+        for player, resources_amount in resources_amounts_by_players.items():
+            row = matrix[self._player_indices[player]]
+            for resource, amount in resources_amount.items():
+                row[resource.value] += amount
+        return matrix
+
+    def get_development_cards_left_count(self) -> int:
+        """
+        :return: the number of development cards left in the deck
+        """
+        return len(self._dev_cards)
+
     def pop_development_card(self) -> DevelopmentCard:
         return self._dev_cards.pop()
 
@@ -182,12 +462,15 @@ class CatanState(AbstractState):
         longest_road_length = self.board.get_longest_road_length_of_player(self.get_current_player())
 
         if longest_road_length > length_threshold:
+            self._transfer_special_card_points(player_with_longest_road, self.get_current_player())
             self._player_with_longest_road.append((self.get_current_player(), longest_road_length))
             move.did_get_longest_road_card = True
 
     def _revert_update_longest_road(self, move: CatanMove):
         if move.did_get_longest_road_card:
-            self._player_with_longest_road.pop()
+            player, _ = self._player_with_longest_road.pop()
+            previous_player, _ = self._get_longest_road_player_and_length()
+            self._transfer_special_card_points(player, previous_player)
 
     def _update_largest_army(self, move: CatanMove):
         if move.development_card_to_be_exposed != DevelopmentCard.Knight:
@@ -197,12 +480,27 @@ class CatanState(AbstractState):
         army_size = self.get_current_player().get_exposed_knights_count()
 
         if army_size > size_threshold:
+            self._transfer_special_card_points(player_with_largest_army, self.get_current_player())
             self._player_with_largest_army.append((self.get_current_player(), army_size))
             move.did_get_largest_army_card = True
 
     def _revert_update_largest_army(self, move: CatanMove):
         if move.did_get_largest_army_card:
-            self._player_with_largest_army.pop()
+            player, _ = self._player_with_largest_army.pop()
+            previous_player, _ = self._get_largest_army_player_and_size()
+            self._transfer_special_card_points(player, previous_player)
+
+    def _transfer_special_card_points(self, from_player, to_player):
+        """
+        move the 2 points of the longest-road/largest-army card from one player to another
+        :param from_player: the player that held the card, None if no-one did
+        :param to_player: the player that holds the card now, None if no-one does
+        :return: None
+        """
+        if from_player is not None:
+            self._cards_points_by_player[from_player] -= 2
+        if to_player is not None:
+            self._cards_points_by_player[to_player] += 2
 
     def _get_longest_road_player_and_length(self) -> Tuple[None, int]:
         """
@@ -228,18 +526,23 @@ class CatanState(AbstractState):
             return None, 2
         return self._player_with_largest_army[-1]
 
+    def _get_lands_to_place_robber_on(self) -> List[Land]:
+        """
+        get the lands to generate robber placement moves for
+        if self.prune_equivalent_robber_placements is set, only the first land of every equivalence class is returned
+        :return: List[Land], the lands the robber should be placed on in the generated moves
+        """
+        if not self.prune_equivalent_robber_placements:
+            return self.board.get_lands_to_place_robber_on()
+        return [lands[0] for lands in self.board.get_robber_placement_equivalence_classes()]
+
     def _calc_curr_player_trade_ratio(self, source_resource: Resource):
         """
         return 2, 3 or 4 based on the current players harbors status
         :param source_resource: the resource the player will give
         :return: 2, 3 or 4 - the number of resource units the player will give for a single card
         """
-        curr_player = self.get_current_player()
-        if self.board.is_player_on_harbor(curr_player, Harbor(source_resource.value)):
-            return 2
-        if self.board.is_player_on_harbor(curr_player, Harbor.HarborGeneric):
-            return 3
-        return 4
+        return self.board.get_trade_ratio(self.get_current_player(), source_resource)
 
     def _get_all_possible_trade_moves(self, moves: List[CatanMove]) -> List[CatanMove]:
         """
@@ -247,34 +550,21 @@ class CatanState(AbstractState):
         :param moves: moves so far
         :return: moves with trades
         """
-        player = self.get_current_player()
         new_moves = []
 
-        no_dev_card_side_effect_trades = []
-        for source_resource in Resource:
-
-            max_num_of_trades = (int(player.get_resource_count(source_resource) /
-                                     self._calc_curr_player_trade_ratio(source_resource)))
-            for i in range(1, max_num_of_trades + 1):
-                no_dev_card_side_effect_trades += self._trade_options_with_i_trades_and_min_resource_index(i,
-                                                                                                           source_resource,
-                                                                                                           FirsResourceIndex)
+        no_dev_card_side_effect_trades = self._get_trades_options()
 
         for move in moves:
             # assuming it's after dev_cards moves and nothing else (bad programming but better performance)
             if (move.development_card_to_be_exposed == DevelopmentCard.YearOfPlenty or
                     move.development_card_to_be_exposed == DevelopmentCard.Monopoly):
                 self._pretend_to_make_a_move(move)
-                for source_resource in Resource:
-                    max_num_of_trades = int(player.get_resource_count(source_resource) /
-                                            self._calc_curr_player_trade_ratio(source_resource))
-                    for i in range(1, max_num_of_trades + 1):
-                        for trades in self._trade_options_with_i_trades_and_min_resource_index(i, source_resource,
-                                                                                               FirsResourceIndex):
-                            new_move = copy.deepcopy(move)
-                            new_move.resources_exchanges = trades
-                            new_moves.append(new_move)
+                trades_options = self._get_trades_options()
                 self._unpretend_to_make_a_move(move)
+                for trades in trades_options:
+                    new_move = copy.deepcopy(move)
+                    new_move.resources_exchanges = trades
+                    new_moves.append(new_move)
             else:
                 for trades in no_dev_card_side_effect_trades:
                     new_move = copy.deepcopy(move)
@@ -283,6 +573,21 @@ class CatanState(AbstractState):
 
         return moves + new_moves
 
+    def _get_trades_options(self) -> List[List[ResourceExchange]]:
+        """
+        get all the trades the current player can make with the bank, given the resources the player has now
+        :return: List[List[ResourceExchange]], every option is a (non-empty) list of exchanges
+        """
+        player = self.get_current_player()
+        trades_options = []
+        for source_resource in Resource:
+            max_num_of_trades = int(player.get_resource_count(source_resource) /
+                                    self._calc_curr_player_trade_ratio(source_resource))
+            for i in range(1, max_num_of_trades + 1):
+                trades_options += self._trade_options_with_i_trades_and_min_resource_index(i, source_resource,
+                                                                                           FirsResourceIndex)
+        return trades_options
+
     def _trade_options_with_i_trades_and_min_resource_index(self, i, source_resource, min_resource_index) \
             -> List[List[ResourceExchange]]:
         """
@@ -325,6 +630,19 @@ class CatanState(AbstractState):
         trades.append([min_resource_only_trade])
         return trades
 
+    def _get_robber_and_development_cards_exposure_moves(self) -> List[CatanMove]:
+        """
+        get the first stage of the next moves: the robber placements (if 7 was rolled),
+        and the development cards the current player can expose
+        :return: List[CatanMove], the moves of the first stage
+        """
+        if self.current_dice_number != 7:
+            empty_move = CatanMove(self.board.get_robber_land())
+            moves = [empty_move]
+        else:
+            moves = [CatanMove(land) for land in self._get_lands_to_place_robber_on()]
+        return self._get_all_possible_development_cards_exposure_moves(moves)
+
     def _get_all_possible_development_cards_exposure_moves(self, moves: List[CatanMove]) -> List[CatanMove]:
         player = self.get_current_player()
         new_moves = []
@@ -345,7 +663,7 @@ class CatanState(AbstractState):
                             move.robber_placement_land != self.board.get_robber_land():
                 non_knight_applied_moves.append(move)
                 continue
-            for land in self.board.get_lands_to_place_robber_on():
+            for land in self._get_lands_to_place_robber_on():
                 new_move = copy.deepcopy(move)
                 new_move.robber_placement_land = land
                 knight_applied_moves.append(new_move)
@@ -384,15 +702,17 @@ class CatanState(AbstractState):
         player = self.get_current_player()
         new_moves = []
         for move in moves:
+            # the new moves are copied after the move is un-pretended, since pretending swaps its robber placement
             self._pretend_to_make_a_move(move)
+            paths_options = set()
             if player.can_pave_road():  # optimization
                 paths_options_with_duplicates = self._paths_options_up_to_i_chosen(player.amount_of_roads_can_afford())
                 paths_options = set(frozenset(p) for p in paths_options_with_duplicates)
-                for option in paths_options:
-                    new_move = copy.deepcopy(move)
-                    new_move.paths_to_be_paved = option
-                    new_moves.append(new_move)
             self._unpretend_to_make_a_move(move)
+            for option in paths_options:
+                new_move = copy.deepcopy(move)
+                new_move.paths_to_be_paved = option
+                new_moves.append(new_move)
 
         # RoadBuilding
         if player.unexposed_development_cards[DevelopmentCard.RoadBuilding] == 0:  # optimization
@@ -436,13 +756,14 @@ class CatanState(AbstractState):
         for move in moves:
             self._pretend_to_make_a_move(move)
             locations = self.board.get_settleable_locations_by_player(player)
+            settlement_options = []
             for i in range(1, player.amount_of_settlements_can_afford() + 1):
-                settlement_options = self._locations_options_i_chosen_min_location_index(i, locations)
-                for option in settlement_options:
-                    new_move = copy.deepcopy(move)
-                    new_move.locations_to_be_set_to_settlements = option
-                    new_moves.append(new_move)
+                settlement_options += self._locations_options_i_chosen_min_location_index(i, locations)
             self._unpretend_to_make_a_move(move)
+            for option in settlement_options:
+                new_move = copy.deepcopy(move)
+                new_move.locations_to_be_set_to_settlements = option
+                new_moves.append(new_move)
         return moves + new_moves
 
     def _get_all_possible_cities_moves(self, moves: List[CatanMove]) -> List[CatanMove]:
@@ -451,13 +772,14 @@ class CatanState(AbstractState):
         for move in moves:
             self._pretend_to_make_a_move(move)
             locations = self.board.get_settlements_by_player(player)
+            city_options = []
             for i in range(1, player.amount_of_cities_can_afford() + 1):
-                settlement_options = self._locations_options_i_chosen_min_location_index(i, locations)
-                for option in settlement_options:
-                    new_move = copy.deepcopy(move)
-                    new_move.locations_to_be_set_to_cities = option
-                    new_moves.append(new_move)
+                city_options += self._locations_options_i_chosen_min_location_index(i, locations)
             self._unpretend_to_make_a_move(move)
+            for option in city_options:
+                new_move = copy.deepcopy(move)
+                new_move.locations_to_be_set_to_cities = option
+                new_moves.append(new_move)
         return moves + new_moves
 
     def _locations_options_i_chosen_min_location_index(self, i: int, locations: List[Location],
@@ -492,47 +814,27 @@ class CatanState(AbstractState):
         new_moves = []
         for move in moves:
             self._pretend_to_make_a_move(move)
-            if (player.has_resources_for_development_card() and
-                        len(self._dev_cards) > move.development_cards_to_be_purchased_count):
+            can_purchase = (player.has_resources_for_development_card() and
+                            len(self._dev_cards) > move.development_cards_to_be_purchased_count)
+            self._unpretend_to_make_a_move(move)
+            if can_purchase:
                 new_move = copy.deepcopy(move)
                 new_move.development_cards_to_be_purchased_count += 1
                 new_moves.append(new_move)
-            self._unpretend_to_make_a_move(move)
         if not new_moves:  # End of recursion
             return moves
         return moves + self._get_all_possible_development_cards_purchase_count_moves(new_moves)
 
-    def _get_all_possible_development_cards_purchase_options(
-            self, cards_to_purchase_count: int,
-            development_cards: List[DevelopmentCard] = [c for c in DevelopmentCard],
-            purchased_cards: Dict[DevelopmentCard, int] = {cc: 0 for cc in DevelopmentCard},
-            probability: float = 1.0) -> List[PurchaseOption]:
-
-        if cards_to_purchase_count == 0:
-            return [PurchaseOption(copy.deepcopy(purchased_cards), probability)]
-
-        cards_that_can_be_purchased_count = sum(self._unexposed_dev_cards_counters[card] for card in development_cards)
-        if cards_that_can_be_purchased_count < cards_to_purchase_count:
-            return []
-
-        card = development_cards[0]
-        if self._unexposed_dev_cards_counters[card] == 0:
-            return self._get_all_possible_development_cards_purchase_options(
-                cards_to_purchase_count, development_cards[1:], purchased_cards, probability)
-
-        without_card = self._get_all_possible_development_cards_purchase_options(
-            cards_to_purchase_count, development_cards[1:], purchased_cards, probability)
-
-        cards_left = sum(self._unexposed_dev_cards_counters[card] for card in DevelopmentCard)
-        probability = probability * self._unexposed_dev_cards_counters[card] / float(cards_left)
-        purchased_cards[card] += 1
-        self._unexposed_dev_cards_counters[card] -= 1
-        with_card = self._get_all_possible_development_cards_purchase_options(
-            cards_to_purchase_count - 1, development_cards, purchased_cards, probability)
-        purchased_cards[card] -= 1
-        self._unexposed_dev_cards_counters[card] += 1
-
-        return with_card + without_card
+    def _get_all_possible_development_cards_purchase_options(self, cards_to_purchase_count: int) \
+            -> Tuple[PurchaseOption, ...]:
+        """
+        get all the possible outcomes of purchasing given amount of development cards from the unexposed cards
+        the result is cached, and shared between states. it must not be modified
+        :param cards_to_purchase_count: the number of development cards purchased
+        :return: Tuple[PurchaseOption, ...], all the purchase options with probability greater than 0
+        """
+        unexposed_cards_counts = tuple(self._unexposed_dev_cards_counters[card] for card in DevelopmentCard)
+        return _get_development_cards_purchase_options(unexposed_cards_counts, cards_to_purchase_count)
 
     def _pretend_to_make_a_move(self, move: CatanMove):
         player = self.get_current_player()
@@ -555,6 +857,8 @@ class CatanState(AbstractState):
         if move.development_card_to_be_exposed is not None:
             player.expose_development_card(move.development_card_to_be_exposed)
             self._unexposed_dev_cards_counters[move.development_card_to_be_exposed] -= 1
+            if move.development_card_to_be_exposed == DevelopmentCard.VictoryPoint:
+                self.add_victory_point_development_cards_points(player, -1)
             assert self._unexposed_dev_cards_counters[move.development_card_to_be_exposed] >= 0
         for exchange in move.resources_exchanges:
             player.trade_resources(exchange.source_resource, exchange.target_resource, exchange.count,
@@ -590,6 +894,8 @@ class CatanState(AbstractState):
         if move.development_card_to_be_exposed is not None:
             player.un_expose_development_card(move.development_card_to_be_exposed)
             self._unexposed_dev_cards_counters[move.development_card_to_be_exposed] += 1
+            if move.development_card_to_be_exposed == DevelopmentCard.VictoryPoint:
+                self.add_victory_point_development_cards_points(player, 1)
         if move.development_card_to_be_exposed == DevelopmentCard.RoadBuilding:
             self._revert_road_building_dev_card_side_effect(1)
         elif move.development_card_to_be_exposed == DevelopmentCard.Monopoly:
@@ -650,6 +956,15 @@ class CatanState(AbstractState):
 
         return moves
 
+    def _count_initialisation_moves(self) -> int:
+        """
+        count the initialisation moves (see _get_initialisation_moves) without generating them:
+        a settlement on any settleable location, with a road that leads from it
+        :return: int, the number of initialisation moves
+        """
+        return sum(len(self.board.get_unpaved_paths_at_location(location))
+                   for location in self.board.get_settleable_locations_by_player(self.get_current_player()))
+
     def _add_roads_to_initialisation_moves(self, moves):
         moves = [move for move in self._get_all_possible_paths_moves(moves) if move not in moves]
         assert all([(len(move.resources_exchanges) == 0 and
@@ -687,3 +1002,350 @@ class CatanState(AbstractState):
             assert not move.did_get_longest_road_card
             assert (move.robber_placement_land == self.board.get_robber_land() or move.robber_placement_land is None)
         return moves
+
+
+class _NextMovesTree:
+    """
+    the next moves of a state (see CatanState.get_next_moves) as a tree of stages:
+    robber & development-card exposure -> trades -> roads -> settlements -> cities -> development-cards purchases
+    the options of the first three stages are enumerated (the roads options once for every number of affordable roads)
+    the number of moves that complete a roads option depends only on the resources left and the number of settleable
+    locations, and is counted in closed form, so neither the moves nor the options of the last stages are generated
+    the state must not change while the tree is used
+    """
+
+    def __init__(self, state: CatanState, uniformity: float = 1.0, prefix_filter: Callable[[CatanMove], bool] = None):
+        self._state = state
+        self._uniformity = uniformity
+        self._player = player = state.get_current_player()
+        self._settlements = state.board.get_settlements_by_player(player)
+        self._settlement_pieces = player.pieces[Colony.Settlement]
+        self._city_pieces = player.pieces[Colony.City]
+        self._road_pieces = player.pieces[Road.Paved]
+        self._deck_size = len(state._dev_cards)
+
+        self._prefixes = state._get_robber_and_development_cards_exposure_moves()
+        if prefix_filter is not None:
+            self._prefixes = [prefix for prefix in self._prefixes if prefix_filter(prefix)]
+        self._prefixes_resources, self._prefixes_trades = [], []
+        no_side_effect_trades = [[]] + state._get_trades_options()
+        for prefix in self._prefixes:
+            state._pretend_to_make_a_move(prefix)
+            self._prefixes_resources.append(tuple(player.resources_vector.tolist()))
+            if prefix.development_card_to_be_exposed in {DevelopmentCard.YearOfPlenty, DevelopmentCard.Monopoly}:
+                self._prefixes_trades.append([[]] + state._get_trades_options())
+            else:
+                self._prefixes_trades.append(no_side_effect_trades)
+            state._unpretend_to_make_a_move(prefix)
+
+        self._trade_ratios = tuple(state.board.get_trade_ratio(player, resource) for resource in Resource)
+        self._paths_options = {}
+        self._settleable_locations = {}
+        self._completions = {}
+        self._prefixes_counts = None
+        self._trades_counts = {}
+
+    def count(self) -> int:
+        """
+        :return: the number of the next moves, i.e len(state.get_next_moves())
+        """
+        return sum(self._get_prefixes_counts())
+
+    def count_by_categories(self) -> MovesCount:
+        """
+        :return: MovesCount, the number of the next moves, and of the moves of every category
+        """
+        total, trading, paving, settling, building_cities, purchasing = 0, 0, 0, 0, 0, 0
+        exposing = {card: 0 for card in DevelopmentCard}
+        for prefix, prefix_resources, trades_options in zip(self._prefixes, self._prefixes_resources,
+                                                            self._prefixes_trades):
+            prefix_count = 0
+            for trades in trades_options:
+                resources = self._trade(prefix_resources, trades)
+                trades_count = 0
+                for paths in self._get_paths_options(resources, prefix):
+                    completions = self._get_completions(_subtract(resources, _road_cost, len(paths)), paths)
+                    trades_count += completions.count
+                    if paths:
+                        paving += completions.count
+                    settling += completions.settling_count
+                    building_cities += completions.building_cities_count
+                    purchasing += completions.purchasing_count
+                if trades:
+                    trading += trades_count
+                prefix_count += trades_count
+            if prefix.development_card_to_be_exposed is not None:
+                exposing[prefix.development_card_to_be_exposed] += prefix_count
+            total += prefix_count
+        return MovesCount(total, exposing, trading, paving, settling, building_cities, purchasing)
+
+    def sample(self, random_state: np.random.RandomState) -> CatanMove:
+        """
+        draw a move, stage by stage (see CatanState.sample_moves)
+        :param random_state: the random generator to draw with
+        :return: CatanMove, the drawn move
+        """
+        prefix_index = self._choose(self._get_prefixes_counts(), random_state)
+        trades_options = self._prefixes_trades[prefix_index]
+        trades_index = self._choose(self._get_trades_counts(prefix_index), random_state)
+        trades = trades_options[trades_index]
+        resources = self._trade(self._prefixes_resources[prefix_index], trades)
+
+        paths_options = self._get_paths_options(resources, self._prefixes[prefix_index])
+        paths_counts = [self._count_paths_option(resources, paths) for paths in paths_options]
+        paths = paths_options[self._choose(paths_counts, random_state)]
+        resources = _subtract(resources, _road_cost, len(paths))
+
+        settlements_counts = self._get_completions(resources, paths).settlements_counts
+        settleable_locations = self._get_settleable_locations(paths) if len(settlements_counts) > 1 else []
+        settlements_multiplicities = [_binomial(len(settleable_locations), i) for i in range(len(settlements_counts))]
+        settlements_count = self._choose(settlements_counts, random_state, settlements_multiplicities)
+        settlements = [settleable_locations[i] for i in sorted(
+            random_state.choice(len(settleable_locations), settlements_count, replace=False))]
+        resources = _subtract(resources, _settlement_cost, settlements_count)
+
+        cities_candidates = self._settlements + settlements
+        cities_counts = self._count_cities_and_purchases(resources)
+        cities_multiplicities = [_binomial(len(cities_candidates), i) for i in range(len(cities_counts))]
+        cities_count = self._choose(cities_counts, random_state, cities_multiplicities)
+        cities = [cities_candidates[i] for i in sorted(
+            random_state.choice(len(cities_candidates), cities_count, replace=False))]
+
+        return self._create_move(prefix_index, trades, paths, settlements, cities,
+                                 random_state.randint(cities_counts[cities_count]))
+
+    def get_move(self, index: int) -> CatanMove:
+        """
+        get the move of given index, stage by stage: the options of every stage are ordered, and each one covers
+        a block of consecutive indices, as long as the number of moves that complete it.
+        the settlements and cities of a move are unranked from the index of their combination
+        :param index: the index of the move, 0 <= index < self.count()
+        :return: CatanMove, the move
+        """
+        prefix_index, index = _locate(self._get_prefixes_counts(), index)
+        trades_index, index = _locate(self._get_trades_counts(prefix_index), index)
+        trades = self._prefixes_trades[prefix_index][trades_index]
+        resources = self._trade(self._prefixes_resources[prefix_index], trades)
+
+        paths_options = self._get_paths_options(resources, self._prefixes[prefix_index])
+        paths_index, index = _locate([self._count_paths_option(resources, paths) for paths in paths_options], index)
+        paths = paths_options[paths_index]
+        resources = _subtract(resources, _road_cost, len(paths))
+
+        settlements_counts = self._get_completions(resources, paths).settlements_counts
+        settleable_locations = self._get_settleable_locations(paths) if len(settlements_counts) > 1 else []
+        settlements_count, index = _locate([_binomial(len(settleable_locations), i) * count
+                                            for i, count in enumerate(settlements_counts)], index)
+        combination_index, index = divmod(index, settlements_counts[settlements_count])
+        settlements = _get_combination(settleable_locations, settlements_count, combination_index)
+        resources = _subtract(resources, _settlement_cost, settlements_count)
+
+        cities_candidates = self._settlements + settlements
+        cities_counts = self._count_cities_and_purchases(resources)
+        cities_count, index = _locate([_binomial(len(cities_candidates), i) * count
+                                       for i, count in enumerate(cities_counts)], index)
+        combination_index, purchases_count = divmod(index, cities_counts[cities_count])
+        cities = _get_combination(cities_candidates, cities_count, combination_index)
+
+        return self._create_move(prefix_index, trades, paths, settlements, cities, purchases_count)
+
+    def _create_move(self, prefix_index: int, trades: List[ResourceExchange], paths: frozenset,
+                     settlements: List[Location], cities: List[Location], purchases_count: int) -> CatanMove:
+        move = copy.deepcopy(self._prefixes[prefix_index])
+        move.resources_exchanges = trades
+        if paths:
+            move.paths_to_be_paved = paths
+        move.locations_to_be_set_to_settlements = settlements
+        move.locations_to_be_set_to_cities = cities
+        move.development_cards_to_be_purchased_count = purchases_count
+        return move
+
+    def _choose(self, counts: List[int], random_state: np.random.RandomState, multiplicities: List[int] = None) -> int:
+        """
+        choose an option with probability proportional to multiplicity * count ** uniformity
+        :param counts: the number of moves that complete each option
+        :param random_state: the random generator to choose with
+        :param multiplicities: optional number of options each count stands for
+        :return: int, the index of the chosen option
+        """
+        if multiplicities is None:
+            multiplicities = [1] * len(counts)
+        weights = [0 if count == 0 else multiplicity * count ** self._uniformity
+                   for count, multiplicity in zip(counts, multiplicities)]
+        threshold = random_state.random_sample() * sum(weights)
+        for i, weight in enumerate(weights):
+            if weight == 0:
+                continue
+            threshold -= weight
+            if threshold < 0:
+                return i
+        return max(i for i, weight in enumerate(weights) if weight != 0)
+
+    def _get_prefixes_counts(self) -> List[int]:
+        if self._prefixes_counts is None:
+            self._prefixes_counts = [sum(self._get_trades_counts(i)) for i in range(len(self._prefixes))]
+        return self._prefixes_counts
+
+    def _get_trades_counts(self, prefix_index: int) -> List[int]:
+        if prefix_index not in self._trades_counts:
+            prefix, prefix_resources = self._prefixes[prefix_index], self._prefixes_resources[prefix_index]
+            counts = []
+            for trades in self._prefixes_trades[prefix_index]:
+                resources = self._trade(prefix_resources, trades)
+                counts.append(sum(self._count_paths_option(resources, paths)
+                                  for paths in self._get_paths_options(resources, prefix)))
+            self._trades_counts[prefix_index] = counts
+        return self._trades_counts[prefix_index]
+
+    def _trade(self, resources: Tuple[int, ...], trades: List[ResourceExchange]) -> Tuple[int, ...]:
+        resources = list(resources)
+        for exchange in trades:
+            source = exchange.source_resource.value
+            resources[source] -= exchange.count * self._trade_ratios[source]
+            resources[exchange.target_resource.value] += exchange.count
+        return tuple(resources)
+
+    def _count_paths_option(self, resources: Tuple[int, ...], paths: frozenset) -> int:
+        return self._get_completions(_subtract(resources, _road_cost, len(paths)), paths).count
+
+    def _get_paths_options(self, resources: Tuple[int, ...], prefix: CatanMove) -> List[frozenset]:
+        """
+        get the roads options of a move (including not paving any road), as _get_all_possible_paths_moves does
+        :param resources: the resources of the player after the prefix and trades of the move
+        :param prefix: the robber & development-card exposure stage of the move
+        :return: List[frozenset], the options
+        """
+        affordable_roads_count = min(_get_affordable_count(resources, _road_cost), self._road_pieces)
+        # exposing road-building without paving two roads is illegal (see _apply_road_building_dev_card_side_effect)
+        minimal_paths_count = 2 if prefix.development_card_to_be_exposed == DevelopmentCard.RoadBuilding else 0
+        key = (affordable_roads_count, minimal_paths_count)
+        if key not in self._paths_options:
+            options = self._state._paths_options_up_to_i_chosen(affordable_roads_count)
+            options = [frozenset()] + sorted({frozenset(option) for option in options}, key=sorted)
+            self._paths_options[key] = [paths for paths in options if len(paths) >= minimal_paths_count]
+        return self._paths_options[key]
+
+    def _get_settleable_locations(self, paths: frozenset) -> List[Location]:
+        if paths not in self._settleable_locations:
+            board = self._state.board
+            for path in paths:
+                board.set_path(self._player, path, Road.Paved)
+            self._settleable_locations[paths] = board.get_settleable_locations_by_player(self._player)
+            for path in paths:
+                board.set_path(self._player, path, Road.Unpaved)
+        return self._settleable_locations[paths]
+
+    def _get_completions(self, resources: Tuple[int, ...], paths: frozenset) -> '_Completions':
+        """
+        count the moves that complete a roads option: the settlements, cities and development-cards purchases options
+        they depend only on the resources left, and on the number of settleable locations after the roads are paved
+        (which is computed only if the player can afford a settlement)
+        :param resources: the resources of the player after the roads are paved
+        :param paths: the roads option
+        :return: _Completions, the counts of the moves
+        """
+        affordable_settlements_count = min(_get_affordable_count(resources, _settlement_cost), self._settlement_pieces)
+        settleable_locations_count = 0
+        if affordable_settlements_count > 0:
+            settleable_locations_count = len(self._get_settleable_locations(paths))
+        key = (resources, settleable_locations_count)
+        if key not in self._completions:
+            count, building_cities_count, purchasing_count = 0, 0, 0
+            settlements_counts = []
+            for i in range(affordable_settlements_count + 1):
+                cities_counts = self._count_cities_and_purchases(_subtract(resources, _settlement_cost, i))
+                cities_multiplicities = [_binomial(len(self._settlements) + i, j) for j in range(len(cities_counts))]
+                settlements_counts.append(sum(m * c for m, c in zip(cities_multiplicities, cities_counts)))
+                settlements_multiplicity = _binomial(settleable_locations_count, i)
+                count += settlements_multiplicity * settlements_counts[i]
+                building_cities_count += settlements_multiplicity * sum(
+                    m * c for m, c in zip(cities_multiplicities[1:], cities_counts[1:]))
+                purchasing_count += settlements_multiplicity * sum(
+                    m * (c - 1) for m, c in zip(cities_multiplicities, cities_counts))
+            self._completions[key] = _Completions(count, count - settlements_counts[0], building_cities_count,
+                                                  purchasing_count, settlements_counts)
+        return self._completions[key]
+
+    def _count_cities_and_purchases(self, resources: Tuple[int, ...]) -> List[int]:
+        """
+        :param resources: the resources of the player after the settlements are built
+        :return: for every number of cities, the number of development-cards purchase options after building them
+        """
+        return [1 + min(_get_affordable_count(_subtract(resources, _city_cost, i), _development_card_cost),
+                        self._deck_size)
+                for i in range(min(_get_affordable_count(resources, _city_cost), self._city_pieces) + 1)]
+
+
+_Completions = namedtuple('_Completions', ['count', 'settling_count', 'building_cities_count', 'purchasing_count',
+                                           'settlements_counts'])
+"""
+the counts of the moves that complete a roads option (see _NextMovesTree._get_completions):
+the number of moves, how many of them build settlements, cities and purchase development-cards,
+and for every number of settlements, the number of moves for each choice of settlements
+"""
+
+_road_cost = tuple(players_arrays.road_cost.tolist())
+_settlement_cost = tuple(players_arrays.settlement_cost.tolist())
+_city_cost = tuple(players_arrays.city_cost.tolist())
+_development_card_cost = tuple(players_arrays.development_card_cost.tolist())
+
+
+def _subtract(resources: Tuple[int, ...], cost: Tuple[int, ...], times: int) -> Tuple[int, ...]:
+    return tuple(amount - price * times for amount, price in zip(resources, cost))
+
+
+def _get_affordable_count(resources: Tuple[int, ...], cost: Tuple[int, ...]) -> int:
+    return min(amount // price for amount, price in zip(resources, cost) if price > 0)
+
+
+def _locate(counts: List[int], index: int) -> Tuple[int, int]:
+    """
+    :param counts: the sizes of consecutive blocks of indices
+    :param index: an index in the blocks
+    :return: tuple of (the block of the index, the index inside the block)
+    """
+    for i, count in enumerate(counts):
+        if index < count:
+            return i, index
+        index -= count
+    raise IndexError('index out of range')
+
+
+def _get_combination(items: List, size: int, index: int) -> List:
+    """
+    :return: the combination of given size and index, in the lexicographic order of the combinations of the items
+    """
+    combination = []
+    start = 0
+    for remaining in range(size, 0, -1):
+        for i in range(start, len(items)):
+            # the number of combinations that continue with items[i]
+            count = _binomial(len(items) - i - 1, remaining - 1)
+            if index < count:
+                combination.append(items[i])
+                start = i + 1
+                break
+            index -= count
+    return combination
+
+
+class _NextMovesSequence(Sequence):
+    """
+    the moves of a _NextMovesTree as a lazy sequence (see CatanState.get_next_moves_sequence)
+    """
+
+    def __init__(self, moves_tree: _NextMovesTree):
+        self._moves_tree = moves_tree
+        self._length = moves_tree.count()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[CatanMove, List[CatanMove]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('moves index out of range')
+        return self._moves_tree.get_move(index)
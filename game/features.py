@@ -0,0 +1,143 @@
+from typing import List, Sequence
+
+import numpy as np
+
+from game import players_arrays
+from game.board import Board, Harbor
+from game.catan_state import CatanState
+from game.development_cards import DevelopmentCard
+from game.resource import Resource
+
+"""
+Structure
+---------
+A position is encoded as a fixed-size float vector, so that heuristics can be evaluated on many positions at once.
+The vector consists of a block per player, followed by a block of global features.
+The players' blocks are ordered by seats, starting from the player the position is encoded for
+(the maximizing player of a search), so a heuristic always finds "its" player in the first block.
+Each player's block:
+ -production (5): the expected amount of each resource the player gets per dice roll (the robber is taken in account)
+ -resources (5): the resource cards in the player's hand
+ -pieces (3): the settlements, cities and roads the player has left to build
+ -unexposed development-cards (5)
+ -exposed development-cards (5)
+ -harbors (6): 1 if the player is settled on a harbor of each type, 0 otherwise
+ -longest road (1): the length of the player's longest road (at least 4, see Board.get_longest_road_length_of_player)
+ -score (1)
+ -dice combinations (3): per piece type (settlement, city, road), the dice combinations (out of 36) of the numbers
+ around the player's pieces of that type (see Board.get_dice_combinations_count)
+The global block:
+ -robber (19): one-hot of the land the robber is on
+ -development-cards left in the deck (1)
+"""
+
+production_columns = slice(0, len(Resource))
+resources_columns = slice(production_columns.stop, production_columns.stop + len(Resource))
+pieces_columns = slice(resources_columns.stop, resources_columns.stop + len(players_arrays.pieces_order))
+unexposed_development_cards_columns = slice(pieces_columns.stop, pieces_columns.stop + len(DevelopmentCard))
+exposed_development_cards_columns = slice(unexposed_development_cards_columns.stop,
+                                          unexposed_development_cards_columns.stop + len(DevelopmentCard))
+harbors_columns = slice(exposed_development_cards_columns.stop, exposed_development_cards_columns.stop + len(Harbor))
+longest_road_column = harbors_columns.stop
+score_column = longest_road_column + 1
+dice_combinations_columns = slice(score_column + 1, score_column + 1 + len(players_arrays.pieces_order))
+player_features_count = dice_combinations_columns.stop
+
+robber_columns = slice(0, Board.lands_count)
+deck_size_column = robber_columns.stop
+global_features_count = deck_size_column + 1
+
+
+def get_features_count(players_count: int) -> int:
+    """
+    :param players_count: the number of players in the game
+    :return: the size of the feature vector of a position in a game with that many players
+    """
+    return players_count * player_features_count + global_features_count
+
+
+def get_player_block(features: np.ndarray, seat: int) -> np.ndarray:
+    """
+    get the block of the player in given seat (relative to the player the position was encoded for)
+    works on a single feature vector, and on a matrix of feature vectors (a row per position)
+    :param features: feature vector/matrix returned by encode_state/encode_states
+    :param seat: 0 for the player the position was encoded for, 1 for the next one, etc.
+    :return: np.ndarray, a view onto the player's block
+    """
+    return features[..., seat * player_features_count:(seat + 1) * player_features_count]
+
+
+def get_global_block(features: np.ndarray) -> np.ndarray:
+    """
+    get the block of the global features
+    works on a single feature vector, and on a matrix of feature vectors (a row per position)
+    :param features: feature vector/matrix returned by encode_state/encode_states
+    :return: np.ndarray, a view onto the global block
+    """
+    return features[..., features.shape[-1] - global_features_count:]
+
+
+def encode_state(state: CatanState, player, out: np.ndarray = None) -> np.ndarray:
+    """
+    encode the position of given state as a fixed-size feature vector
+    :param state: the state to encode
+    :param player: the player to encode the position for (the maximizing player of a search). its block is the first
+    :param out: optional array to write the features to, of size get_features_count(len(state.players))
+    :return: np.ndarray, the feature vector
+    """
+    players_count = len(state.players)
+    if out is None:
+        out = np.zeros(get_features_count(players_count))
+    else:
+        out[:] = 0
+
+    first_seat = state.players.index(player)
+    seats = [(first_seat + i) % players_count for i in range(players_count)]
+    player_indices = {p: i for i, p in enumerate(state.players)}
+    players_blocks = out[:players_count * player_features_count].reshape(players_count, player_features_count)
+
+    board = state.board
+    robber_land = board.get_robber_land()
+    locations_occupancy, _ = board.get_occupancy(player_indices)
+    occupied_locations = np.flatnonzero(locations_occupancy)
+    codes = locations_occupancy[occupied_locations].astype(np.int64)
+    production = np.zeros((players_count, len(Resource)))
+    np.add.at(production, codes >> 2,
+              (codes & 3)[:, np.newaxis] * board.get_locations_production()[occupied_locations])
+
+    players_blocks[:, production_columns] = production[seats]
+    players_buffer = state.players_buffer[seats]
+    players_blocks[:, resources_columns] = players_buffer[:, players_arrays.resources_columns]
+    players_blocks[:, pieces_columns] = players_buffer[:, players_arrays.pieces_columns]
+    players_blocks[:, unexposed_development_cards_columns] = \
+        players_buffer[:, players_arrays.unexposed_development_cards_columns]
+    players_blocks[:, exposed_development_cards_columns] = \
+        players_buffer[:, players_arrays.exposed_development_cards_columns]
+    for block, seat in zip(players_blocks, seats):
+        p = state.players[seat]
+        block[harbors_columns] = [board.is_player_on_harbor(p, harbor) for harbor in Harbor]
+        block[longest_road_column] = board.get_longest_road_length_of_player(p)
+        block[score_column] = state.get_score_of_player(p)
+        block[dice_combinations_columns] = [board.get_dice_combinations_count(p, piece)
+                                            for piece in players_arrays.pieces_order]
+
+    global_block = get_global_block(out)
+    global_block[robber_columns.start + robber_land.identifier] = 1
+    global_block[deck_size_column] = state.get_development_cards_left_count()
+    return out
+
+
+def encode_states(states: Sequence[CatanState], players: List) -> np.ndarray:
+    """
+    encode a batch of positions (of games with the same number of players) as a matrix, with a row per position
+    :param states: the states to encode
+    :param players: the player to encode each position for (see encode_state)
+    :return: np.ndarray of shape (len(states), get_features_count(players count))
+    """
+    assert len(players) == len(states)
+    if len(states) == 0:
+        return np.zeros((0, 0))
+    features = np.zeros((len(states), get_features_count(len(states[0].players))))
+    for state, player, row in zip(states, players, features):
+        encode_state(state, player, row)
+    return features
@@ -0,0 +1,102 @@
+from collections.abc import MutableMapping
+from typing import Sequence, Dict
+
+import numpy as np
+
+from game.development_cards import DevelopmentCard
+from game.pieces import Colony, Road
+from game.resource import Resource, ResourceAmounts
+
+"""
+Structure
+---------
+The state of all the players in a game is kept in a single integer buffer, with a row per player:
+ ----------------------------------------------------------------------------------------
+| resources (5) | pieces (3) | unexposed development-cards (5) | exposed development-cards (5) |
+ ----------------------------------------------------------------------------------------
+The buffer is owned by CatanState, and the dictionaries of every AbstractPlayer (resources, pieces, ...)
+are views onto that player's row. That way updates that involve several resources or players are vector operations,
+and cloning the players' state is a single buffer copy.
+"""
+
+pieces_order = [Colony.Settlement, Colony.City, Road.Paved]
+
+resources_columns = slice(0, len(Resource))
+pieces_columns = slice(resources_columns.stop, resources_columns.stop + len(pieces_order))
+unexposed_development_cards_columns = slice(pieces_columns.stop, pieces_columns.stop + len(DevelopmentCard))
+exposed_development_cards_columns = slice(unexposed_development_cards_columns.stop,
+                                          unexposed_development_cards_columns.stop + len(DevelopmentCard))
+columns_count = exposed_development_cards_columns.stop
+
+initial_pieces = {
+    Colony.Settlement: 5,
+    Colony.City: 4,
+    Road.Paved: 15
+}
+
+
+def resources_vector(resources_amount: Dict[Resource, int]) -> np.ndarray:
+    """
+    convert a resources histogram to a vector of resource amounts, indexed by Resource.value
+    :param resources_amount: dictionary of the amounts of resources
+    :return: np.ndarray of the amounts
+    """
+    vector = np.zeros(len(Resource), dtype=np.int64)
+    for resource, amount in resources_amount.items():
+        vector[resource.value] += amount
+    return vector
+
+
+road_cost = resources_vector(ResourceAmounts.road)
+settlement_cost = resources_vector(ResourceAmounts.settlement)
+city_cost = resources_vector(ResourceAmounts.city)
+development_card_cost = resources_vector(ResourceAmounts.development_card)
+
+
+def create_players_buffer(players_count: int) -> np.ndarray:
+    """
+    create the buffer of the players' state, with the initial pieces of every player
+    :param players_count: the number of players (rows)
+    :return: np.ndarray of shape (players_count, columns_count)
+    """
+    buffer = np.zeros((players_count, columns_count), dtype=np.int64)
+    buffer[:, pieces_columns] = [initial_pieces[piece] for piece in pieces_order]
+    return buffer
+
+
+class EnumArrayView(MutableMapping):
+    """
+    a dictionary-like view onto a 1-dimensional integer array, where each key is mapped to an index in the array
+    keys can't be added or deleted, only their values can be changed
+    """
+    __slots__ = ('array', '_keys', '_index_by_key')
+
+    def __init__(self, array: np.ndarray, keys: Sequence):
+        assert len(array) == len(keys)
+        self.array = array
+        self._keys = keys
+        self._index_by_key = {key: i for i, key in enumerate(keys)}
+
+    def __getitem__(self, key) -> int:
+        return int(self.array[self._index_by_key[key]])
+
+    def __setitem__(self, key, value: int):
+        self.array[self._index_by_key[key]] = value
+
+    def __delitem__(self, key):
+        raise TypeError('keys of {} can not be deleted'.format(type(self).__name__))
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __copy__(self):
+        return dict(self.items())
+
+    def __deepcopy__(self, memo_dict=None):
+        return dict(self.items())
@@ -0,0 +1,614 @@
+import enum
+from functools import lru_cache
+from math import ceil
+from typing import List, Tuple, Callable, Union, Dict
+
+import numpy as np
+
+from game import players_arrays
+from game.board import Board
+from game.catan_state import CatanState
+from game.development_cards import DevelopmentCard
+from game.pieces import Colony, Road
+from game.resource import Resource
+
+"""
+Structure
+---------
+A playout plays a game from a given state to its end, fast enough to estimate the value of a state by playing it out
+many times (see create_playout_heuristic). It never generates moves, and never changes the state:
+the position is copied once to flat python lists, that every playout copies and plays on, without undoing anything.
+Players are referred to by their indices in state.players. The lists are (all public, for the policies to look at):
+ -owners: per location, the player colonised on it (-1 if uncolonised)
+ -colonies: per location, the Colony.value of the colony on it
+ -roads: per path (in the order of Board.get_paths), the player that paved it (-1 if unpaved)
+ -resources: per player, the amounts of the resources (indexed by Resource.value)
+ -pieces: per player, the pieces left, in the order of players_arrays.pieces_order
+ -hands: per player, the unexposed development-cards (indexed by DevelopmentCard.value)
+ -trade_ratios: per player, the trade ratio of every resource
+ -scores: per player
+Besides the lists, a playout keeps caches that are updated by every build, instead of scanning the board for the
+builds of every move: the free locations (uncolonised, with no colonised neighbour), and per player the locations at
+the ends of its roads and the locations of its settlements. the affordability of the builds is memoized per resources
+and trade ratios, and the longest road is searched for only in the roads connected to the one just paved.
+The turns follow CatanState: a move (placing the robber if 7 was rolled, exposing a development-card, and building),
+then the dice are rolled, the purchased development-cards are drawn, and the turn passes to the next player.
+The decisions are made by a PlayoutPolicy per player, that chooses from the builds the player can afford straight
+from its resources: trades are made only when a chosen build needs them, at the player's trade ratios.
+The rules are simplified where the moves are: year-of-plenty gives the two scarcest resources in the player's hand,
+and monopoly takes the resource the other players have the most of.
+A playout is plain python, so it plays about 170 games/s of random policies (games of about 200 turns) and 300 games/s
+of greedy ones, with 3 players on a core: not thousands. BatchPlayout (see batch_playout) plays many games at a time.
+"""
+
+
+@enum.unique
+class Build(enum.Enum):
+    """
+    the things a player can build in a playout. every build is a pair of (Build, target), where the target is
+    the location of a city/settlement, the index of the path of a road, and None for a development-card
+    """
+    City = 0
+    Settlement = 1
+    Road = 2
+    DevelopmentCard = 3
+
+
+_paths = Board.get_paths()
+_locations_paths = [[] for _ in range(Board.locations_count)]
+for _path_index, (_u, _v) in enumerate(_paths):
+    _locations_paths[_u].append((_path_index, _v))
+    _locations_paths[_v].append((_path_index, _u))
+
+_settlement_column = players_arrays.pieces_order.index(Colony.Settlement)
+_city_column = players_arrays.pieces_order.index(Colony.City)
+_road_column = players_arrays.pieces_order.index(Road.Paved)
+_city_cost = tuple(players_arrays.city_cost.tolist())
+_settlement_cost = tuple(players_arrays.settlement_cost.tolist())
+_road_cost = tuple(players_arrays.road_cost.tolist())
+_development_card_cost = tuple(players_arrays.development_card_cost.tolist())
+_costs = {Build.City: _city_cost, Build.Settlement: _settlement_cost, Build.Road: _road_cost,
+          Build.DevelopmentCard: _development_card_cost}
+_builds_values = (Build.City.value, Build.Settlement.value, Build.Road.value, Build.DevelopmentCard.value)
+_minimal_cost = min(sum(cost) for cost in _costs.values())
+_exposable_development_cards = [card for card in DevelopmentCard if card != DevelopmentCard.VictoryPoint]
+_winning_score = 10
+
+
+def _is_affordable(resources: List[int], cost: Tuple[int, ...], trade_ratios: List[int]) -> bool:
+    """
+    :return: True if the resources pay the cost, with trades at given ratios, False otherwise
+    """
+    missing, tradeable = 0, 0
+    for amount, price, ratio in zip(resources, cost, trade_ratios):
+        if amount < price:
+            missing += price - amount
+        else:
+            tradeable += (amount - price) // ratio
+    return tradeable >= missing
+
+
+@lru_cache(maxsize=1 << 16)
+def _get_affordable_builds(resources: Tuple[int, ...], trade_ratios: Tuple[int, ...]) -> Tuple[bool, ...]:
+    """
+    :return: Tuple[bool, ...], per Build (by its value), True if the resources pay its cost, with trades at given ratios
+    """
+    return tuple(_is_affordable(resources, _costs[build], trade_ratios) for build in Build)
+
+
+def _get_distances(adjacency: Dict[int, List[Tuple[int, int]]], source: int) -> Dict[int, int]:
+    """
+    :param adjacency: the roads, as a mapping of every location to its (path, neighbour) pairs
+    :param source: the location to start from
+    :return: Dict[int, int], the number of roads from the source to every location reachable from it
+    """
+    distances = {source: 0}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for u in frontier:
+            for _, v in adjacency[u]:
+                if v not in distances:
+                    distances[v] = distances[u] + 1
+                    next_frontier.append(v)
+        frontier = next_frontier
+    return distances
+
+
+class Playout:
+    def __init__(self, state: CatanState, policies: List['PlayoutPolicy'] = None,
+                 random_state: np.random.RandomState = None, roll_dice_first: bool = False):
+        """
+        copy the position of given state, to play it out (see play). the state isn't changed by the playouts
+        :param state: the state to play out
+        :param policies: the policy of every player, in the order of state.players. RandomPlayoutPolicy by default
+        :param random_state: the random generator of the dice, the deck, the dropped resources and the policies
+        :param roll_dice_first: True if the current player already made its move, and the playouts start by rolling
+        the dice (as in the leaves of AlphaBetaExpectimax at odd depths). False if they start with the current
+        player's move (as get_next_moves does)
+        """
+        self.players_count = players_count = len(state.players)
+        self._policies = policies if policies is not None else [RandomPlayoutPolicy()] * players_count
+        assert len(self._policies) == players_count
+        self._random_state = random_state if random_state is not None else np.random.RandomState()
+        self._uniforms = []
+        self._roll_dice_first = roll_dice_first
+
+        board = state.board
+        player_indices = {player: i for i, player in enumerate(state.players)}
+        locations_occupancy, paths_occupancy = board.get_occupancy(player_indices)
+        lands = [board.get_land(identifier) for identifier in range(Board.lands_count)]
+        self.lands_locations = [tuple(land.locations) for land in lands]
+        self.lands_dice_combinations = [0 if land.resource is None else 6 - abs(7 - land.dice_value)
+                                        for land in lands]
+        self._lands_by_dice_values = {dice_value: [(land.identifier, land.resource.value, tuple(land.locations))
+                                                   for land in lands if land.dice_value == dice_value]
+                                      for dice_value in range(2, 13) if dice_value != 7}
+        self.locations_scores = board.get_locations_scores(consider_robber=False).tolist()
+        self._locations_resources = [[resource.value for resource in board.get_surrounding_resources(location)]
+                                     for location in range(Board.locations_count)]
+        self._locations_harbors = [[harbor.value for harbor in board.get_harbors_of_location(location)]
+                                   for location in range(Board.locations_count)]
+
+        buffer = state.players_buffer
+        exposed_development_cards = buffer[:, players_arrays.exposed_development_cards_columns]
+        unexposed_development_cards = buffer[:, players_arrays.unexposed_development_cards_columns]
+        deck = [DevelopmentCard.get_occurrences_in_deck_count(card) for card in DevelopmentCard]
+        deck = (np.array(deck) - exposed_development_cards.sum(axis=0) - unexposed_development_cards.sum(axis=0))
+        longest_road_player, longest_road_length = state._get_longest_road_player_and_length()
+        largest_army_player, largest_army_size = state._get_largest_army_player_and_size()
+
+        self._snapshot = (
+            [code >> 2 if code else -1 for code in locations_occupancy.tolist()],
+            [code & 3 for code in locations_occupancy.tolist()],
+            [code - 1 for code in paths_occupancy.tolist()],
+            state.players_resources.tolist(),
+            buffer[:, players_arrays.pieces_columns].tolist(),
+            unexposed_development_cards.tolist(),
+            exposed_development_cards[:, DevelopmentCard.Knight.value].tolist(),
+            deck.tolist(),
+            [[board.get_trade_ratio(player, resource) for resource in Resource] for player in state.players],
+            [state.get_score_of_player(player) for player in state.players],
+            (player_indices.get(longest_road_player, -1), longest_road_length),
+            (player_indices.get(largest_army_player, -1), largest_army_size),
+            board.get_robber_land().identifier,
+            state.current_dice_number,
+            player_indices[state.get_current_player()],
+            state.turns_count,
+            state._purchased_development_cards_in_current_turn_amount if roll_dice_first else 0
+        )
+
+    def play(self, max_turns: int = 1000) -> List[int]:
+        """
+        play a game from the copied position to its end
+        :param max_turns: the number of moves after which the game is stopped, even if no player won
+        :return: List[int], the final scores of the players
+        """
+        (owners, colonies, roads, resources, pieces, hands, knights, deck, trade_ratios, scores, self.longest_road,
+         self.largest_army, self.robber_land, self.dice_value, self.current_player, self.turns_count,
+         self._purchases_count) = self._snapshot
+        self.owners, self.colonies, self.roads, self.deck = list(owners), list(colonies), list(roads), list(deck)
+        self.resources, self.pieces, self.hands = [list(r) for r in resources], [list(p) for p in pieces], \
+            [list(h) for h in hands]
+        self.trade_ratios, self.knights, self.scores = [list(r) for r in trade_ratios], list(knights), list(scores)
+        self._players_paths = [[path for path, owner in enumerate(roads) if owner == player]
+                               for player in range(self.players_count)]
+        self._players_ends = [{location for path in paths for location in _paths[path]}
+                              for paths in self._players_paths]
+        self._players_settlements = [{location for location, owner in enumerate(owners)
+                                      if owner == player and colonies[location] == 1}
+                                     for player in range(self.players_count)]
+        self._free_locations = {location for location, owner in enumerate(owners) if owner == -1 and
+                                all(owners[neighbour] == -1 for _, neighbour in _locations_paths[location])}
+        self.winner = max(range(self.players_count), key=scores.__getitem__) \
+            if max(scores) >= _winning_score else None
+
+        if self._roll_dice_first and self.winner is None:
+            self._end_turn()
+        for _ in range(max_turns):
+            if self.winner is not None:
+                break
+            self._play_move()
+            if self.winner is None:
+                self._end_turn()
+        return self.scores
+
+    def estimate_wins(self, playouts_count: int, max_turns: int = 1000) -> List[float]:
+        """
+        play the position out several times, and count the wins of every player.
+        the wins of a game stopped after max_turns are split between the players with the highest score
+        :param playouts_count: the number of games to play
+        :param max_turns: the number of moves after which a game is stopped (see play)
+        :return: List[float], the fraction of the games every player won
+        """
+        wins = [0.0] * self.players_count
+        for _ in range(playouts_count):
+            scores = self.play(max_turns)
+            if self.winner is not None:
+                wins[self.winner] += 1
+                continue
+            leaders = [player for player, score in enumerate(scores) if score == max(scores)]
+            for player in leaders:
+                wins[player] += 1 / len(leaders)
+        return [win / playouts_count for win in wins]
+
+    def random_index(self, count: int) -> int:
+        """
+        :param count: the number of options
+        :return: int, a uniformly random index smaller than count, from the random generator of the playouts
+        """
+        if not self._uniforms:
+            self._uniforms = self._random_state.random_sample(1024).tolist()
+        return int(self._uniforms.pop() * count)
+
+    def is_initialisation_phase(self) -> bool:
+        return self.turns_count < self.players_count * 2
+
+    def get_builds(self, player: int) -> List[Tuple[Build, Union[int, None]]]:
+        """
+        get the builds the player can afford now, with its resources and trades at its trade ratios
+        :param player: the player to get the builds of
+        :return: List[Tuple[Build, target]], the builds
+        """
+        builds = []
+        resources, pieces = self.resources[player], self.pieces[player]
+        if sum(resources) < _minimal_cost:
+            return builds
+        affordable = _get_affordable_builds(tuple(resources), tuple(self.trade_ratios[player]))
+        city, settlement, road, development_card = _builds_values
+        if pieces[_city_column] > 0 and affordable[city]:
+            builds += [(Build.City, location) for location in sorted(self._players_settlements[player])]
+        if pieces[_settlement_column] > 0 and affordable[settlement]:
+            builds += [(Build.Settlement, location) for location in self.get_settleable_locations(player)]
+        if pieces[_road_column] > 0 and affordable[road]:
+            builds += [(Build.Road, path) for path in self.get_paveable_paths(player)]
+        if affordable[development_card] and sum(self.deck) > self._purchases_count:
+            builds.append((Build.DevelopmentCard, None))
+        return builds
+
+    def get_settleable_locations(self, player: int) -> List[int]:
+        """
+        get the locations the player can settle on, by the rules of Board.get_settleable_locations_by_player
+        :param player: the player to get the locations of
+        :return: List[int], the locations
+        """
+        if self.owners.count(player) < 2:
+            return sorted(self._free_locations)
+        # a settleable location must be at the end of a road of the player
+        return sorted(self._players_ends[player] & self._free_locations)
+
+    def get_paveable_paths(self, player: int) -> List[int]:
+        """
+        get the paths the player can pave a road at, by the rules of Board.get_unpaved_paths_near_player
+        :param player: the player to get the paths of
+        :return: List[int], the indices of the paths
+        """
+        owners, roads = self.owners, self.roads
+        if len(self._players_paths[player]) < 2:
+            ends = self._players_settlements[player]
+        else:
+            ends = {location for location in self._players_ends[player] if owners[location] in (-1, player)}
+        return sorted({path for location in ends for path, _ in _locations_paths[location] if roads[path] == -1})
+
+    def _pay(self, player: int, build: Build):
+        resources, ratios, cost = self.resources[player], self.trade_ratios[player], _costs[build]
+        for resource, price in enumerate(cost):
+            while resources[resource] < price:
+                source = max(range(len(cost)), key=lambda r: (resources[r] - cost[r]) // ratios[r])
+                resources[source] -= ratios[source]
+                resources[resource] += 1
+        for resource, price in enumerate(cost):
+            resources[resource] -= price
+
+    def _play_move(self):
+        player, policy = self.current_player, self._policies[self.current_player]
+        if self.is_initialisation_phase():
+            self._play_initialisation_move(player, policy)
+        else:
+            if self.dice_value == 7:
+                self.robber_land = policy.choose_robber_land(self, player)
+            card = policy.choose_development_card(self, player)
+            if card is not None:
+                self._expose_development_card(player, policy, card)
+            while self.winner is None:
+                builds = self.get_builds(player)
+                if not builds:
+                    break
+                choice = policy.choose_build(self, player, builds)
+                if choice is None:
+                    break
+                self._build(player, *builds[choice])
+        self.turns_count += 1
+
+    def _play_initialisation_move(self, player: int, policy: 'PlayoutPolicy'):
+        settlements = [(Build.Settlement, location) for location in self.get_settleable_locations(player)]
+        _, location = settlements[policy.choose_build(self, player, settlements) or 0]
+        self._set_settlement(player, location)
+        if self.owners.count(player) == 2:
+            for resource in self._locations_resources[location]:
+                self.resources[player][resource] += 1
+        roads = [(Build.Road, path) for path, _ in _locations_paths[location] if self.roads[path] == -1]
+        if roads:
+            _, path = roads[policy.choose_build(self, player, roads) or 0]
+            self._pave(player, path)
+
+    def _expose_development_card(self, player: int, policy: 'PlayoutPolicy', card: DevelopmentCard):
+        assert card != DevelopmentCard.VictoryPoint and self.hands[player][card.value] > 0
+        self.hands[player][card.value] -= 1
+        resources = self.resources[player]
+        if card == DevelopmentCard.Knight:
+            if self.dice_value != 7:
+                self.robber_land = policy.choose_robber_land(self, player)
+            self.knights[player] += 1
+            holder, size = self.largest_army
+            if self.knights[player] > size:
+                self._transfer_card_points(holder, player)
+                self.largest_army = (player, self.knights[player])
+        elif card == DevelopmentCard.RoadBuilding:
+            resources[Resource.Brick.value] += 2
+            resources[Resource.Lumber.value] += 2
+        elif card == DevelopmentCard.YearOfPlenty:
+            for resource in sorted(range(len(resources)), key=resources.__getitem__)[:2]:
+                resources[resource] += 1
+        elif card == DevelopmentCard.Monopoly:
+            others = [other for other in range(self.players_count) if other != player]
+            resource = max(range(len(resources)), key=lambda r: sum(self.resources[o][r] for o in others))
+            for other in others:
+                resources[resource] += self.resources[other][resource]
+                self.resources[other][resource] = 0
+
+    def _build(self, player: int, build: Build, target: Union[int, None]):
+        self._pay(player, build)
+        if build == Build.City:
+            self.colonies[target] = 2
+            self._players_settlements[player].discard(target)
+            self.pieces[player][_city_column] -= 1
+            self.scores[player] += 1
+        elif build == Build.Settlement:
+            self._set_settlement(player, target)
+        elif build == Build.Road:
+            self._pave(player, target)
+            holder, length = self.longest_road
+            road_length = self._get_longest_road_length(player, length, target)
+            if road_length > length:
+                if holder != player:
+                    self._transfer_card_points(holder, player)
+                self.longest_road = (player, road_length)
+        else:
+            self._purchases_count += 1
+        if self.scores[player] >= _winning_score:
+            self.winner = player
+
+    def _set_settlement(self, player: int, location: int):
+        self.owners[location], self.colonies[location] = player, 1
+        self._players_settlements[player].add(location)
+        self._free_locations.discard(location)
+        self._free_locations.difference_update(neighbour for _, neighbour in _locations_paths[location])
+        self.pieces[player][_settlement_column] -= 1
+        self.scores[player] += 1
+        ratios = self.trade_ratios[player]
+        for harbor in self._locations_harbors[location]:
+            if harbor < len(ratios):
+                ratios[harbor] = 2
+            else:
+                ratios[:] = [min(ratio, 3) for ratio in ratios]
+
+    def _pave(self, player: int, path: int):
+        self.roads[path] = player
+        self._players_paths[player].append(path)
+        self._players_ends[player].update(_paths[path])
+        self.pieces[player][_road_column] -= 1
+
+    def _transfer_card_points(self, from_player: int, to_player: int):
+        if from_player != -1:
+            self.scores[from_player] -= 2
+        self.scores[to_player] += 2
+
+    def _get_longest_road_length(self, player: int, threshold: int, path: int = None) -> int:
+        """
+        :param threshold: the length to beat. the roads of a player with no more roads than that aren't traversed
+        :param path: the road that was just paved. only the roads connected to it are traversed, since the other
+        roads of the player are no longer than the longest road already. all the roads of the player if None
+        :return: max(4, the length of the longest road of the player), as Board.get_longest_road_length_of_player
+        """
+        paths = self._players_paths[player]
+        if len(paths) <= max(4, threshold):
+            return 4
+        adjacency = {}
+        for road in paths:
+            u, v = _paths[road]
+            adjacency.setdefault(u, []).append((road, v))
+            adjacency.setdefault(v, []).append((road, u))
+
+        def longest_road_from(u, visited):
+            longest = 0
+            for path, v in adjacency[u]:
+                if path not in visited:
+                    visited.add(path)
+                    longest = max(longest, 1 + longest_road_from(v, visited))
+                    visited.remove(path)
+            return longest
+
+        longest_road_length = 4
+        locations = set(adjacency) if path is None else {_paths[path][0]}
+        while locations:
+            distances = _get_distances(adjacency, locations.pop())
+            component = list(distances)
+            locations.difference_update(component)
+            paths_count = sum(len(adjacency[u]) for u in component) // 2
+            if paths_count <= longest_road_length:
+                continue
+            if paths_count == len(component) - 1:
+                # the roads are a tree, so the longest road is its diameter
+                farthest = max(component, key=distances.__getitem__)
+                longest_road_length = max(longest_road_length, max(_get_distances(adjacency, farthest).values()))
+            else:
+                # a longest road starts at a location with an odd number of roads, unless there's none
+                starts = [u for u in component if len(adjacency[u]) % 2 == 1] or component
+                longest_road_length = max(longest_road_length, max(longest_road_from(u, set()) for u in starts))
+        return longest_road_length
+
+    def _end_turn(self):
+        """
+        roll the dice, and pass the turn to the next player, as CatanState.make_random_move does
+        """
+        player = self.current_player
+        if not self.is_initialisation_phase():
+            self.dice_value = self.random_index(6) + self.random_index(6) + 2
+            if self.dice_value == 7:
+                for resources in self.resources:
+                    self._drop_resources(resources)
+            else:
+                for land, resource, locations in self._lands_by_dice_values[self.dice_value]:
+                    if land == self.robber_land:
+                        continue
+                    for location in locations:
+                        if self.owners[location] != -1:
+                            self.resources[self.owners[location]][resource] += self.colonies[location]
+            for _ in range(self._purchases_count):
+                card = self._draw_development_card()
+                self.hands[player][card] += 1
+                if card == DevelopmentCard.VictoryPoint.value:
+                    self.scores[player] += 1
+            if self.scores[player] >= _winning_score:
+                self.winner = player
+        self._purchases_count = 0
+        self.current_player = (player + 1) % self.players_count
+
+    def _drop_resources(self, resources: List[int]):
+        count = sum(resources)
+        if count < 8:
+            return
+        for _ in range(ceil(count / 2)):
+            index = self.random_index(count)
+            for resource, amount in enumerate(resources):
+                if index < amount:
+                    resources[resource] -= 1
+                    break
+                index -= amount
+            count -= 1
+
+    def _draw_development_card(self) -> int:
+        index = self.random_index(sum(self.deck))
+        for card, count in enumerate(self.deck):
+            if index < count:
+                self.deck[card] -= 1
+                return card
+            index -= count
+
+
+class PlayoutPolicy:
+    """
+    the decisions of a player in a playout. policies are called for every build of every turn, so they should
+    decide from the lists of the playout (see Structure) without heavy computations
+    """
+
+    def choose_build(self, playout: Playout, player: int, builds: List[Tuple[Build, Union[int, None]]]) \
+            -> Union[int, None]:
+        """
+        choose what to build next. in the initialisation phase, the builds are a settlement, and a road next to it
+        :param playout: the playout
+        :param player: the player that builds
+        :param builds: the builds the player can afford (see Playout.get_builds), not empty
+        :return: the index of the chosen build, or None to end the move
+        """
+        raise NotImplementedError()
+
+    def choose_robber_land(self, playout: Playout, player: int) -> int:
+        """
+        choose the land to place the robber on. by default, the land that blocks the most production of the other
+        players, and none of the player's
+        :return: int, the identifier of the land
+        """
+        best_land, best_blocked = None, -2
+        for land, locations in enumerate(playout.lands_locations):
+            if land == playout.robber_land:
+                continue
+            blocked = 0
+            for location in locations:
+                owner = playout.owners[location]
+                if owner == player:
+                    blocked = -1
+                    break
+                if owner != -1:
+                    blocked += playout.colonies[location] * playout.lands_dice_combinations[land]
+            if blocked > best_blocked:
+                best_land, best_blocked = land, blocked
+        return best_land
+
+    def choose_development_card(self, playout: Playout, player: int) -> Union[DevelopmentCard, None]:
+        """
+        choose a development card to expose at the beginning of the move. by default, the first one in the hand,
+        in the order of DevelopmentCard (victory-point cards are never exposed)
+        :return: DevelopmentCard, the card, or None to expose nothing
+        """
+        hand = playout.hands[player]
+        if not any(hand):
+            return None
+        for card in _exposable_development_cards:
+            if hand[card.value] > 0:
+                return card
+        return None
+
+
+class RandomPlayoutPolicy(PlayoutPolicy):
+    """
+    builds uniformly random affordable builds until none is left, and places the robber on a random land
+    """
+
+    def choose_build(self, playout: Playout, player: int, builds: List[Tuple[Build, Union[int, None]]]) -> int:
+        return playout.random_index(len(builds))
+
+    def choose_robber_land(self, playout: Playout, player: int) -> int:
+        land = playout.random_index(len(playout.lands_locations) - 1)
+        return land if land < playout.robber_land else land + 1
+
+
+class GreedyPlayoutPolicy(PlayoutPolicy):
+    """
+    builds cities before settlements, settlements before development-cards, and paves roads only when there's no
+    location to settle on (or in the initialisation phase). colonies are built on the most productive locations
+    (see Board.get_locations_scores), and roads lead to the most productive free locations
+    """
+    _builds_order = {Build.City: 0, Build.Settlement: 1, Build.DevelopmentCard: 3}
+
+    def choose_build(self, playout: Playout, player: int, builds: List[Tuple[Build, Union[int, None]]]) \
+            -> Union[int, None]:
+        scores = playout.locations_scores
+        can_settle = not playout.is_initialisation_phase() and (
+            any(build == Build.Settlement for build, _ in builds) or len(playout.get_settleable_locations(player)) > 0)
+
+        def priority(i):
+            build, target = builds[i]
+            if build == Build.Road:
+                return 2, -max(scores[location] for location in _paths[target] if playout.owners[location] == -1)
+            return self._builds_order[build], 0 if target is None else -scores[target]
+
+        candidates = [i for i, (build, target) in enumerate(builds) if build != Build.Road or (
+            not can_settle and any(playout.owners[location] == -1 for location in _paths[target]))]
+        if not candidates:
+            return None
+        return min(candidates, key=priority)
+
+
+def create_playout_heuristic(player, playouts_count: int = 16, policy: PlayoutPolicy = None, seed: int = None,
+                             max_turns: int = 1000, roll_dice_first: bool = True) -> Callable[[CatanState], float]:
+    """
+    create a heuristic that evaluates a state by playing it out (see ExpectimaxBaselinePlayer.set_heuristic)
+    :param player: the player to evaluate the states for
+    :param playouts_count: the number of playouts per state
+    :param policy: the policy of all the players in the playouts. RandomPlayoutPolicy by default
+    :param seed: seed of the random generator of the playouts. it's created once, so every state is played out with
+    different dice
+    :param max_turns: the number of moves after which a playout is stopped (see Playout.play)
+    :param roll_dice_first: see Playout. True for AlphaBetaExpectimax, since its leaves are reached by moves
+    :return: Callable[[CatanState], float], the heuristic: the fraction of the playouts the player wins
+    """
+    random_state = np.random.RandomState(seed)
+    policy = policy if policy is not None else RandomPlayoutPolicy()
+
+    def playout_heuristic(state: CatanState) -> float:
+        playout = Playout(state, [policy] * len(state.players), random_state, roll_dice_first)
+        return playout.estimate_wins(playouts_count, max_turns)[state.players.index(player)]
+
+    return playout_heuristic
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+import numpy as np
+
+from game.batch_playout import BatchPlayout, play_seeded_games
+from game.board import Board
+
+
+class TestBatchPlayout(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.boards = [Board(seed) for seed in range(1, 21)]
+
+    def test_play(self):
+        playout = BatchPlayout(self.boards, 3, np.random.RandomState(0))
+        scores = playout.play()
+        self.assertTupleEqual(scores.shape, (len(self.boards), 3))
+        self.assertTrue(np.all(playout.winners >= 0))
+        self.assertTrue(np.all(scores[np.arange(len(self.boards)), playout.winners] >= 10))
+        self.assertTrue(np.all(playout.resources >= 0))
+        self.assertTrue(np.all(playout.pieces >= 0))
+        # no two colonies are at the ends of a path
+        for owners in playout.owners:
+            for u, v in Board.get_paths():
+                self.assertFalse(owners[u] != -1 and owners[v] != -1)
+
+    def test_play_is_reproducible(self):
+        playout = BatchPlayout(self.boards, 4, np.random.RandomState(1))
+        first_scores = playout.play().copy()
+        self.assertTrue(np.array_equal(BatchPlayout(self.boards, 4, np.random.RandomState(1)).play(), first_scores))
+        self.assertTrue(np.array_equal(play_seeded_games(range(1, 21), 4, seed=1), first_scores))
+
+    def test_dice_are_rolled_after_the_initialisation_moves(self):
+        playout = BatchPlayout(self.boards, 3, np.random.RandomState(0))
+        playout.play(max_turns=3 * 2 - 1)
+        self.assertTrue(np.all(playout.dice_values == 0))
+        playout.play(max_turns=3 * 2)
+        self.assertTrue(np.all((playout.dice_values >= 2) & (playout.dice_values <= 12)))
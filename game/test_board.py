@@ -100,3 +100,103 @@ class TestBoard(TestCase):
 
     def test_is_player_on_harbor(self):
         self.assertTrue(self.b.is_player_on_harbor(self.player2, self.harbor))
+
+    def test_get_robber_placement_equivalence_classes(self):
+        b = Board()
+        p1 = 'player1'
+        classes = b.get_robber_placement_equivalence_classes()
+        self.assertEqual(len(classes), 1)
+        self.assertEqual(len(classes[0]), len(b._lands) - 1)
+
+        b.set_location(p1, 0, Colony.Settlement)
+        classes = b.get_robber_placement_equivalence_classes()
+        self.assertEqual(len(classes), 2)
+        self.assertIn([b._lands[0]], classes)
+        self.assertCountEqual([land for lands in classes for land in lands], b.get_lands_to_place_robber_on())
+
+    def test_get_dice_values_equivalence_classes(self):
+        b = Board()
+        self.assertListEqual(b.get_dice_values_equivalence_classes(), [[2, 3, 4, 5, 6, 8, 9, 10, 11, 12]])
+
+        b.set_location('player1', 0, Colony.Settlement)
+        classes = b.get_dice_values_equivalence_classes()
+        self.assertEqual(len(classes), 2)
+        self.assertIn([b._lands[0].dice_value], classes)
+
+    def test_get_dice_combinations_count(self):
+        def expected_count(board, player, piece):
+            if piece is Road.Paved:
+                dice_values = [d for path in board.get_roads_paved_by_player(player)
+                               for d in board.get_adjacent_to_path_dice_values(path)]
+            else:
+                dice_values = [d for location in board.get_locations_colonised_by_player(player)
+                               if board.get_colony_type_at_location(location) is piece
+                               for d in board.get_surrounding_dice_values(location)]
+            return sum(6 - abs(7 - d) for d in dice_values)
+
+        b = Board()
+        p1, p2 = 'player1', 'player2'
+        b.set_location(p1, 0, Colony.Settlement)
+        b.set_location(p2, 13, Colony.Settlement)
+        b.set_path(p1, (0, 4), Road.Paved)
+        b.set_path(p2, (13, 9), Road.Paved)
+        b.set_location(p1, 0, Colony.City)
+        b.set_location(p2, 13, Colony.Uncolonised)
+        b.set_path(p2, (13, 9), Road.Unpaved)
+        copied = b.copy_layout()
+        copied.set_occupancy([p1, p2], *b.get_occupancy({p1: 0, p2: 1}))
+        for board in [b, copied]:
+            for player in [p1, p2]:
+                for piece in [Colony.Settlement, Colony.City, Road.Paved]:
+                    self.assertEqual(board.get_dice_combinations_count(player, piece),
+                                     expected_count(board, player, piece))
+        self.assertEqual(b.get_dice_combinations_count(p2, Colony.Settlement), 0)
+
+    def test_get_locations_scores(self):
+        b = Board()
+        scores = b.get_locations_scores()
+        self.assertEqual(scores.shape, (Board.locations_count,))
+        for location in [0, 13, 30]:
+            expected = sum((6 - abs(7 - d)) / 36.0 for d in b.get_surrounding_dice_values(location))
+            self.assertAlmostEqual(scores[location], expected)
+
+        land = b.get_lands_to_place_robber_on()[0]
+        b.set_robber_land(land)
+        scores_with_robber = b.get_locations_scores()
+        self.assertEqual(b.get_robber_mask()[land.identifier], 0)
+        for location in land.locations:
+            self.assertAlmostEqual(scores_with_robber[location],
+                                   scores[location] - (6 - abs(7 - land.dice_value)) / 36.0)
+        self.assertTrue((b.get_locations_scores(consider_robber=False) == scores).all())
+
+        weights = np.zeros(len(Resource))
+        weights[land.resource.value] = 1
+        location = land.locations[0]
+        self.assertAlmostEqual(b.get_locations_scores(weights, consider_robber=False)[location],
+                               b.get_locations_production(consider_robber=False)[location, land.resource.value])
+
+    def test_get_trade_ratio(self):
+        b = Board()
+        p1 = 'player1'
+        resource = Resource.Brick
+        specific_location, other_specific_location = b._locations_by_harbors[Harbor(resource.value)]
+        generic_location = b._locations_by_harbors[Harbor.HarborGeneric][0]
+        self.assertEqual(b.get_trade_ratio(p1, resource), 4)
+
+        b.set_location(p1, generic_location, Colony.Settlement)
+        self.assertEqual(b.get_trade_ratio(p1, resource), 3)
+        b.set_location(p1, specific_location, Colony.Settlement)
+        b.set_location(p1, other_specific_location, Colony.City)
+        self.assertEqual(b.get_trade_ratio(p1, resource), 2)
+        self.assertEqual(b.get_trade_ratio(p1, Resource.Ore), 3)
+
+        copied = b.copy_layout()
+        copied.set_occupancy([p1], *b.get_occupancy({p1: 0}))
+        self.assertEqual(copied.get_trade_ratio(p1, resource), 2)
+
+        b.set_location(p1, specific_location, Colony.Uncolonised)
+        self.assertEqual(b.get_trade_ratio(p1, resource), 2)
+        b.set_location(p1, other_specific_location, Colony.Uncolonised)
+        b.set_location(p1, generic_location, Colony.Uncolonised)
+        self.assertEqual(b.get_trade_ratio(p1, resource), 4)
+        self.assertFalse(b.is_player_on_harbor(p1, Harbor.HarborGeneric))
@@ -0,0 +1,48 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from game.board import Board
+from game.board_corpus import create_board_corpus, load_board_corpus, get_balanced_seeds
+
+
+class TestBoardCorpus(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'boards.npy')
+        self.seeds = list(range(1, 41))
+        create_board_corpus(self.file_name, self.seeds, chunk_size=16)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_records_follow_the_boards(self):
+        corpus = load_board_corpus(self.file_name)
+        self.assertIsInstance(corpus, np.memmap)
+        self.assertListEqual(corpus['seed'].tolist(), self.seeds)
+        for record in corpus:
+            board = Board(int(record['seed']))
+            lands = [board.get_land(identifier) for identifier in range(Board.lands_count)]
+            self.assertListEqual(record['lands_resources'].tolist(),
+                                 [land.resource.value if land.resource is not None else -1 for land in lands])
+            self.assertListEqual(record['lands_dice_values'].tolist(), [land.dice_value for land in lands])
+            for location, harbor in enumerate(record['locations_harbors'].tolist()):
+                self.assertListEqual([h.value for h in board.get_harbors_of_location(location)],
+                                     [harbor] if harbor != -1 else [])
+            resources_pips = np.zeros(len(record['resources_pips']))
+            for land in lands[:-1]:
+                resources_pips[land.resource.value] += 6 - abs(7 - land.dice_value)
+            self.assertListEqual(record['resources_pips'].tolist(), resources_pips.tolist())
+            production = board.get_locations_production(consider_robber=False)
+            self.assertAlmostEqual(production.sum(axis=1).max() * 36, record['max_location_pips'])
+
+    def test_get_balanced_seeds(self):
+        corpus = load_board_corpus(self.file_name)
+        seeds = get_balanced_seeds(corpus, 5)
+        self.assertLessEqual(len(seeds), 5)
+        for seed in seeds:
+            self.assertEqual(corpus['adjacent_red_numbers'][self.seeds.index(seed)], 0)
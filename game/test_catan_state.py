@@ -1,7 +1,10 @@
+from collections import Counter
 from itertools import combinations_with_replacement, combinations
 from math import ceil
 from unittest import TestCase
 
+import numpy as np
+
 from algorithms.abstract_state import AbstractState
 from game.board import Harbor
 from game.catan_moves import CatanMove, RandomMove
@@ -52,6 +55,22 @@ class TestCatanState(TestCase):
 
         self.assertTrue(self.state.is_final())
 
+    def test_players_state_is_a_view_onto_the_state_buffer(self):
+        self.players[1].add_resource(Resource.Ore, 3)
+        self.players[1].add_unexposed_development_card(DevelopmentCard.Monopoly)
+        self.assertEqual(self.state.players_resources[1, Resource.Ore.value], 3)
+
+        self.state.players_resources[1] += 2
+        self.assertEqual(self.players[1].get_resource_count(Resource.Ore), 5)
+        self.assertEqual(self.players[1].get_resource_count(Resource.Grain), 2)
+
+        buffer_copy = self.state.players_buffer.copy()
+        self.players[1].remove_resources_and_piece_for_city()
+        self.assertEqual(self.players[1].pieces[Colony.City], 3)
+        self.state.players_buffer[:] = buffer_copy
+        self.assertEqual(self.players[1].pieces[Colony.City], 4)
+        self.assertEqual(self.players[1].unexposed_development_cards[DevelopmentCard.Monopoly], 1)
+
     def test_get_next_moves_given_resources_for_single_road(self):
         # given this board
         self.state.board.set_location(self.players[0], 0, Colony.Settlement)
@@ -129,6 +148,135 @@ class TestCatanState(TestCase):
             self.assertNotEqual(move.robber_placement_land, self.state.board.get_robber_land())
             self.assertNotEqual(move.robber_placement_land, None)
 
+    def test_get_next_moves_moves_the_robber_in_moves_that_build_when_dice_roll_7(self):
+        self.state.turns_count = 4
+        self.state.make_random_move(RandomMove(7, self.state.probabilities_by_dice_values[7], self.state))
+        player = self.state.get_current_player()
+        self.state.board.set_location(player, 0, Colony.Settlement)
+        self.state.board.set_location(player, 7, Colony.Settlement)
+        self.state.board.set_path(player, (3, 0), Road.Paved)
+        self.state.board.set_path(player, (3, 7), Road.Paved)
+        player.add_resource(Resource.Brick, 1)
+        player.add_resource(Resource.Lumber, 1)
+
+        moves = self.state.get_next_moves()
+        self.assertTrue(any(len(move.paths_to_be_paved) != 0 for move in moves))
+        for move in moves:
+            self.assertNotEqual(move.robber_placement_land, self.state.board.get_robber_land())
+
+    @staticmethod
+    def move_key(move: CatanMove):
+        return (move.robber_placement_land.identifier, move.development_card_to_be_exposed, move.monopoly_card,
+                tuple(sorted((resource.value, count) for resource, count in move.resources_updates.items())),
+                tuple(sorted((exchange.source_resource.value, exchange.target_resource.value, exchange.count)
+                             for exchange in move.resources_exchanges)),
+                frozenset(move.paths_to_be_paved), frozenset(move.locations_to_be_set_to_settlements),
+                frozenset(move.locations_to_be_set_to_cities), move.development_cards_to_be_purchased_count)
+
+    def test_sample_moves(self):
+        self.state.board.set_location(self.players[0], 0, Colony.Settlement)
+        self.state.board.set_location(self.players[0], 7, Colony.Settlement)
+        self.state.board.set_path(self.players[0], (3, 0), Road.Paved)
+        self.state.board.set_path(self.players[0], (3, 7), Road.Paved)
+        self.state.turns_count = 4
+        for resource in Resource:
+            self.players[0].add_resource(resource, 2)
+        self.players[0].add_unexposed_development_card(DevelopmentCard.Knight)
+        self.players[0].add_unexposed_development_card(DevelopmentCard.RoadBuilding)
+
+        random_state = np.random.RandomState(0)
+        moves_keys = {self.move_key(move) for move in self.state.get_next_moves()}
+        for uniformity in [1.0, 0.0]:
+            for move in self.state.sample_moves(100, random_state, uniformity):
+                self.assertIn(self.move_key(move), moves_keys)
+
+    def test_sample_moves_draws_every_move(self):
+        self.state.board.set_location(self.players[0], 0, Colony.Settlement)
+        self.state.board.set_path(self.players[0], (3, 0), Road.Paved)
+        self.state.turns_count = 4
+        self.players[0].add_resource(Resource.Brick, 1)
+        self.players[0].add_resource(Resource.Lumber, 1)
+
+        moves_keys = [self.move_key(move) for move in self.state.get_next_moves()]
+        sampled_keys = [self.move_key(move) for move in self.state.sample_moves(50 * len(moves_keys),
+                                                                               np.random.RandomState(0))]
+        self.assertSetEqual(set(sampled_keys), set(moves_keys))
+
+    def test_count_next_moves(self):
+        self.assertEqual(self.state.count_next_moves().total, len(self.state.get_next_moves()))
+
+        self.state.board.set_location(self.players[0], 0, Colony.Settlement)
+        self.state.board.set_location(self.players[0], 7, Colony.Settlement)
+        self.state.board.set_path(self.players[0], (3, 0), Road.Paved)
+        self.state.board.set_path(self.players[0], (3, 7), Road.Paved)
+        self.state.turns_count = 4
+        for resource in Resource:
+            self.players[0].add_resource(resource, 2)
+        self.players[0].add_resource(Resource.Ore, 2)
+        self.players[0].add_unexposed_development_card(DevelopmentCard.YearOfPlenty)
+        self.players[0].add_unexposed_development_card(DevelopmentCard.RoadBuilding)
+
+        moves = self.state.get_next_moves()
+        moves_count = self.state.count_next_moves()
+        self.assertEqual(moves_count.total, len(moves))
+        for card in DevelopmentCard:
+            self.assertEqual(moves_count.exposing_development_cards[card],
+                             sum(move.development_card_to_be_exposed == card for move in moves))
+        self.assertEqual(moves_count.trading, sum(len(move.resources_exchanges) != 0 for move in moves))
+        self.assertEqual(moves_count.paving_roads, sum(len(move.paths_to_be_paved) != 0 for move in moves))
+        self.assertEqual(moves_count.building_settlements,
+                         sum(len(move.locations_to_be_set_to_settlements) != 0 for move in moves))
+        self.assertEqual(moves_count.building_cities,
+                         sum(len(move.locations_to_be_set_to_cities) != 0 for move in moves))
+        self.assertEqual(moves_count.purchasing_development_cards,
+                         sum(move.development_cards_to_be_purchased_count != 0 for move in moves))
+
+    def test_get_next_moves_sequence(self):
+        self.state.board.set_location(self.players[0], 0, Colony.Settlement)
+        self.state.board.set_location(self.players[0], 7, Colony.Settlement)
+        self.state.board.set_path(self.players[0], (3, 0), Road.Paved)
+        self.state.board.set_path(self.players[0], (3, 7), Road.Paved)
+        self.state.turns_count = 4
+        for resource in Resource:
+            self.players[0].add_resource(resource, 2)
+        self.players[0].add_unexposed_development_card(DevelopmentCard.Knight)
+        self.players[0].add_unexposed_development_card(DevelopmentCard.YearOfPlenty)
+
+        moves_keys = Counter(self.move_key(move) for move in self.state.get_next_moves())
+        moves = self.state.get_next_moves_sequence()
+        self.assertEqual(len(moves), sum(moves_keys.values()))
+        self.assertEqual(Counter(self.move_key(move) for move in moves), moves_keys)
+        self.assertEqual(self.move_key(moves[-1]), self.move_key(moves[len(moves) - 1]))
+        with self.assertRaises(IndexError):
+            _ = moves[len(moves)]
+
+        robber_land = self.state.board.get_robber_land()
+        moves = self.state.get_next_moves_sequence(lambda move: move.robber_placement_land == robber_land)
+        self.assertEqual(len(moves),
+                         sum(count for key, count in moves_keys.items() if key[0] == robber_land.identifier))
+        self.assertTrue(all(move.robber_placement_land == robber_land for move in moves))
+
+    def test_get_next_moves_places_robber_once_per_equivalence_class_when_pruning(self):
+        self.state.board.set_location(self.players[0], 0, Colony.Settlement)
+        self.state.board.set_location(self.players[0], 7, Colony.Settlement)
+        self.state.board.set_path(self.players[0], (3, 0), Road.Paved)
+        self.state.board.set_path(self.players[0], (3, 7), Road.Paved)
+        self.state.board.set_location(self.players[1], 50, Colony.Settlement)
+        self.state.board.set_location(self.players[1], 42, Colony.Settlement)
+        self.state.board.set_path(self.players[1], (50, 46), Road.Paved)
+        self.state.board.set_path(self.players[1], (46, 42), Road.Paved)
+        self.state.turns_count = 4
+        self.state.make_random_move(RandomMove(7, self.state.probabilities_by_dice_values[7], self.state))
+
+        all_moves = self.state.get_next_moves()
+        self.state.prune_equivalent_robber_placements = True
+        pruned_moves = self.state.get_next_moves()
+
+        classes = self.state.board.get_robber_placement_equivalence_classes()
+        self.assertEqual(len(all_moves), len(self.state.board.get_lands_to_place_robber_on()))
+        self.assertLess(len(pruned_moves), len(all_moves))
+        self.assertListEqual([move.robber_placement_land for move in pruned_moves], [lands[0] for lands in classes])
+
     def test_largest_army_is_updated(self):
         for i in range(6):
             if i % 2 == 1:
@@ -153,6 +301,28 @@ class TestCatanState(TestCase):
         self.assertEqual(player, self.players[0])
         self.assertEqual(threshold, 3)
 
+    def test_scores_are_updated_by_largest_army_and_victory_point_cards(self):
+        self.state.turns_count = 4
+        moves = []
+        for i in range(6):
+            move = CatanMove(self.state.board.get_robber_land())
+            if i % 2 == 0:
+                self.players[0].add_unexposed_development_card(DevelopmentCard.Knight)
+                move.development_card_to_be_exposed = DevelopmentCard.Knight
+            self.state.make_move(move)
+            moves.append(move)
+        self.assertEqual(self.state.get_score_of_player(self.players[0]), 2)
+
+        victory_point_purchase = {card: int(card is DevelopmentCard.VictoryPoint) for card in DevelopmentCard}
+        random_move = RandomMove(2, self.state.probabilities_by_dice_values[2], self.state, victory_point_purchase)
+        self.state.make_random_move(random_move)
+        self.assertDictEqual(self.state.get_scores_by_player(), {self.players[0]: 3, self.players[1]: 0})
+
+        self.state.unmake_random_move(random_move)
+        for move in reversed(moves):
+            self.state.unmake_move(move)
+        self.assertDictEqual(self.state.get_scores_by_player(), {self.players[0]: 0, self.players[1]: 0})
+
     def test_on_knight_card_exposure_players_drop_cards(self):
         robber_placement = self.state.board.get_robber_land()
         self.players[0].add_unexposed_development_card(DevelopmentCard.Knight)
@@ -242,6 +412,83 @@ class TestCatanState(TestCase):
 
         self.state.unmake_move(move)
 
+    def test_scores_follow_restore_across_victory_point_exposure(self):
+        self.state.board.set_location(self.players[0], 0, Colony.Settlement)
+        self.state.turns_count = 4
+        self.players[0].add_unexposed_development_card(DevelopmentCard.VictoryPoint)
+        self.state.restore(self.state.snapshot())
+        scores = self.state.get_scores_by_player()
+        self.assertEqual(scores[self.players[0]], 2)
+
+        move = CatanMove(self.state.board.get_robber_land())
+        move.development_card_to_be_exposed = DevelopmentCard.VictoryPoint
+        self.state.make_move(move)
+        exposed_scores = self.state.get_scores_by_player()
+        self.state.restore(self.state.snapshot())
+        self.assertDictEqual(self.state.get_scores_by_player(), exposed_scores)
+
+        self.state.unmake_move(move)
+        self.assertDictEqual(self.state.get_scores_by_player(), scores)
+        self.state.restore(self.state.snapshot())
+        self.assertDictEqual(self.state.get_scores_by_player(), scores)
+
+    def test_snapshot_restore_and_clone(self):
+        self.state.board.set_location(self.players[0], 0, Colony.Settlement)
+        self.state.board.set_path(self.players[0], (3, 0), Road.Paved)
+        self.state.board.set_location(self.players[1], 50, Colony.City)
+        self.state.turns_count = 4
+        self.players[1].add_resource(Resource.Wool, 2)
+        snapshot = self.state.snapshot()
+
+        clone = self.state.clone([FakePlayer(i) for i in range(2)])
+        self.assertEqual(clone.snapshot(), snapshot)
+        self.assertListEqual(clone.board.get_locations_colonised_by_player(clone.players[1]), [50])
+        self.assertEqual(clone.get_score_of_player(clone.players[1]), 2)
+        self.assertEqual(clone.players[1].get_resource_count(Resource.Wool), 2)
+
+        clone.players[1].add_resource(Resource.Wool)
+        clone.board.set_location(clone.players[0], 7, Colony.Settlement)
+        self.assertEqual(self.state.snapshot(), snapshot)
+
+        # the clone rolls the dice this state would, without advancing this state's random state
+        dice_numbers = []
+        for state in [clone, self.state]:
+            for _ in range(5):
+                state.make_move(CatanMove(state.board.get_robber_land()))
+                state.make_random_move()
+                dice_numbers.append(state.current_dice_number)
+        self.assertListEqual(dice_numbers[:5], dice_numbers[5:])
+        self.state.restore(snapshot)
+
+        self.state.make_move(CatanMove(self.state.board.get_robber_land()))
+        self.state.make_random_move()
+        self.assertNotEqual(self.state.snapshot(), snapshot)
+        self.state.restore(snapshot)
+        self.assertEqual(self.state.snapshot(), snapshot)
+        self.assertEqual(self.state.get_current_player(), self.players[0])
+
+    def test_encode_state_features(self):
+        from game import features
+        self.state.board.set_location(self.players[1], 0, Colony.City)
+        self.players[1].add_resource(Resource.Grain, 3)
+
+        encoded = features.encode_state(self.state, self.players[1])
+        self.assertEqual(encoded.shape, (features.get_features_count(len(self.players)),))
+        own_block, other_block = features.get_player_block(encoded, 0), features.get_player_block(encoded, 1)
+        land = self.state.board.get_land(0)
+        self.assertAlmostEqual(own_block[features.production_columns][land.resource.value],
+                               2 * self.state.probabilities_by_dice_values[land.dice_value])
+        self.assertEqual(own_block[features.resources_columns][Resource.Grain.value], 3)
+        self.assertEqual(own_block[features.score_column], 2)
+        self.assertEqual(other_block[features.score_column], 0)
+        self.assertEqual(features.get_global_block(encoded)[features.deck_size_column], 26)
+
+        self.assertListEqual(own_block[features.dice_combinations_columns].tolist(),
+                             [0, self.state.board.get_dice_combinations_count(self.players[1], Colony.City), 0])
+        batch = features.encode_states([self.state, self.state], [self.players[1], self.players[0]])
+        self.assertTrue((batch[0] == encoded).all())
+        self.assertTrue((features.get_player_block(batch[1], 1) == own_block).all())
+
     def test_get_current_player(self):
         self.assertEqual(self.state.get_current_player(), self.players[0])
         self.state.make_move(CatanMove(self.state.board.get_robber_land()))
@@ -293,6 +540,18 @@ class TestCatanState(TestCase):
 
         self.assertEqual(self.players[0].get_resource_count(land_resource), 0)
 
+    def test_get_next_random_moves_merges_dice_values_with_same_production(self):
+        self.state.turns_count = 4
+        random_moves = self.state.get_next_random_moves()
+        self.assertEqual(len(random_moves), 2)
+        self.assertAlmostEqual(sum(move.probability for move in random_moves), 1)
+
+        self.state.board.set_location(self.players[0], 0, Colony.Settlement)
+        self.state.board.set_location(self.players[1], 50, Colony.Settlement)
+        random_moves = self.state.get_next_random_moves()
+        self.assertEqual(len(random_moves), len(self.state.board.get_dice_values_equivalence_classes()) + 1)
+        self.assertAlmostEqual(sum(move.probability for move in random_moves), 1)
+
     def test_get_all_possible_development_cards_purchase_options(self):
         purchase_count = 2
         options = self.state._get_all_possible_development_cards_purchase_options(purchase_count)
@@ -321,6 +580,14 @@ class TestCatanState(TestCase):
         two_knight_cards_actual_probability = options[0].probability
         self.assertAlmostEqual(two_knight_cards_expected_probability, two_knight_cards_actual_probability)
 
+    def test_development_cards_purchase_options_are_a_distribution_shared_between_calls(self):
+        for purchase_count in range(5):
+            options = self.state._get_all_possible_development_cards_purchase_options(purchase_count)
+            self.assertAlmostEqual(sum(option.probability for option in options), 1)
+            for option in options:
+                self.assertEqual(sum(option.purchased_cards_counters.values()), purchase_count)
+            self.assertIs(options, self.state._get_all_possible_development_cards_purchase_options(purchase_count))
+
     def test_probability_calculation_given_card_used(self):
         # given this board
         self.state.board.set_location(self.players[0], 0, Colony.Settlement)
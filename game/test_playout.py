@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+import numpy as np
+
+from game.board import Board, path_key
+from game.catan_state import CatanState
+from game.playout import Playout, GreedyPlayoutPolicy, RandomPlayoutPolicy, create_playout_heuristic
+from players.random_player import RandomPlayer
+
+
+class TestPlayout(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.players = [RandomPlayer(seed) for seed in range(1, 4)]
+        self.state = CatanState(self.players, seed=1)
+        for _ in range(30):
+            self.state.make_move(self.state.get_current_player().choose_move(self.state))
+            self.state.make_random_move()
+
+    def test_play_does_not_change_the_state(self):
+        snapshot = self.state.snapshot()
+        for policy in [RandomPlayoutPolicy(), GreedyPlayoutPolicy()]:
+            playout = Playout(self.state, [policy] * len(self.players), np.random.RandomState(0))
+            for _ in range(5):
+                scores = playout.play()
+                self.assertGreaterEqual(scores[playout.winner], 10)
+                self.assertEqual(max(scores), scores[playout.winner])
+        self.assertEqual(self.state.snapshot(), snapshot)
+
+    def test_copied_position_follows_the_board(self):
+        playout = Playout(self.state)
+        playout.play(max_turns=0)
+        board = self.state.board
+        paths = Board.get_paths()
+        for i, player in enumerate(self.players):
+            self.assertEqual(playout.scores[i], self.state.get_score_of_player(player))
+            self.assertListEqual(playout.get_settleable_locations(i),
+                                 sorted(board.get_settleable_locations_by_player(player)))
+            self.assertSetEqual({path_key(paths[path]) for path in playout.get_paveable_paths(i)},
+                                {path_key(path) for path in board.get_unpaved_paths_near_player(player)})
+            self.assertEqual(playout._get_longest_road_length(i, 0), board.get_longest_road_length_of_player(player))
+
+    def test_playout_heuristic(self):
+        heuristic = create_playout_heuristic(self.players[0], playouts_count=8, seed=1)
+        values = [heuristic(self.state) for _ in range(3)]
+        for value in values:
+            self.assertTrue(0 <= value <= 1)
+        self.assertEqual(len(self.state.play_out(random_state=np.random.RandomState(0))), len(self.players))
@@ -1,11 +1,13 @@
 import abc
-from typing import Dict
+from typing import Callable, Dict, List, Sequence
 
 import numpy as np
 
 from algorithms.abstract_state import AbstractState, AbstractMove
+from game import players_arrays
 from game.development_cards import DevelopmentCard
 from game.pieces import *
+from game.players_arrays import EnumArrayView
 from game.resource import Resource
 
 
@@ -18,17 +20,34 @@ class AbstractPlayer(abc.ABC):
 
         AbstractPlayer.c += 1
         seed = seed if seed is None else int(seed * AbstractPlayer.c)
-        self._random_choice = np.random.RandomState(seed).choice
+        self._random_state = np.random.RandomState(seed)
+        self._random_choice = self._random_state.choice
 
         self._timeout_seconds = timeout_seconds
-        self.resources = {r: 0 for r in Resource}
-        self.pieces = {
-            Colony.Settlement: 5,
-            Colony.City: 4,
-            Road.Paved: 15
-        }
-        self.unexposed_development_cards = {card: 0 for card in DevelopmentCard}
-        self.exposed_development_cards = {card: 0 for card in DevelopmentCard}
+        # the player's state is a row in a players' buffer (see game/players_arrays.py).
+        # until the player joins a game (see bind_state_row), the row is in a buffer of its own
+        self._set_state_row(players_arrays.create_players_buffer(1)[0])
+
+    def _set_state_row(self, row: np.ndarray):
+        self.state_row = row
+        self.resources_vector = row[players_arrays.resources_columns]
+        self.resources = EnumArrayView(self.resources_vector, list(Resource))
+        self.pieces = EnumArrayView(row[players_arrays.pieces_columns], players_arrays.pieces_order)
+        self.unexposed_development_cards = EnumArrayView(row[players_arrays.unexposed_development_cards_columns],
+                                                         list(DevelopmentCard))
+        self.exposed_development_cards = EnumArrayView(row[players_arrays.exposed_development_cards_columns],
+                                                       list(DevelopmentCard))
+
+    def bind_state_row(self, row: np.ndarray):
+        """
+        move the state of the player to given row of the players' buffer of a game.
+        the current state of the player is copied to that row, and from now on the player's
+        dictionaries (resources, pieces, development cards) are views onto it
+        :param row: the row of this player in the players' buffer
+        :return: None
+        """
+        row[:] = self.state_row
+        self._set_state_row(row)
 
     @abc.abstractmethod
     def choose_move(self, state: AbstractState) -> AbstractMove:
@@ -55,7 +74,7 @@ class AbstractPlayer(abc.ABC):
         :param how_many: number of resource units to add
         :return: None
         """
-        self.resources[resource_type] += how_many
+        self.resources_vector[resource_type.value] += how_many
 
     def remove_resource(self, resource_type: Resource, how_many=1):
         """
@@ -88,7 +107,7 @@ class AbstractPlayer(abc.ABC):
         :param resource_type: Brick, Lumber, Wool, Grain, Ore, Desert
         :return: the number of resource units the player has
         """
-        return self.resources[resource_type]
+        return int(self.resources_vector[resource_type.value])
 
     def add_unexposed_development_card(self, card: DevelopmentCard):
         """
@@ -219,51 +238,37 @@ class AbstractPlayer(abc.ABC):
 
     def remove_resources_and_piece_for_road(self):
         assert self.can_pave_road()
-        self.remove_resource(Resource.Brick)
-        self.remove_resource(Resource.Lumber)
+        self.resources_vector -= players_arrays.road_cost
         self.pieces[Road.Paved] -= 1
 
     def remove_resources_and_piece_for_settlement(self):
         assert self.can_settle_settlement()
-        self.remove_resource(Resource.Brick)
-        self.remove_resource(Resource.Lumber)
-        self.remove_resource(Resource.Wool)
-        self.remove_resource(Resource.Grain)
+        self.resources_vector -= players_arrays.settlement_cost
         self.pieces[Colony.Settlement] -= 1
 
     def remove_resources_and_piece_for_city(self):
         assert self.can_settle_city()
-        self.remove_resource(Resource.Ore, 3)
-        self.remove_resource(Resource.Grain, 2)
+        self.resources_vector -= players_arrays.city_cost
         self.pieces[Colony.City] -= 1
 
     def remove_resources_for_development_card(self):
         assert self.has_resources_for_development_card()
-        self.remove_resource(Resource.Ore)
-        self.remove_resource(Resource.Wool)
-        self.remove_resource(Resource.Grain)
+        self.resources_vector -= players_arrays.development_card_cost
 
     def add_resources_and_piece_for_road(self):
-        self.add_resource(Resource.Brick)
-        self.add_resource(Resource.Lumber)
+        self.resources_vector += players_arrays.road_cost
         self.pieces[Road.Paved] += 1
 
     def add_resources_and_piece_for_settlement(self):
-        self.add_resource(Resource.Brick)
-        self.add_resource(Resource.Lumber)
-        self.add_resource(Resource.Wool)
-        self.add_resource(Resource.Grain)
+        self.resources_vector += players_arrays.settlement_cost
         self.pieces[Colony.Settlement] += 1
 
     def add_resources_and_piece_for_city(self):
-        self.add_resource(Resource.Ore, 3)
-        self.add_resource(Resource.Grain, 2)
+        self.resources_vector += players_arrays.city_cost
         self.pieces[Colony.City] += 1
 
     def add_resources_for_development_card(self):
-        self.add_resource(Resource.Ore)
-        self.add_resource(Resource.Wool)
-        self.add_resource(Resource.Grain)
+        self.resources_vector += players_arrays.development_card_cost
 
     def trade_resources(self, source_resource: Resource, target_resource: Resource, count: int, ratio: int):
         self.remove_resource(source_resource, count * ratio)
@@ -272,3 +277,24 @@ class AbstractPlayer(abc.ABC):
     def un_trade_resources(self, source_resource: Resource, target_resource: Resource, count: int, ratio: int):
         self.add_resource(source_resource, count * ratio)
         self.remove_resource(target_resource, count)
+
+
+def create_seeded_players(factories: Sequence[Callable[[int], AbstractPlayer]], seed: int = None) \
+        -> List[AbstractPlayer]:
+    """
+    create the players of a game, so that they depend on the seed of the game only. the seeds of players are scaled
+    by the number of players created in the process (see AbstractPlayer), which differs between processes (e.g. the
+    workers of a pool), so the count is reset first
+    :param factories: per player, in the order of creation, given the seed of the player, creates the player
+    :param seed: the seed of the game. the player of factories[i] gets seed * len(factories) + i, or None if None.
+    the seeds are wrapped around, so that scaled by the count they're still seeds of np.random.RandomState
+    (smaller than 2 ** 32). seeds of games smaller than about 2 ** 32 / (len(factories) * (len(factories) + 1)) aren't
+    wrapped
+    :return: List[AbstractPlayer], the players, in the order of the factories
+    """
+    AbstractPlayer.c = 1
+    if seed is None:
+        return [factory(None) for factory in factories]
+    # the player of factories[i] is the (i + 1)th player created since the reset, so its seed is scaled by i + 2
+    seeds_bound = (2 ** 32 - 1) // (len(factories) + 1)
+    return [factory((seed * len(factories) + i - 1) % (seeds_bound - 1) + 1) for i, factory in enumerate(factories)]
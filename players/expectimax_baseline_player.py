@@ -3,8 +3,11 @@ from collections import Counter
 from math import ceil
 from typing import Dict, Callable, List
 
+import numpy as np
+
 from algorithms.abstract_state import AbstractState, AbstractMove
 from algorithms.alpha_beta_pruning_expectimax import AlphaBetaExpectimax
+from game import features
 from game.catan_state import CatanState
 from game.resource import Resource, ResourceAmounts
 from players.abstract_player import AbstractPlayer
@@ -19,7 +22,7 @@ class ExpectimaxBaselinePlayer(AbstractPlayer):
             return self._random_choice([i for i in range(10)])
         # as discussed with Shaul, this isn't zero-sum heuristic, but a max-gain approach where only own player's
         # value is is taken in account
-        return float(state.get_scores_by_player()[self])
+        return float(state.get_score_of_player(self))
 
     def __init__(self, seed=None, timeout_seconds=5, heuristic=None, filter_moves=lambda x, y: x):
         assert seed is None or (isinstance(seed, int) and seed > 0)
@@ -33,7 +36,8 @@ class ExpectimaxBaselinePlayer(AbstractPlayer):
             is_maximizing_player=lambda p: p is self,
             evaluate_heuristic_value=heuristic,
             timeout_seconds=self._timeout_seconds,
-            filter_moves=filter_moves)
+            filter_moves=filter_moves,
+            seed=seed)
 
     def choose_move(self, state: CatanState):
         self.expectimax_alpha_beta.start_turn_timer()
@@ -94,3 +98,36 @@ class ExpectimaxBaselinePlayer(AbstractPlayer):
         :param filter_moves: a callable that given list of moves, returns a list of moves that will be further developed
         """
         self.expectimax_alpha_beta.filter_moves = filter_moves
+
+    def set_moves_generator(self, generate_moves: Callable[[AbstractState], List[AbstractMove]]):
+        """
+        set the generation of the moves developed in each step, instead of filtering all the next moves
+        :param generate_moves: a callable that given state returns the moves that will be further developed
+        (see players/filters.py, create_budgeted_moves_generator). None to go back to filtering
+        """
+        self.expectimax_alpha_beta.generate_moves = generate_moves
+
+    def set_chance_node_sampling(self, samples_count: int=None, probability_threshold: float=0.0):
+        """
+        set the estimation of chance nodes by sampling, to trade accuracy for depth
+        :param samples_count: number of stratified samples per chance node. None to expand all the random moves
+        :param probability_threshold: random moves less probable than this are pruned from chance nodes
+        """
+        self.expectimax_alpha_beta.chance_node_samples_count = samples_count
+        self.expectimax_alpha_beta.chance_node_probability_threshold = probability_threshold
+
+    def set_batch_heuristic(self, evaluate_heuristic_values: Callable[[np.ndarray], np.ndarray],
+                            encode_state: Callable[[AbstractState], np.ndarray] = None):
+        """
+        set batched evaluation of the leaves at the frontier of the search
+        :param evaluate_heuristic_values: a callable that given a matrix of feature vectors (a row per state), returns
+        the heuristic values of all of them. higher means "better" state
+        :param encode_state: a callable that given state returns its feature vector. by default, features.encode_state
+        from this player's perspective (its block is the first one, see game/features.py)
+        """
+        if encode_state is None:
+            def encode_state(state: CatanState) -> np.ndarray:
+                return features.encode_state(state, self)
+
+        self.expectimax_alpha_beta.encode_state = encode_state
+        self.expectimax_alpha_beta.evaluate_heuristic_values = evaluate_heuristic_values
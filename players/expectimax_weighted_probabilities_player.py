@@ -1,3 +1,6 @@
+import numpy as np
+
+from game import features, players_arrays
 from game.catan_state import CatanState
 from game.development_cards import DevelopmentCard
 from game.pieces import Road, Colony
@@ -7,30 +10,53 @@ from players.expectimax_baseline_player import ExpectimaxBaselinePlayer
 class ExpectimaxWeightedProbabilitiesPlayer(ExpectimaxBaselinePlayer):
     default_weights = {Colony.City: 2, Colony.Settlement: 1, Road.Paved: 0.4,
                        DevelopmentCard.VictoryPoint: 1, DevelopmentCard.Knight: 2.0 / 3.0}
+    _production_pieces = (Colony.Settlement, Colony.City, Road.Paved)
 
-    def __init__(self, seed=None, timeout_seconds=5, weights=default_weights, filter_moves=lambda x, y: x):
+    def __init__(self, seed=None, timeout_seconds=5, weights=default_weights, filter_moves=lambda x, y: x,
+                 batch_heuristic=False):
+        """
+        :param batch_heuristic: if True, the leaves at the frontier of the search are encoded (see game/features.py),
+        and evaluated together by weighted_probabilities_heuristic_values, instead of one by one
+        """
         super().__init__(seed, timeout_seconds, self.weighted_probabilities_heuristic, filter_moves)
         self.weights = weights
         self._players_and_factors = None
+        if batch_heuristic:
+            self.set_batch_heuristic(self.weighted_probabilities_heuristic_values)
 
     def weighted_probabilities_heuristic(self, s: CatanState):
         if self._players_and_factors is None:
             self._players_and_factors = [(self, len(s.players) - 1)] + [(p, -1) for p in s.players if p is not self]
 
+        # the board keeps, per player and piece type, the dice combinations (out of 36) of the numbers around
+        # the pieces, up to date as pieces are put and removed, so evaluating a position doesn't traverse the map
         score = 0
         # noinspection PyTypeChecker
         for player, factor in self._players_and_factors:
-            for location in s.board.get_locations_colonised_by_player(player):
-                weight = self.weights[s.board.get_colony_type_at_location(location)]
-                for dice_value in s.board.get_surrounding_dice_values(location):
-                    score += s.probabilities_by_dice_values[dice_value] * weight * factor
-
-            for road in s.board.get_roads_paved_by_player(player):
-                weight = self.weights[Road.Paved]
-                for dice_value in s.board.get_adjacent_to_path_dice_values(road):
-                    score += s.probabilities_by_dice_values[dice_value] * weight * factor
+            for piece in ExpectimaxWeightedProbabilitiesPlayer._production_pieces:
+                weight = self.weights[piece]
+                score += s.board.get_dice_combinations_count(player, piece) / 36.0 * weight * factor
 
             for development_card in {DevelopmentCard.VictoryPoint, DevelopmentCard.Knight}:
                 weight = self.weights[development_card]
                 score += self.get_unexposed_development_cards()[development_card] * weight * factor
         return score
+
+    def weighted_probabilities_heuristic_values(self, features_matrix: np.ndarray) -> np.ndarray:
+        """
+        the weighted probabilities heuristic of a batch of positions, encoded for this player (see game/features.py)
+        :param features_matrix: a row per position, as features.encode_states returns
+        :return: np.ndarray, the value of every position, as weighted_probabilities_heuristic evaluates it
+        """
+        players_count = (features_matrix.shape[1] - features.global_features_count) // features.player_features_count
+        pieces_weights = np.array([self.weights[piece] for piece in players_arrays.pieces_order]) / 36.0
+        # the development-cards of this player are counted for every player, as in weighted_probabilities_heuristic
+        cards = features.get_player_block(features_matrix, 0)[:, features.unexposed_development_cards_columns]
+        cards_values = sum(cards[:, card.value] * self.weights[card]
+                           for card in (DevelopmentCard.VictoryPoint, DevelopmentCard.Knight))
+        values = np.zeros(len(features_matrix))
+        for seat in range(players_count):
+            factor = players_count - 1 if seat == 0 else -1
+            dice_combinations = features.get_player_block(features_matrix, seat)[:, features.dice_combinations_columns]
+            values += factor * (dice_combinations.dot(pieces_weights) + cards_values)
+        return values
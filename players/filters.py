@@ -1,33 +1,61 @@
+import math
+from typing import Sequence, List
+
 from numpy import random
 
 from game.catan_state import CatanState
 
 
+def reservoir_sample(moves: Sequence, budget: int, random_state: random.RandomState) -> List:
+    """
+    sample budget of the moves uniformly, without replacement, by reservoir sampling (Li's algorithm L).
+    the reservoir holds indices, and the gaps between replacements are drawn instead of visiting every move,
+    so only the sampled moves are accessed (useful with the lazy CatanState.get_next_moves_sequence)
+    :param moves: the moves to sample from
+    :param budget: the number of moves to sample
+    :param random_state: the random generator to sample with
+    :return: List, the sampled moves, in their order in moves. all the moves if there are no more than budget
+    """
+    if len(moves) <= budget:
+        return list(moves)
+    reservoir = list(range(budget))
+    w = math.exp(math.log(1.0 - random_state.random_sample()) / budget)
+    i = budget - 1
+    while True:
+        i += int(math.log(1.0 - random_state.random_sample()) / math.log(1.0 - w)) + 1
+        if i >= len(moves):
+            break
+        reservoir[random_state.randint(budget)] = i
+        w *= math.exp(math.log(1.0 - random_state.random_sample()) / budget)
+    return [moves[i] for i in sorted(reservoir)]
+
+
 def create_monte_carlo_filter(seed, branching_factor=3459):
+    random_state = random.RandomState(seed)
+
     # noinspection PyUnusedLocal
     def monte_carlo_filter(all_moves, state=None):  # state here to return correct method type
-        if len(all_moves) <= branching_factor:
-            return all_moves
-        return random.RandomState(seed).choice(all_moves, branching_factor, False)
+        return reservoir_sample(all_moves, branching_factor, random_state)
 
     return monte_carlo_filter
 
 
-def create_bad_robber_placement_filter(player):
-    def is_good_move(move, state) -> bool:
-        from game.catan_moves import CatanMove
-        assert isinstance(move, CatanMove)
-        assert isinstance(state, CatanState)
-        if move.robber_placement_land == state.board.get_robber_land():
-            return True
-        for location in move.robber_placement_land.locations:
-            if state.board.is_colonised_by(player, location):
-                return False
+def _is_good_robber_placement(player, move, state) -> bool:
+    from game.catan_moves import CatanMove
+    assert isinstance(move, CatanMove)
+    assert isinstance(state, CatanState)
+    if move.robber_placement_land == state.board.get_robber_land():
         return True
+    for location in move.robber_placement_land.locations:
+        if state.board.is_colonised_by(player, location):
+            return False
+    return True
 
+
+def create_bad_robber_placement_filter(player):
     def bad_robber_placement_filter(all_moves, state):
         assert state is not None
-        good_moves = [move for move in all_moves if is_good_move(move, state)]
+        good_moves = [move for move in all_moves if _is_good_robber_placement(player, move, state)]
         if not good_moves:
             return all_moves
         return good_moves
@@ -43,3 +71,27 @@ def create_bad_robber_placement_and_monte_carlo_filter(seed, player, branching_f
         return b(a(all_moves, state), state)
 
     return bad_robber_placement_and_monte_carlo_filter
+
+
+def create_budgeted_moves_generator(seed, branching_factor=3459, player=None):
+    """
+    create a generator of the next moves for AlphaBetaExpectimax (see its generate_moves), that streams the moves
+    instead of filtering a list of all of them: the moves are a lazy CatanState.get_next_moves_sequence, and only
+    a reservoir sample of branching_factor of them is ever generated.
+    the random generator is created once, so every state gets a different sample
+    :param seed: seed of the random generator of the samples
+    :param branching_factor: the maximal number of moves generated per state
+    :param player: if given, moves that place the robber on its colonies are dropped (as the bad robber placement
+    filter does), at the robber placement stage, before the moves are generated or counted
+    :return: Callable[[CatanState], List[CatanMove]], the generator
+    """
+    random_state = random.RandomState(seed)
+
+    def generate_moves(state: CatanState):
+        prefix_filter = None
+        if player is not None:
+            def prefix_filter(move):
+                return _is_good_robber_placement(player, move, state)
+        return reservoir_sample(state.get_next_moves_sequence(prefix_filter), branching_factor, random_state)
+
+    return generate_moves
@@ -2,7 +2,7 @@ from collections import Counter
 from math import ceil
 from typing import Dict
 
-from algorithms.abstract_state import AbstractState
+from game.catan_state import CatanState
 from game.resource import Resource
 from players.abstract_player import AbstractPlayer
 
@@ -12,8 +12,8 @@ class RandomPlayer(AbstractPlayer):
         assert seed is None or (isinstance(seed, int) and seed > 0)
         super().__init__(seed)
 
-    def choose_move(self, state: AbstractState):
-        return self._random_choice(state.get_next_moves())
+    def choose_move(self, state: CatanState):
+        return state.sample_moves(1, self._random_state)[0]
 
     def choose_resources_to_drop(self) -> Dict[Resource, int]:
         if sum(self.resources.values()) < 8:
@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from players.abstract_player import create_seeded_players
+from players.expectimax_baseline_player import ExpectimaxBaselinePlayer
+from players.monte_carlo_player import MonteCarloPlayer
+from players.random_player import RandomPlayer
+
+
+class TestAbstractPlayer(TestCase):
+    def test_create_seeded_players(self):
+        players = create_seeded_players([RandomPlayer] * 3, 5)
+        same_players = create_seeded_players([RandomPlayer] * 3, 5)
+        self.assertListEqual([player._random_state.randint(1000) for player in players],
+                             [player._random_state.randint(1000) for player in same_players])
+        self.assertEqual(len({player._random_state.randint(2 ** 30) for player in players}), 3)
+
+    def test_create_seeded_players_with_large_seeds(self):
+        # the seeds of the games are drawn below 2 ** 30, and the seeds of the players are scaled up from them
+        for seed in [2 ** 30 - 1, 2 ** 30, 2 ** 32 - 1]:
+            create_seeded_players([lambda player_seed: ExpectimaxBaselinePlayer(player_seed, 1),
+                                   lambda player_seed: MonteCarloPlayer(player_seed, 1, 10)], seed)
+            create_seeded_players([RandomPlayer] * 4, seed)
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import numpy as np
+
+from game import features
+from game.catan_state import CatanState
+from game.development_cards import DevelopmentCard
+from game.pieces import Road
+from players.expectimax_weighted_probabilities_player import ExpectimaxWeightedProbabilitiesPlayer
+from players.random_player import RandomPlayer
+
+
+class TestExpectimaxWeightedProbabilitiesPlayer(TestCase):
+    @staticmethod
+    def recomputed_heuristic(player, s: CatanState):
+        score = 0
+        players_and_factors = [(player, len(s.players) - 1)] + [(p, -1) for p in s.players if p is not player]
+        for p, factor in players_and_factors:
+            for location in s.board.get_locations_colonised_by_player(p):
+                weight = player.weights[s.board.get_colony_type_at_location(location)]
+                for dice_value in s.board.get_surrounding_dice_values(location):
+                    score += s.probabilities_by_dice_values[dice_value] * weight * factor
+            for road in s.board.get_roads_paved_by_player(p):
+                for dice_value in s.board.get_adjacent_to_path_dice_values(road):
+                    score += s.probabilities_by_dice_values[dice_value] * player.weights[Road.Paved] * factor
+            for development_card in {DevelopmentCard.VictoryPoint, DevelopmentCard.Knight}:
+                weight = player.weights[development_card]
+                score += player.get_unexposed_development_cards()[development_card] * weight * factor
+        return score
+
+    def test_chance_node_sampling_is_seeded(self):
+        samples = [ExpectimaxWeightedProbabilitiesPlayer(seed).expectimax_alpha_beta._random_uniform(size=5).tolist()
+                   for seed in [1, 1, 2]]
+        self.assertListEqual(samples[0], samples[1])
+        self.assertNotEqual(samples[0], samples[2])
+
+    def test_weighted_probabilities_heuristic_equals_recomputed_score(self):
+        player = ExpectimaxWeightedProbabilitiesPlayer(seed=1)
+        others = [RandomPlayer(seed) for seed in range(2, 4)]
+        state = CatanState([player] + others, seed=1)
+        for _ in range(60):
+            current_player = state.get_current_player()
+            if current_player is player:
+                move = others[0].choose_move(state)
+            else:
+                move = current_player.choose_move(state)
+            state.make_move(move)
+            state.make_random_move()
+            for next_move in state.get_next_moves()[:5]:
+                state.make_move(next_move)
+                self.assertAlmostEqual(player.weighted_probabilities_heuristic(state),
+                                       self.recomputed_heuristic(player, state))
+                state.unmake_move(next_move)
+            self.assertAlmostEqual(player.weighted_probabilities_heuristic(state),
+                                   self.recomputed_heuristic(player, state))
+
+    def test_batch_heuristic_equals_heuristic(self):
+        player = ExpectimaxWeightedProbabilitiesPlayer(seed=1, batch_heuristic=True)
+        others = [RandomPlayer(seed) for seed in range(2, 4)]
+        state = CatanState([others[0], player, others[1]], seed=1)
+        player.add_unexposed_development_card(DevelopmentCard.Knight)
+        player.add_unexposed_development_card(DevelopmentCard.VictoryPoint)
+        for _ in range(60):
+            current_player = state.get_current_player()
+            state.make_move((others[0] if current_player is player else current_player).choose_move(state))
+            state.make_random_move()
+            leaves = []
+            for next_move in state.get_next_moves()[:5]:
+                state.make_move(next_move)
+                leaves.append((player.expectimax_alpha_beta.encode_state(state),
+                               player.weighted_probabilities_heuristic(state)))
+                state.unmake_move(next_move)
+            values = player.expectimax_alpha_beta.evaluate_heuristic_values(np.stack([row for row, _ in leaves]))
+            for value, (_, expected_value) in zip(values, leaves):
+                self.assertAlmostEqual(value, expected_value)
+            # the states are encoded from the player's perspective, though it isn't in the first seat
+            encoded = player.expectimax_alpha_beta.encode_state(state)
+            self.assertEqual(features.get_player_block(encoded, 0)[features.score_column],
+                             state.get_score_of_player(player))
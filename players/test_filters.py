@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+import numpy as np
+
+from game.catan_state import CatanState
+from players.filters import reservoir_sample, create_monte_carlo_filter, create_budgeted_moves_generator
+from players.random_player import RandomPlayer
+
+
+class TestFilters(TestCase):
+    def test_reservoir_sample_is_uniform(self):
+        random_state = np.random.RandomState(0)
+        counts = np.zeros(20)
+        for _ in range(4000):
+            sample = reservoir_sample(range(20), 5, random_state)
+            self.assertEqual(len(set(sample)), 5)
+            self.assertListEqual(sample, sorted(sample))
+            counts[sample] += 1
+        # every item is sampled with probability 1/4
+        self.assertTrue(np.all(np.abs(counts / 4000 - 0.25) < 0.03))
+
+        self.assertListEqual(reservoir_sample(range(3), 5, random_state), [0, 1, 2])
+
+    def test_monte_carlo_filter_draws_a_new_sample_every_call(self):
+        monte_carlo_filter = create_monte_carlo_filter(seed=1, branching_factor=5)
+        samples = {tuple(monte_carlo_filter(list(range(100)))) for _ in range(10)}
+        self.assertGreater(len(samples), 1)
+
+    def test_budgeted_moves_generator(self):
+        players = [RandomPlayer(seed) for seed in range(1, 3)]
+        state = CatanState(players, seed=1)
+        while state.is_initialisation_phase():
+            state.make_move(state.get_current_player().choose_move(state))
+            state.make_random_move()
+        player = state.get_current_player()
+        state.current_dice_number = 7
+        lands = [land for land in state.board.get_lands_to_place_robber_on()
+                 if any(state.board.is_colonised_by(player, location) for location in land.locations)]
+        self.assertNotEqual(lands, [])
+
+        generate_moves = create_budgeted_moves_generator(seed=1, branching_factor=3, player=player)
+        moves = generate_moves(state)
+        self.assertLessEqual(len(moves), 3)
+        for move in generate_moves(state) + moves:
+            self.assertNotIn(move.robber_placement_land, lands)
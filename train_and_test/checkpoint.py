@@ -0,0 +1,53 @@
+import os
+import pickle
+from typing import Any
+
+"""
+Structure
+---------
+A checkpoint keeps the progress of a long run (a training or a tournament) in a file, so a restarted run can skip
+the work that was done, and continue from where it stopped.
+It's a mapping of names to picklable values, loaded from the file when created, and written to it whenever a value
+is saved. The file is replaced atomically (written to a temporary file, then renamed over it), so a crash while
+saving leaves the previous checkpoint intact.
+"""
+
+
+class Checkpoint:
+    def __init__(self, file_name: str):
+        """
+        :param file_name: the file of the checkpoint. if it exists, the checkpoint is loaded from it
+        """
+        self.file_name = file_name
+        self._values = {}
+        if os.path.exists(file_name):
+            with open(file_name, 'rb') as f:
+                self._values = pickle.load(f)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._values
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self._values.get(name, default)
+
+    def save(self, **values):
+        """
+        set values, and write the checkpoint to its file. the values are written together,
+        so a crash leaves either all of them or none
+        :param values: the values by their names, picklable
+        """
+        self._values.update(values)
+        temporary_file_name = self.file_name + '.tmp'
+        with open(temporary_file_name, 'wb') as f:
+            pickle.dump(self._values, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_file_name, self.file_name)
+
+    def remove(self):
+        """
+        remove the checkpoint's file, when the run it keeps is done
+        """
+        self._values = {}
+        if os.path.exists(self.file_name):
+            os.remove(self.file_name)
@@ -0,0 +1,296 @@
+import multiprocessing
+import pickle
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+import traceback
+from collections import namedtuple
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
+
+from train_and_test.logger import logger
+
+"""
+Structure
+---------
+A coordinator hands out tasks (a module-level function and its argument, e.g. tournament.play_game and a GameTask,
+or WeightsSpace.run_game and its GameRunTask) to worker processes, that connect to it over TCP (from any host)
+or over a Unix socket, and collects their results.
+The coordinator has the interface of multiprocessing.Pool that the runs use (map and imap_unordered),
+so it's passed instead of a pool: to WeightsSpace, and to tournament.run_tournament.
+The protocol: every message is a pickle, prefixed by its length (4 bytes, big-endian).
+the coordinator sends ('task', function, argument) or ('stop',), and the worker answers a task with
+('result', value), or ('error', the traceback) if the function raised.
+The coordinator serves every worker on a thread of its own, that takes the next task from a queue shared by all
+the workers. If a worker is lost (its connection breaks, or it doesn't answer in task_timeout seconds), the task
+is queued again, for another worker, up to max_attempts times. Tasks wait in the queue while there are no
+workers, so workers can join (and leave) at any time during a run.
+A task that can't be pickled (or whose result can't be) fails its map, and not the worker. when a map fails, or its
+caller stops iterating its results, its tasks that are still queued are dropped, so they don't delay the next map.
+The messages are pickles, so workers should only connect to coordinators they trust, and vice versa.
+"""
+
+Address = Union[Tuple[str, int], str]
+"""
+(host, port) for TCP, or the path of a Unix socket
+"""
+
+_length_format = '>I'
+
+
+class _Map:
+    def __init__(self):
+        """
+        a map (or imap_unordered) call: the queue.Queue of its results, that gets (index, is_successful, result or
+        error), and whether it's abandoned (it failed, or its caller stopped iterating its results), so its tasks
+        that are still queued are dropped instead of being run
+        """
+        self.results = queue.Queue()
+        self.is_abandoned = False
+
+    def get_result(self, timeout: float = None) -> Tuple:
+        """
+        :param timeout: the number of seconds to wait for the result. None for no limit
+        :return: Tuple, the next (index, is_successful, result or error)
+        """
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError('no result in {} seconds'.format(timeout))
+
+
+class _Task(namedtuple('_TaskTuple', ['function', 'argument', 'index', 'map', 'attempts'])):
+    """
+    A task of a map. It has (in this order):
+     -the function to apply
+     -the argument to apply it to
+     -the index of the argument in the map
+     -the _Map the task is of
+     -the number of workers that were lost while running the task
+    """
+
+
+class Coordinator:
+    def __init__(self, address: Address = ('0.0.0.0', 0), task_timeout: float = None, max_attempts: int = 3):
+        """
+        listen for workers (see run_worker) on given address
+        :param address: the address to listen on. with port 0, a free port is chosen (see self.address)
+        :param task_timeout: the number of seconds a worker has to finish a task, before it's considered lost.
+        None for no limit (a lost worker is then noticed when its connection breaks)
+        :param max_attempts: the number of workers a task can be sent to, before its map fails
+        """
+        self._task_timeout = task_timeout
+        self._max_attempts = max_attempts
+        self._tasks = queue.Queue()
+        self._workers_count = 0
+        self._lock = threading.Lock()
+        self._is_closed = False
+
+        self._socket = socket.socket(socket.AF_UNIX if isinstance(address, str) else socket.AF_INET)
+        if not isinstance(address, str):
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(address)
+        self._socket.listen()
+        self.address = self._socket.getsockname()
+        threading.Thread(target=self._accept_workers, daemon=True).start()
+
+    @property
+    def workers_count(self) -> int:
+        return self._workers_count
+
+    def imap_unordered(self, function: Callable, iterable: Iterable, timeout: float = None) -> Iterator:
+        """
+        apply the function to every item of the iterable, on the workers
+        :param timeout: the number of seconds to wait for every result, before raising TimeoutError. None for no limit
+        :return: Iterator, the results, in the order they're done
+        """
+        task_map = _Map()
+        try:
+            count = 0
+            for index, argument in enumerate(iterable):
+                self._tasks.put(_Task(function, argument, index, task_map, 0))
+                count += 1
+            for _ in range(count):
+                index, is_successful, result = task_map.get_result(timeout)
+                if not is_successful:
+                    raise RuntimeError('task {} failed: {}'.format(index, result))
+                yield result
+        finally:
+            task_map.is_abandoned = True
+
+    def map(self, function: Callable, iterable: Iterable, timeout: float = None) -> List:
+        """
+        apply the function to every item of the iterable, on the workers
+        :param timeout: the number of seconds to wait for every result, before raising TimeoutError. None for no limit
+        :return: List, the results, in the order of the items
+        """
+        task_map = _Map()
+        try:
+            arguments = list(iterable)
+            for index, argument in enumerate(arguments):
+                self._tasks.put(_Task(function, argument, index, task_map, 0))
+            ordered_results = [None] * len(arguments)
+            for _ in arguments:
+                index, is_successful, result = task_map.get_result(timeout)
+                if not is_successful:
+                    raise RuntimeError('task {} failed: {}'.format(index, result))
+                ordered_results[index] = result
+            return ordered_results
+        finally:
+            task_map.is_abandoned = True
+
+    def close(self):
+        """
+        stop the workers (after their current tasks) and stop listening
+        """
+        with self._lock:
+            self._is_closed = True
+            for _ in range(self._workers_count):
+                self._tasks.put(None)
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _accept_workers(self):
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+            with self._lock:
+                if self._is_closed:
+                    connection.close()
+                    return
+                self._workers_count += 1
+            logger.info('| worker connected. {} workers'.format(self._workers_count))
+            threading.Thread(target=self._serve_worker, args=(connection,), daemon=True).start()
+
+    def _serve_worker(self, connection: socket.socket):
+        connection.settimeout(self._task_timeout)
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    _send(connection, _dumps(('stop',)))
+                    return
+                if task.map.is_abandoned:
+                    continue
+                try:
+                    data = _dumps(('task', task.function, task.argument))
+                except Exception:
+                    # e.g. a lambda, that can't be pickled. the worker is fine, only the task fails
+                    task.map.results.put((task.index, False, traceback.format_exc()))
+                    continue
+                try:
+                    _send(connection, data)
+                    message = _receive(connection)
+                except (OSError, EOFError):
+                    self._retry(task)
+                    return
+                except Exception:
+                    # the answer can't be unpickled here
+                    task.map.results.put((task.index, False, traceback.format_exc()))
+                    continue
+                task.map.results.put((task.index, message[0] == 'result', message[1]))
+        except OSError:
+            pass
+        finally:
+            connection.close()
+            with self._lock:
+                self._workers_count -= 1
+
+    def _retry(self, task: _Task):
+        attempts = task.attempts + 1
+        logger.info('| worker lost while running task {} (attempt {} of {})'
+                    .format(task.index, attempts, self._max_attempts))
+        if attempts >= self._max_attempts:
+            task.map.results.put((task.index, False, 'lost {} workers while running it'.format(attempts)))
+        else:
+            self._tasks.put(task._replace(attempts=attempts))
+
+
+def run_worker(address: Address, connect_timeout: float = 60):
+    """
+    run tasks of a coordinator, until it stops the worker (or the connection to it breaks)
+    :param address: the address of the coordinator
+    :param connect_timeout: the number of seconds to keep trying to connect, while the coordinator isn't listening
+    """
+    connection = socket.socket(socket.AF_UNIX if isinstance(address, str) else socket.AF_INET)
+    deadline = time.time() + connect_timeout
+    while True:
+        try:
+            connection.connect(address)
+            break
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.1)
+
+    try:
+        while True:
+            message = _receive(connection)
+            if message[0] == 'stop':
+                return
+            _, function, argument = message
+            try:
+                data = _dumps(('result', function(argument)))
+            except Exception:
+                # the function raised, or its result can't be pickled
+                data = _dumps(('error', traceback.format_exc()))
+            _send(connection, data)
+    except (OSError, EOFError):
+        return
+    finally:
+        connection.close()
+
+
+def start_local_workers(address: Address, count: int) -> List[multiprocessing.Process]:
+    """
+    start worker processes on this host (e.g. in place of remote hosts, to test a run).
+    the workers are spawned, not forked: the coordinator's threads are already running, and a forked worker could
+    inherit a lock one of them held (e.g. of the logging), and never connect
+    :param address: the address of the coordinator
+    :param count: the number of workers
+    :return: List[multiprocessing.Process], the workers
+    """
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=run_worker, args=(address,), daemon=True) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def _dumps(message: Tuple) -> bytes:
+    return pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _send(connection: socket.socket, data: bytes):
+    connection.sendall(struct.pack(_length_format, len(data)) + data)
+
+
+def _receive(connection: socket.socket) -> Tuple:
+    length, = struct.unpack(_length_format, _receive_exactly(connection, struct.calcsize(_length_format)))
+    return pickle.loads(_receive_exactly(connection, length))
+
+
+def _receive_exactly(connection: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(min(size, 1 << 20))
+        if not chunk:
+            raise EOFError('the connection was closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+if __name__ == '__main__':
+    # python -m train_and_test.distributed HOST:PORT (or the path of a Unix socket) runs a worker
+    host, _, port = sys.argv[1].rpartition(':')
+    run_worker((host, int(port)) if port.isdigit() and host else sys.argv[1])
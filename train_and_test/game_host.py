@@ -0,0 +1,319 @@
+import abc
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from game.catan_moves import CatanMove
+from game.catan_state import CatanState
+from players.abstract_player import AbstractPlayer
+from players.random_player import RandomPlayer
+from train_and_test.distributed import Address
+from train_and_test.logger import logger
+from train_and_test.tournament import GameResult
+
+"""
+Structure
+---------
+A game host plays many games concurrently, in a single asyncio event loop, instead of a process per game.
+The players of a hosted game are AsyncPlayers, whose choose_move is awaited:
+ -InlinePlayer chooses in the event loop. for light players (e.g. RandomPlayer), whose moves take no time
+ -ExecutorPlayer chooses on an executor (a thread pool by default), so the event loop keeps playing the other games
+ while a search-based player thinks. only the player's own game waits for it
+ -SocketPlayer asks an external program (a bot, see run_bot) that connected to a PlayersServer over TCP or a Unix
+ socket
+Every AsyncPlayer wraps the AbstractPlayer that sits in the game's state. it holds the player's resources and pieces,
+and makes the decisions the state asks for synchronously (the resources to drop when the dice roll 7).
+a SocketPlayer's AbstractPlayer is a RandomPlayer, that also chooses its moves if the bot is disconnected,
+or answers with a move that doesn't exist.
+The bots protocol: every message is a JSON object on a line of its own. a bot connects and sends {"name": ...}.
+in its turn, it gets {"type": "choose_move", "game", "player", "scores", "moves_count"}, and answers with
+{"move": index} (0 <= index < moves_count), or first asks for moves by their indices with {"describe": [indices]},
+that's answered with {"type": "moves", "moves": [[index, description], ...]} (see describe_move).
+at the end of a game it gets {"type": "game_over", "game", "player", "scores"}, and a bot can play any number of
+games, one at a time.
+GameHost and PlayersServer are created with the event loop they're used in set as the current event loop.
+"""
+
+
+class AsyncPlayer(abc.ABC):
+    def __init__(self, player: AbstractPlayer, name: str = None):
+        """
+        :param player: the player that sits in the game's state. a new one for every game
+        :param name: the name of the player in the game's result. the class of player by default
+        """
+        self.player = player
+        self.name = name or type(player).__name__
+
+    @abc.abstractmethod
+    async def choose_move(self, game: int, state: CatanState) -> CatanMove:
+        """
+        :param game: the index of the game in its host
+        :param state: the state of the game, in self.player's turn. it mustn't be changed until the move is chosen
+        :return: CatanMove, the move to make
+        """
+        raise NotImplementedError()
+
+    async def notify_game_over(self, game: int, player_index: int, scores: List[int]):
+        """
+        called when the game ends
+        :param game: the index of the game in its host
+        :param player_index: the index of this player in the order of the turns
+        :param scores: the scores of the players, in the order of their turns
+        """
+        pass
+
+
+class InlinePlayer(AsyncPlayer):
+    async def choose_move(self, game: int, state: CatanState) -> CatanMove:
+        return self.player.choose_move(state)
+
+
+class ExecutorPlayer(AsyncPlayer):
+    def __init__(self, player: AbstractPlayer, executor: Executor = None, name: str = None):
+        """
+        :param player: the player that sits in the game's state
+        :param executor: the executor to choose the moves on. it has to share the memory of the state, so it's a
+        thread pool, not a process pool. the event loop's default executor if None
+        :param name: the name of the player in the game's result
+        """
+        super().__init__(player, name)
+        self._executor = executor
+
+    async def choose_move(self, game: int, state: CatanState) -> CatanMove:
+        return await asyncio.get_event_loop().run_in_executor(self._executor, self.player.choose_move, state)
+
+
+class SocketPlayer(AsyncPlayer):
+    def __init__(self, connection: '_BotConnection', seed: int = None):
+        """
+        a bot of a PlayersServer, seated in a game. see PlayersServer.get_player
+        """
+        super().__init__(RandomPlayer(seed), connection.name)
+        self.connection = connection
+
+    async def choose_move(self, game: int, state: CatanState) -> CatanMove:
+        moves = state.get_next_moves_sequence()
+        message = {'type': 'choose_move', 'game': game, 'player': state.players.index(self.player),
+                   'scores': [state.get_score_of_player(player) for player in state.players],
+                   'moves_count': len(moves)}
+        while self.connection.is_connected:
+            answer = await self.connection.ask(message)
+            if answer is None:
+                break
+            if isinstance(answer.get('describe'), list):
+                indices = [index for index in answer['describe'] if isinstance(index, int) and 0 <= index < len(moves)]
+                message = {'type': 'moves', 'moves': [[index, describe_move(moves[index])] for index in indices]}
+                continue
+            index = answer.get('move')
+            if isinstance(index, int) and 0 <= index < len(moves):
+                return moves[index]
+            logger.info('| bot {} answered with a move that doesn\'t exist: {}'.format(self.name, answer))
+            break
+        return self.player.choose_move(state)
+
+    async def notify_game_over(self, game: int, player_index: int, scores: List[int]):
+        if self.connection.is_connected:
+            await self.connection.send({'type': 'game_over', 'game': game, 'player': player_index, 'scores': scores})
+
+
+class _BotConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, name: str):
+        self.reader = reader
+        self.writer = writer
+        self.name = name
+        self.is_connected = True
+
+    async def send(self, message: Dict):
+        try:
+            self.writer.write(json.dumps(message).encode() + b'\n')
+            await self.writer.drain()
+        except (ConnectionError, OSError):
+            self.disconnect()
+
+    async def ask(self, message: Dict):
+        """
+        :return: Dict, the answer of the bot, or None if it disconnected (or didn't answer with a JSON object)
+        """
+        await self.send(message)
+        if not self.is_connected:
+            return None
+        try:
+            answer = json.loads((await self.reader.readline()).decode())
+        except (ValueError, ConnectionError, OSError):
+            answer = None
+        if not isinstance(answer, dict):
+            self.disconnect()
+            return None
+        return answer
+
+    def disconnect(self):
+        if self.is_connected:
+            logger.info('| bot {} disconnected'.format(self.name))
+            self.is_connected = False
+            self.writer.close()
+
+
+class PlayersServer:
+    def __init__(self):
+        """
+        accept bots (see run_bot), and seat them in games. see start
+        """
+        self.address = None
+        self._server = None
+        self._idle_connections = asyncio.Queue()
+
+    async def start(self, address: Address = ('127.0.0.1', 0)):
+        """
+        :param address: the address to listen on. with port 0, a free port is chosen (see self.address)
+        """
+        if isinstance(address, str):
+            self._server = await asyncio.start_unix_server(self._accept_bot, address)
+        else:
+            self._server = await asyncio.start_server(self._accept_bot, *address)
+        self.address = self._server.sockets[0].getsockname()
+
+    async def get_player(self, seed: int = None) -> SocketPlayer:
+        """
+        wait for an idle bot, and seat it in a game. release it when the game is over
+        :param seed: the seed of the RandomPlayer that sits for the bot in the game's state
+        :return: SocketPlayer, the bot, as a player of a single game
+        """
+        while True:
+            connection = await self._idle_connections.get()
+            if connection.is_connected:
+                return SocketPlayer(connection, seed)
+
+    def release(self, player: SocketPlayer):
+        """
+        make the bot of a player, whose game is over, idle again
+        """
+        if player.connection.is_connected:
+            self._idle_connections.put_nowait(player.connection)
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        while not self._idle_connections.empty():
+            self._idle_connections.get_nowait().disconnect()
+
+    async def _accept_bot(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            hello = json.loads((await reader.readline()).decode())
+            name = str(hello['name'])
+        except (ValueError, TypeError, KeyError, ConnectionError, OSError):
+            writer.close()
+            return
+        logger.info('| bot {} connected'.format(name))
+        self._idle_connections.put_nowait(_BotConnection(reader, writer, name))
+
+
+class GameHost:
+    def __init__(self, max_concurrent_games: int = None):
+        """
+        :param max_concurrent_games: the number of games played at a time. no limit if None
+        """
+        self._semaphore = asyncio.Semaphore(max_concurrent_games) if max_concurrent_games else None
+
+    async def play_game(self, game: int, players: Sequence[AsyncPlayer], seed: int = None) -> GameResult:
+        """
+        play a game to its end, yielding to the other games of the event loop after every turn
+        :param game: the index of the game, passed to the players
+        :param players: the players, in the order of their turns
+        :param seed: the seed of the game (the board and dice), or None
+        :return: GameResult, the result of the game. its lineup_index is the index of the game
+        """
+        if self._semaphore is not None:
+            async with self._semaphore:
+                return await self._play_game(game, players, seed)
+        return await self._play_game(game, players, seed)
+
+    async def play_games(self, lineups: Sequence[Sequence[AsyncPlayer]], seeds: Sequence[int] = None) \
+            -> List[GameResult]:
+        """
+        play a game of every lineup, concurrently
+        :param lineups: the players of every game. the players of a game can't play in other games
+        :param seeds: the seed of every game, or None
+        :return: List[GameResult], the results, in the order of the lineups
+        """
+        return list(await asyncio.gather(*[self.play_game(game, lineup, seeds[game] if seeds else None)
+                                           for game, lineup in enumerate(lineups)]))
+
+    async def _play_game(self, game: int, players: Sequence[AsyncPlayer], seed: int) -> GameResult:
+        start_time = time.time()
+        async_players = {player.player: player for player in players}
+        state = CatanState([player.player for player in players], seed)
+        turns_count = 0
+        while not state.is_final():
+            state.make_move(await async_players[state.get_current_player()].choose_move(game, state))
+            state.make_random_move()
+            turns_count += 1
+            await asyncio.sleep(0)
+        scores = [state.get_score_of_player(player.player) for player in players]
+        for i, player in enumerate(players):
+            await player.notify_game_over(game, i, scores)
+        return GameResult(game, game, seed, [player.name for player in players], scores,
+                          scores.index(max(scores)), turns_count, time.time() - start_time)
+
+
+def describe_move(move: CatanMove) -> Dict:
+    """
+    :return: Dict, a JSON-serializable description of the move, for bots
+    """
+    return {
+        'robber_placement_land': move.robber_placement_land.identifier,
+        'development_card_to_be_exposed': (move.development_card_to_be_exposed.name
+                                           if move.development_card_to_be_exposed is not None else None),
+        'monopoly_card': move.monopoly_card.name if move.monopoly_card is not None else None,
+        'resources_exchanges': [[exchange.source_resource.name, exchange.target_resource.name, exchange.count]
+                                for exchange in move.resources_exchanges],
+        'paths_to_be_paved': [list(path) for path in move.paths_to_be_paved],
+        'locations_to_be_set_to_settlements': list(move.locations_to_be_set_to_settlements),
+        'locations_to_be_set_to_cities': list(move.locations_to_be_set_to_cities),
+        'development_cards_to_be_purchased_count': move.development_cards_to_be_purchased_count
+    }
+
+
+async def run_bot(address: Address, name: str = 'RandomBot', answer: Callable[[Dict], Dict] = None,
+                  seed: int = None):
+    """
+    connect a bot to a PlayersServer, and play until the server closes the connection
+    :param address: the address of the server
+    :param name: the name of the bot
+    :param answer: given a 'choose_move' or 'moves' message, returns the answer of the bot (see the protocol in the
+    Structure above). chooses a move at random if None
+    :param seed: the seed of the random moves
+    """
+    random_state = np.random.RandomState(seed)
+    if answer is None:
+        def answer(message: Dict) -> Dict:
+            return {'move': int(random_state.randint(message['moves_count']))}
+
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+    try:
+        writer.write(json.dumps({'name': name}).encode() + b'\n')
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line.decode())
+            if message['type'] in ('choose_move', 'moves'):
+                writer.write(json.dumps(answer(message)).encode() + b'\n')
+                await writer.drain()
+    except (ConnectionError, OSError):
+        return
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    # python -m train_and_test.game_host HOST:PORT (or the path of a Unix socket) runs a bot that plays at random
+    host, _, port = sys.argv[1].rpartition(':')
+    asyncio.get_event_loop().run_until_complete(run_bot((host, int(port)) if port.isdigit() and host else sys.argv[1]))
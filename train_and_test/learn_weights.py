@@ -1,16 +1,28 @@
 import copy
 import multiprocessing
 import pickle
+import threading
 import time
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
 
 from algorithms.first_choice_hill_climbing import *
 from game.catan_state import CatanState
+from players.abstract_player import create_seeded_players
 from players.expectimax_baseline_player import ExpectimaxBaselinePlayer
 from players.expectimax_weighted_probabilities_player import ExpectimaxWeightedProbabilitiesPlayer
+from train_and_test.checkpoint import Checkpoint
+from train_and_test.distributed import Coordinator
 from train_and_test.logger import logger
+from train_and_test.sequential_testing import SequentialEvaluation, SequentialTester
 
 learned_weights_file_name = 'learned_weights'
+checkpoint_file_name = 'learn_weights_checkpoint'
+rounds_count = 5
+# the number of neighbors that are compared to the best weights at a time (see parallel_first_choice_hill_climbing)
+speculative_neighbors_count = 4
 
 
 class GameRunTask:
@@ -18,42 +30,90 @@ class GameRunTask:
 
 
 class WeightsSpace(AbstractHillClimbableSpace):
-    def __init__(self, pool):
-        self._pool = pool
+    def __init__(self, pool, checkpoint: Checkpoint = None, seed: int = None):
+        """
+        weights are evaluated with common random numbers: every evaluation plays the same games (the same boards,
+        dice and players' seeds), each of them twice, with the weighted player in either seat. so the evaluations of
+        two weights are compared game by game, and the luck of the games cancels out. the games are played in waves,
+        only until the comparison is decided (see train_and_test/sequential_testing.py)
+        :param pool: the pool of processes to play the games of the evaluations on
+        :param checkpoint: optional checkpoint to keep the evaluations of the current round of hill climbing in.
+        when resuming, the evaluations it has are replayed (in the order they were made) instead of playing their games,
+        so the hill climbing takes the same steps, up to where it stopped. the seeds of the games are kept in it too.
+        the evaluations are replayed by their weights, since neighbors are evaluated concurrently, in no fixed order
+        :param seed: the seed the seeds of the games are drawn with. drawn at random if None
+        """
         self._time_seconds = 1
         self.iterations_count = 0
         self._max_iterations = 20
-        self._games_per_iteration = 3
+        self._seeds_count = 8
         self.delta_unit = 3
-        self._epsilon_is_weighting_better = 50
-
-    def evaluate_state(self, weights) -> AbstractHillClimbingStateEvaluation:
-        logger.info('| evaluating weights: {}'.format(weights))
-        args = GameRunTask()
-        args.time_seconds_ = self._time_seconds
-        args.weights_ = weights
-        args.evaluation_ = 0
-        all_args = []
-
-        for i in range(self._games_per_iteration):
-            xx = copy.deepcopy(args)
-            xx.i_ = i
-            all_args.append(xx)
-
-        results = self._pool.map(WeightsSpace.run_game, all_args)
-
-        evaluation = sum(results)
-        self.iterations_count += 1
-
+        # a wave is 2 seeds, in both seats. a comparison finds new weights better by luck with probability 0.05
+        self.tester = SequentialTester(pool, 2 * self._seeds_count, 4, 0.05)
+        self._checkpoint = checkpoint
+        self._evaluations = [self._create_evaluation(weights, results) for weights, results in
+                             (checkpoint.get('evaluations', []) if checkpoint is not None else [])]
+        self._replayed_evaluations = list(self._evaluations)
+        self._lock = threading.Lock()
+        self.seeds = checkpoint.get('seeds') if checkpoint is not None else None
+        if self.seeds is None:
+            self.seeds = np.random.RandomState(seed).randint(1, 2 ** 30, size=self._seeds_count).tolist()
+            if checkpoint is not None:
+                checkpoint.save(seeds=self.seeds)
+
+    def start_round(self):
+        """
+        start a new round of hill climbing: reset the iterations, and forget the evaluations of the previous round
+        (the checkpoint's evaluations are reset by the caller, with the state of the rounds)
+        """
+        self.iterations_count = 0
+        with self._lock:
+            self._evaluations, self._replayed_evaluations = [], []
+
+    def evaluate_state(self, weights) -> SequentialEvaluation:
+        """
+        :return: SequentialEvaluation, the evaluation of the weights. its games are played when it's compared
+        """
+        with self._lock:
+            for evaluation in self._replayed_evaluations:
+                if evaluation.candidate == weights:
+                    self._replayed_evaluations.remove(evaluation)
+                    logger.info('| replayed evaluation of weights: {}'.format(evaluation))
+                    return evaluation
+
+            logger.info('| evaluating weights: {}'.format(weights))
+            evaluation = self._create_evaluation(copy.copy(weights))
+            self._evaluations.append(evaluation)
+        self._save_evaluations()
         return evaluation
 
+    def _create_evaluation(self, weights, results: List[float] = None) -> SequentialEvaluation:
+        def create_task(i: int) -> GameRunTask:
+            # the games are the seeds, in both seats, so every evaluation pairs up with the others game by game
+            args = GameRunTask()
+            args.time_seconds_ = self._time_seconds
+            args.weights_ = weights
+            args.evaluation_ = 0
+            args.i_ = i
+            args.seed_ = self.seeds[i // 2]
+            args.seat_ = i % 2
+            return args
+
+        return self.tester.create_evaluation(weights, WeightsSpace.run_game, create_task, results)
+
+    def _save_evaluations(self):
+        if self._checkpoint is not None:
+            with self._lock:
+                self._checkpoint.save(evaluations=[(evaluation.candidate, list(evaluation.results))
+                                                   for evaluation in self._evaluations])
+
     @staticmethod
     def run_game(args):
         logger.info('| process {} spawned'.format(args.i_))
-        seed = None
-        p0 = ExpectimaxWeightedProbabilitiesPlayer(seed, args.time_seconds_, args.weights_)
-        p1 = ExpectimaxBaselinePlayer(seed, args.time_seconds_)
-        state = CatanState([p0, p1], seed)
+        p0, p1 = create_seeded_players([
+            lambda seed: ExpectimaxWeightedProbabilitiesPlayer(seed, args.time_seconds_, args.weights_),
+            lambda seed: ExpectimaxBaselinePlayer(seed, args.time_seconds_)], args.seed_)
+        state = CatanState([p0, p1] if args.seat_ == 0 else [p1, p0], args.seed_)
         count_moves = 0
         while not state.is_final():
             state.make_move(state.get_current_player().choose_move(state))
@@ -83,13 +143,16 @@ class WeightsSpace(AbstractHillClimbableSpace):
             yield next_weights
             next_weights[key] -= weight_modification
 
-    def is_better(self, first_score: int, second_score: int) -> bool:
-        is_better = first_score > second_score + self._epsilon_is_weighting_better
-        logger.info('| is weight better: {} > {} + {} --> {}'
-                    .format(first_score, second_score, self._epsilon_is_weighting_better, is_better))
+    def is_better(self, first: SequentialEvaluation, second: SequentialEvaluation) -> bool:
+        is_better = self.tester.is_better(first, second)
+        # the games played for the comparison are kept, so a resumed run doesn't play them again
+        self._save_evaluations()
         return is_better
 
     def enough_iterations(self) -> bool:
+        # called once per neighbor the hill climbing took, so neighbors that were evaluated speculatively
+        # (and ignored) aren't counted
+        self.iterations_count += 1
         return self.iterations_count >= self._max_iterations
 
 
@@ -103,20 +166,42 @@ def load_weights(file_name) -> Dict[Any, float]:
     return pickle.load(f)
 
 
-def main():
-    pool = multiprocessing.Pool(processes=(multiprocessing.cpu_count()))
-    space = WeightsSpace(pool)
-    previous_result, result = (ExpectimaxWeightedProbabilitiesPlayer.default_weights,
-                               ExpectimaxWeightedProbabilitiesPlayer.default_weights)
-    for _ in range(5):
-        space.iterations_count = 0
-        result = first_choice_hill_climbing(space, result)
+def main(coordinator_address=None):
+    """
+    learn the weights by rounds of hill climbing, each with half the delta of the previous one.
+    the progress is kept in a checkpoint: the state after every round (the number of rounds done, the delta and the
+    weights), and the evaluations of the current round (see WeightsSpace), so a restarted run continues from where
+    it stopped. the checkpoint is removed when the weights are learned
+    :param coordinator_address: if given, the games are played by the workers of a Coordinator that listens on this
+    address (see train_and_test/distributed.py), instead of a pool of processes of this host
+    """
+    checkpoint = Checkpoint(checkpoint_file_name)
+    if coordinator_address is not None:
+        pool = Coordinator(coordinator_address)
+    else:
+        pool = multiprocessing.Pool(processes=(multiprocessing.cpu_count()))
+    space = WeightsSpace(pool, checkpoint)
+    executor = ThreadPoolExecutor(speculative_neighbors_count)
+    rounds_done, space.delta_unit, previous_result, result = checkpoint.get('rounds', (
+        0, space.delta_unit, ExpectimaxWeightedProbabilitiesPlayer.default_weights,
+        ExpectimaxWeightedProbabilitiesPlayer.default_weights))
+    if rounds_done > 0:
+        logger.info('| resuming after {} rounds, from weights: {}'.format(rounds_done, result))
+
+    while rounds_done < rounds_count:
+        result = parallel_first_choice_hill_climbing(space, result, executor, speculative_neighbors_count)
+        rounds_done += 1
         if result == previous_result:
             break
         previous_result = result
         space.delta_unit /= 2
         dump_weights(result)
-    logger.info('| learned weights: {}'.format(result))
+        space.start_round()
+        checkpoint.save(rounds=(rounds_done, space.delta_unit, previous_result, result), evaluations=[])
+    logger.info('| learned weights: {}. {} games played, {} saved by stopping comparisons early'
+                .format(result, space.tester.games_count, space.tester.games_saved))
+    executor.shutdown()
+    checkpoint.remove()
 
 
 if __name__ == '__main__':
@@ -4,21 +4,9 @@ import time
 from game.catan_state import CatanState
 from players.expectimax_baseline_player import ExpectimaxBaselinePlayer
 from players.monte_carlo_with_filter_player import MonteCarloWithFilterPlayer
+from train_and_test.distributed import Coordinator
 from train_and_test.logger import logger, fileLogger
-
-A, B, C, D, E, F, G = [], [], [], [], [], [], []
-excel_file_name = 'NAME_NOT_SET_{}.xlsx'.format(time.time())
-
-
-def excel_data_grabber(a, b, c, d, e, f, g):
-    global A, B, C, D, E, F, G
-    A.append(a)
-    B.append(b)
-    C.append(c)
-    D.append(d)
-    E.append(e)
-    F.append(f)
-    G.append(g)
+from train_and_test.tournament import PlayerSpec, run_tournament
 
 
 def scores_changed(state, previous_scores, scores):
@@ -35,6 +23,12 @@ def clean_previous_images():
 
 
 def execute_game(plot_map=True):
+    """
+    play a game, and return its results row. the row is returned (rather than kept in module globals),
+    so it reaches the parent process when the game is played by a worker of a pool
+    :param plot_map: if True, the map is plotted after every turn
+    :return: Dict, the scores, turns count and players types of the game, by the excel columns
+    """
     seed = None
     timeout_seconds = 5
     p0 = MonteCarloWithFilterPlayer(seed, timeout_seconds)
@@ -83,26 +77,23 @@ def execute_game(plot_map=True):
                                      for name, score in players_scores_by_names.items()) +
                     '\n turns it took: {}\n'.format(turn_count) + ('-' * 156))
 
-    p0_type = type(p0).__name__
-    p_others_type = type(p1).__name__
-    global excel_file_name
-    excel_file_name = '{}_vs_{}_timeout_{}_seed_{}.xlsx'.format(p0_type, p_others_type, timeout_seconds, seed,
-                                                                int(time.time()))
-    excel_data_grabber(score_by_player[p0], score_by_player[p1], score_by_player[p2], score_by_player[p3], turn_count,
-                       p0_type, p_others_type)
+    return {"p0_score": score_by_player[p0], "p1_score": score_by_player[p1], "p2_score": score_by_player[p2],
+            "p3_score": score_by_player[p3], "turn_count": turn_count, "p0_type": type(p0).__name__,
+            "p1_2_3_type": type(p1).__name__, "timeout_seconds": timeout_seconds, "seed": seed}
 
 
-def flush_to_excel():
-    global A, B, C, D, E, F, G, excel_file_name
+def flush_to_excel(rows):
     import pandas as pd
-    df = pd.DataFrame({"p0_score": A, "p1_score": B, "p2_score": C,
-                       "p3_score": D, "turn_count": E, "p0_type": F, "p1_2_3_type": G})
+    df = pd.DataFrame(rows, columns=["p0_score", "p1_score", "p2_score", "p3_score", "turn_count", "p0_type",
+                                     "p1_2_3_type"])
+    excel_file_name = '{}_vs_{}_timeout_{}_seed_{}_{}.xlsx'.format(
+        rows[0]["p0_type"], rows[0]["p1_2_3_type"], rows[0]["timeout_seconds"], rows[0]["seed"], int(time.time()))
     writer = pd.ExcelWriter(excel_file_name, engine='xlsxwriter')
     df.to_excel(writer, sheet_name='results')
+    writer.save()
 
 
 def run_10_games_parallel():
-    global A, B, C, D, E, F, G
     import multiprocessing
 
     try:
@@ -111,12 +102,29 @@ def run_10_games_parallel():
         cpus = 2  # arbitrary default
 
     pool = multiprocessing.Pool(processes=cpus)
-    pool.map(execute_game, [False] * 10)
+    rows = pool.map(execute_game, [False] * 10)
 
     # for _ in range(10):
     #     clean_previous_images()
     #     execute_game(None)
-    flush_to_excel()
+    flush_to_excel(rows)
+
+
+def run_tournament_parallel(games_count=10, seeds=None, results_file_name='tournament.csv', coordinator_address=None):
+    """
+    play a tournament of the players of execute_game. the games already in the results file are skipped,
+    so running it again after it was stopped continues the tournament (see train_and_test/tournament.py)
+    :param coordinator_address: if given, the games are played by the workers of a Coordinator that listens on this
+    address (see train_and_test/distributed.py), instead of a pool of processes of this host
+    """
+    timeout_seconds = 5
+    lineup = [PlayerSpec(MonteCarloWithFilterPlayer, {'timeout_seconds': timeout_seconds})] + \
+        [PlayerSpec(ExpectimaxBaselinePlayer, {'timeout_seconds': timeout_seconds})] * 3
+    if coordinator_address is None:
+        run_tournament([lineup], games_count, results_file_name, seeds)
+        return
+    with Coordinator(coordinator_address) as coordinator:
+        run_tournament([lineup], games_count, results_file_name, seeds, pool=coordinator)
 
 
 def run_single_game_and_plot_map():
@@ -0,0 +1,201 @@
+import math
+import threading
+from typing import Any, Callable, List
+
+import numpy as np
+
+from train_and_test.logger import logger
+
+"""
+Structure
+---------
+Candidates (e.g. weights, or branching factors) are compared by paired games: game i of every candidate is played
+with the same seeds (common random numbers), so the difference of the results of game i measures the candidates,
+and not the luck of the game.
+A SequentialEvaluation holds the results of a candidate's games, that are played only when a comparison needs them.
+SequentialTester.is_better plays the games of two evaluations in waves (the games of a wave of both evaluations are
+played on the pool together), and stops as soon as one of them is clearly better: when the mean of the differences
+is more than a critical value of standard errors above 0, or below it. if neither is after max_games_count games, the
+first isn't better.
+The results are looked at after every wave, up to ceil(max_games_count / wave_size) times, and every look is a chance
+to stop on luck. so alpha (the probability of finding the first better when it isn't) is spent evenly over the looks
+(Bonferroni): the critical value of a look is the quantile of the Student's t-distribution with games_count - 1
+degrees of freedom (the standard deviation of the differences is estimated from few games) for alpha / looks.
+Games an evaluation already played (in an earlier comparison, e.g. of the incumbent) aren't played again, so the games
+of an evaluation are played once, however many times it's compared.
+Comparisons can run concurrently, on threads (e.g. of neighbors to the same incumbent, see
+parallel_first_choice_hill_climbing): a game is played by the first comparison that needs it, and the others wait for
+its result.
+The tester counts the games it played, and the games it saved, compared to playing max_games_count games of every
+evaluation.
+"""
+
+
+class SequentialEvaluation:
+    def __init__(self, candidate: Any, function: Callable[[Any], float], create_task: Callable[[int], Any],
+                 results: List[float] = None):
+        """
+        :param candidate: the evaluated candidate (for logs, and to keep its results in checkpoints)
+        :param function: plays a game: given its task, returns its result (higher is better).
+        module-level, so a pool can run it
+        :param create_task: given the index of a game, returns its task. games of the same index of different
+        evaluations have to be played with the same seeds
+        :param results: the results of the first games, if they were already played (e.g. kept in a checkpoint)
+        """
+        self.candidate = candidate
+        self.function = function
+        self.create_task = create_task
+        self.results = list(results or [])
+        # the number of games that were played, or are being played. results of games that are done before
+        # the games before them (of another comparison) wait for them here, by their indices
+        self._started_count = len(self.results)
+        self._pending_results = {}
+
+    @property
+    def mean(self) -> float:
+        return float(np.mean(self.results)) if self.results else 0.0
+
+    def __repr__(self):
+        return '{} (mean {} of {} games)'.format(self.candidate, self.mean, len(self.results))
+
+
+class SequentialTester:
+    def __init__(self, pool, max_games_count: int, wave_size: int, alpha: float = 0.05):
+        """
+        :param pool: the pool to play the games on (multiprocessing.Pool, or a distributed.Coordinator)
+        :param max_games_count: the number of games of each evaluation after which a comparison stops
+        :param wave_size: the number of games of each evaluation played at a time. at least 2
+        :param alpha: the probability that a comparison finds the first evaluation better, when it isn't
+        """
+        assert 2 <= wave_size <= max_games_count and 0 < alpha < 1
+        self._pool = pool
+        self.max_games_count = max_games_count
+        self._wave_size = wave_size
+        self._look_alpha = alpha / math.ceil(max_games_count / wave_size)
+        self._critical_values = {}
+        self.games_count = 0
+        self._evaluations_count = 0
+        self._known_games_count = 0
+        self._condition = threading.Condition()
+        self._is_failed = False
+
+    @property
+    def games_saved(self) -> int:
+        """
+        :return: int, the number of games that weren't played, out of max_games_count games of every evaluation
+        """
+        return self._evaluations_count * self.max_games_count - self._known_games_count - self.games_count
+
+    def create_evaluation(self, candidate: Any, function: Callable[[Any], float], create_task: Callable[[int], Any],
+                          results: List[float] = None) -> SequentialEvaluation:
+        """
+        create an evaluation of a candidate. no games are played until it's compared (see SequentialEvaluation)
+        """
+        with self._condition:
+            self._evaluations_count += 1
+            self._known_games_count += len(results or [])
+        return SequentialEvaluation(candidate, function, create_task, results)
+
+    def is_better(self, first: SequentialEvaluation, second: SequentialEvaluation) -> bool:
+        """
+        play paired games of the evaluations, until the first is clearly better or worse than the second
+        :return: True if the first is clearly better, False if it's clearly worse or neither is
+        """
+        while True:
+            games_count = min(len(first.results), len(second.results))
+            if games_count >= self._wave_size:
+                differences = np.subtract(first.results[:games_count], second.results[:games_count])
+                bound = self._get_critical_value(games_count) * differences.std(ddof=1) / np.sqrt(games_count)
+                if abs(differences.mean()) > bound:
+                    is_better = bool(differences.mean() > bound)
+                    break
+            if games_count >= self.max_games_count:
+                is_better = False
+                break
+            self._play([first] if first is second else [first, second],
+                       min(games_count + self._wave_size, self.max_games_count))
+        logger.info('| is {} better than {}: {} after {} games. {} games played, {} saved'
+                    .format(first, second, is_better, games_count, self.games_count, self.games_saved))
+        return is_better
+
+    def _get_critical_value(self, games_count: int) -> float:
+        """
+        :return: float, the number of standard errors the mean of the differences of games_count games has to be away
+        from 0, at a look
+        """
+        if games_count not in self._critical_values:
+            self._critical_values[games_count] = get_t_critical_value(self._look_alpha, games_count - 1)
+        return self._critical_values[games_count]
+
+    def _play(self, evaluations: List[SequentialEvaluation], games_count: int):
+        """
+        play the games of the evaluations, up to games_count games of each. the games of all the evaluations are
+        played together, a map of the pool per function. games that another comparison started are waited for
+        """
+        with self._condition:
+            games = [(evaluation, i) for evaluation in evaluations
+                     for i in range(evaluation._started_count, games_count)]
+            for evaluation in evaluations:
+                evaluation._started_count = max(evaluation._started_count, games_count)
+            self.games_count += len(games)
+        try:
+            for function in {evaluation.function for evaluation, _ in games}:
+                function_games = [(evaluation, i) for evaluation, i in games if evaluation.function is function]
+                results = self._pool.map(function, [evaluation.create_task(i) for evaluation, i in function_games])
+                with self._condition:
+                    for (evaluation, i), result in zip(function_games, results):
+                        evaluation._pending_results[i] = result
+                        while len(evaluation.results) in evaluation._pending_results:
+                            evaluation.results.append(evaluation._pending_results.pop(len(evaluation.results)))
+                    self._condition.notify_all()
+        except BaseException:
+            with self._condition:
+                self._is_failed = True
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            self._condition.wait_for(lambda: self._is_failed or
+                                     all(len(evaluation.results) >= games_count for evaluation in evaluations))
+            if self._is_failed:
+                raise RuntimeError('the games of a concurrent comparison failed')
+
+
+def get_t_tail_probability(t: float, degrees_of_freedom: int) -> float:
+    """
+    :return: float, P(T > t) for T of the Student's t-distribution with given (integral) degrees of freedom.
+    exact, by the finite series of Abramowitz & Stegun 26.7.3 and 26.7.4
+    """
+    theta = math.atan(abs(t) / math.sqrt(degrees_of_freedom))
+    cos_squared = math.cos(theta) ** 2
+    if degrees_of_freedom % 2 == 1:
+        term, series = math.cos(theta), 0.0
+        for k in range(1, (degrees_of_freedom - 1) // 2 + 1):
+            series += term
+            term *= cos_squared * 2 * k / (2 * k + 1)
+        central = 2 / math.pi * (theta + math.sin(theta) * series)
+    else:
+        term, series = 1.0, 0.0
+        for k in range(1, degrees_of_freedom // 2 + 1):
+            series += term
+            term *= cos_squared * (2 * k - 1) / (2 * k)
+        central = math.sin(theta) * series
+    tail = (1 - central) / 2
+    return tail if t >= 0 else 1 - tail
+
+
+def get_t_critical_value(alpha: float, degrees_of_freedom: int) -> float:
+    """
+    :return: float, the t for which P(T > t) is alpha, for the Student's t-distribution with given (integral)
+    degrees of freedom. found by bisection
+    """
+    assert 0 < alpha < 0.5 and degrees_of_freedom >= 1
+    low, high = 0.0, 1.0
+    while get_t_tail_probability(high, degrees_of_freedom) > alpha:
+        low, high = high, high * 2
+    for _ in range(64):
+        middle = (low + high) / 2
+        if get_t_tail_probability(middle, degrees_of_freedom) > alpha:
+            low = middle
+        else:
+            high = middle
+    return high
@@ -0,0 +1,66 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from train_and_test.checkpoint import Checkpoint
+from train_and_test.learn_weights import WeightsSpace
+from train_and_test.train_monte_carlo import golden_section_search
+
+
+class TestCheckpoint(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'checkpoint')
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_save_and_load(self):
+        checkpoint = Checkpoint(self.file_name)
+        self.assertNotIn('bounds', checkpoint)
+        checkpoint.save(bounds=(1, 2), averages={1: 0.5})
+        checkpoint.save(bounds=(1, 1.5))
+        loaded = Checkpoint(self.file_name)
+        self.assertEqual(loaded.get('bounds'), (1, 1.5))
+        self.assertEqual(loaded.get('averages'), {1: 0.5})
+        self.assertListEqual(os.listdir(self.directory.name), ['checkpoint'])
+        loaded.remove()
+        self.assertFalse(os.path.exists(self.file_name))
+        self.assertIsNone(Checkpoint(self.file_name).get('bounds'))
+
+    def test_golden_section_search_resumes_from_bounds(self):
+        evaluated = []
+
+        def f(x):
+            evaluated.append(x)
+            return (x - 30) ** 2
+
+        self.assertAlmostEqual(golden_section_search(f, 1, 100, tol=1), 30, delta=1)
+        fresh_evaluations_count = len(evaluated)
+
+        # a run that was stopped with the bounds [20, 40] continues from them
+        evaluated.clear()
+        checkpoint = Checkpoint(self.file_name)
+        checkpoint.save(bounds=(20, 40))
+        self.assertAlmostEqual(golden_section_search(f, 1, 100, tol=1, search_checkpoint=checkpoint), 30, delta=1)
+        self.assertTrue(all(20 <= x <= 40 for x in evaluated))
+        self.assertLess(len(evaluated), fresh_evaluations_count)
+        a, b = Checkpoint(self.file_name).get('bounds')
+        self.assertLess(b - a, 40 - 20)
+
+    def test_weights_space_replays_evaluations(self):
+        weights = {'a': 1.0, 'b': 2.0}
+        checkpoint = Checkpoint(self.file_name)
+        checkpoint.save(evaluations=[(dict(weights), [7, 8, 7, 8]), ({'a': 2.0, 'b': 2.0}, [1, 2, 1, 2])])
+        # no pool: the replayed evaluations, and their comparison, play no games. they're replayed by their weights
+        space = WeightsSpace(None, Checkpoint(self.file_name))
+        second = space.evaluate_state({'a': 2.0, 'b': 2.0})
+        first = space.evaluate_state(weights)
+        self.assertListEqual(first.results, [7, 8, 7, 8])
+        self.assertTrue(space.is_better(first, second))
+        self.assertFalse(space.enough_iterations())
+        self.assertEqual(space.iterations_count, 1)
+        space.start_round()
+        self.assertEqual(space.iterations_count, 0)
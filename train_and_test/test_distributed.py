@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from players.random_player import RandomPlayer
+from train_and_test.distributed import Coordinator, start_local_workers
+from train_and_test.tournament import PlayerSpec, run_tournament
+
+# the number of seconds to wait for a result, so a lost worker fails a test instead of hanging it
+timeout = 60
+
+
+def square(x):
+    return x * x
+
+
+def fail(x):
+    raise ValueError('failed on {}'.format(x))
+
+
+def fail_first_and_sleep(x):
+    if x == 0:
+        raise ValueError('failed on 0')
+    time.sleep(0.5)
+    return x
+
+
+def exit_on_first_attempt(marker_file_name):
+    # the first worker to run the task is lost (the process exits without answering)
+    if not os.path.exists(marker_file_name):
+        open(marker_file_name, 'w').close()
+        os._exit(1)
+    return 'done'
+
+
+class TestDistributed(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_map_over_tcp_and_unix_sockets(self):
+        for address in [('127.0.0.1', 0), os.path.join(self.directory.name, 'coordinator.socket')]:
+            with Coordinator(address) as coordinator:
+                workers = start_local_workers(coordinator.address, 3)
+                self.assertListEqual(coordinator.map(square, range(20), timeout), [x * x for x in range(20)])
+                self.assertListEqual(sorted(coordinator.imap_unordered(square, range(5), timeout)), [0, 1, 4, 9, 16])
+                with self.assertRaises(RuntimeError):
+                    coordinator.map(fail, [1], timeout)
+            for worker in workers:
+                worker.join(timeout=10)
+                self.assertFalse(worker.is_alive())
+
+    def test_task_is_retried_when_worker_is_lost(self):
+        marker_file_name = os.path.join(self.directory.name, 'marker')
+        with Coordinator(('127.0.0.1', 0)) as coordinator:
+            start_local_workers(coordinator.address, 2)
+            self.assertListEqual(coordinator.map(exit_on_first_attempt, [marker_file_name], timeout), ['done'])
+
+    def test_task_fails_after_max_attempts(self):
+        with Coordinator(('127.0.0.1', 0), max_attempts=1) as coordinator:
+            start_local_workers(coordinator.address, 1)
+            with self.assertRaises(RuntimeError):
+                coordinator.map(exit_on_first_attempt, [os.path.join(self.directory.name, 'marker')], timeout)
+
+    def test_failed_tasks_dont_stall_the_coordinator(self):
+        with Coordinator(('127.0.0.1', 0)) as coordinator:
+            start_local_workers(coordinator.address, 1)
+            # a task that can't be pickled fails its map, and the worker serves the next one
+            with self.assertRaises(RuntimeError):
+                coordinator.map(lambda x: x, [1], timeout)
+            self.assertListEqual(coordinator.map(square, [1, 2], timeout), [1, 4])
+
+            # the queued tasks of a failed map, and of an abandoned imap_unordered, are dropped
+            with self.assertRaises(RuntimeError):
+                coordinator.map(fail_first_and_sleep, range(10), timeout)
+            results = coordinator.imap_unordered(fail_first_and_sleep, range(1, 10), timeout)
+            self.assertEqual(next(results), 1)
+            results.close()
+            start_time = time.time()
+            self.assertListEqual(coordinator.map(square, [3], timeout), [9])
+            self.assertLess(time.time() - start_time, 2)
+            self.assertEqual(coordinator.workers_count, 1)
+
+    def test_map_times_out_without_workers(self):
+        with Coordinator(('127.0.0.1', 0)) as coordinator:
+            with self.assertRaises(TimeoutError):
+                coordinator.map(square, [1], 0.1)
+
+    def test_run_tournament_on_workers(self):
+        file_name = os.path.join(self.directory.name, 'results.jsonl')
+        with Coordinator(('127.0.0.1', 0)) as coordinator:
+            start_local_workers(coordinator.address, 2)
+            summary = run_tournament([[PlayerSpec(RandomPlayer)] * 2], 3, file_name, seeds=[1, 2, 3],
+                                     pool=coordinator)
+        self.assertEqual(summary.games_count, 3)
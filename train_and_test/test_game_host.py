@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+from players.abstract_player import create_seeded_players
+from players.random_player import RandomPlayer
+from train_and_test.game_host import GameHost, InlinePlayer, ExecutorPlayer, PlayersServer, run_bot
+from train_and_test.tournament import GameTask, PlayerSpec, play_game
+
+
+class TestGameHost(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.loop.close()
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_concurrent_games_are_played_as_alone(self):
+        # a seeded game of random players, played concurrently with other games, is played as by tournament.play_game
+        seeds = [1, 2, 3, 4, 5, 6]
+        expected = [play_game(GameTask(0, 0, [PlayerSpec(RandomPlayer)] * 3, seed)) for seed in seeds]
+
+        lineups = []
+        for seed in seeds:
+            players = create_seeded_players([RandomPlayer] * 3, seed)
+            lineups.append([InlinePlayer(players[0]), ExecutorPlayer(players[1]), InlinePlayer(players[2])])
+        host = GameHost(max_concurrent_games=4)
+        results = self.loop.run_until_complete(host.play_games(lineups, seeds))
+
+        for game, (result, expected_result) in enumerate(zip(results, expected)):
+            self.assertEqual(result.game, game)
+            self.assertListEqual(result.scores, expected_result.scores)
+            self.assertEqual(result.turns_count, expected_result.turns_count)
+            self.assertListEqual(result.players, ['RandomPlayer'] * 3)
+
+    def test_heavy_player_doesnt_block_other_games(self):
+        release = threading.Event()
+
+        class SlowPlayer(RandomPlayer):
+            def choose_move(self, state):
+                release.wait(30)
+                return super().choose_move(state)
+
+        async def play():
+            host = GameHost()
+            heavy_game = asyncio.ensure_future(host.play_game(0, [ExecutorPlayer(SlowPlayer(1)),
+                                                                  InlinePlayer(RandomPlayer(2))], 1))
+            light_results = await host.play_games([[InlinePlayer(RandomPlayer(3)), InlinePlayer(RandomPlayer(4))]
+                                                   for _ in range(3)], [2, 3, 4])
+            self.assertFalse(heavy_game.done())
+            release.set()
+            return light_results, await heavy_game
+
+        light_results, heavy_result = self.loop.run_until_complete(play())
+        self.assertTrue(all(max(result.scores) >= 10 for result in light_results))
+        self.assertGreaterEqual(max(heavy_result.scores), 10)
+
+    def test_bots_over_sockets(self):
+        messages = []
+
+        def answer(message):
+            messages.append(message)
+            if message['type'] == 'choose_move' and len(messages) == 1:
+                return {'describe': [0, message['moves_count']]}
+            if message['type'] == 'choose_move' and len(messages) == 3:
+                return {'move': -1}
+            return {'move': 0}
+
+        async def play(address):
+            server = PlayersServer()
+            await server.start(address)
+            bots = [asyncio.ensure_future(run_bot(server.address, 'DescribingBot', answer)),
+                    asyncio.ensure_future(run_bot(server.address, seed=1))]
+            results = []
+            for seed in [1, 2]:
+                players = [await server.get_player(10), await server.get_player(20)]
+                players.sort(key=lambda player: player.name)
+                results.append(await GameHost().play_game(seed, players + [InlinePlayer(RandomPlayer(3))], seed))
+                for player in players:
+                    server.release(player)
+            await server.close()
+            await asyncio.gather(*bots)
+            return results
+
+        for address in [('127.0.0.1', 0), os.path.join(self.directory.name, 'players.socket')]:
+            del messages[:]
+            results = self.loop.run_until_complete(play(address))
+            self.assertListEqual([result.players for result in results],
+                                 [['DescribingBot', 'RandomBot', 'RandomPlayer']] * 2)
+            self.assertTrue(all(max(result.scores) >= 10 for result in results))
+
+            moves = messages[1]
+            self.assertEqual(moves['type'], 'moves')
+            # only the moves that exist are described
+            self.assertListEqual([index for index, _ in moves['moves']], [0])
+            self.assertIn('locations_to_be_set_to_settlements', moves['moves'][0][1])
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from algorithms.first_choice_hill_climbing import first_choice_hill_climbing, parallel_first_choice_hill_climbing
+from train_and_test.learn_weights import WeightsSpace
+
+
+class FakePool:
+    """
+    plays no games: the result of a game is its luck (by its seed and seat) plus the skill of the weights
+    """
+
+    def __init__(self):
+        self.games = []
+
+    def map(self, function, tasks):
+        tasks = list(tasks)
+        self.games.extend((task.weights_['skill'], task.seed_, task.seat_) for task in tasks)
+        return [task.seed_ % 1000 * (1 if task.seat_ == 0 else -1) + task.weights_['skill'] -
+                (task.weights_.get('other', 0) - 2) ** 2 for task in tasks]
+
+
+class TestLearnWeights(TestCase):
+    def test_evaluations_play_the_same_games(self):
+        pool = FakePool()
+        space = WeightsSpace(pool, seed=1)
+        self.assertTrue(space.is_better(space.evaluate_state({'skill': 1}), space.evaluate_state({'skill': 0})))
+        games = [(seed, seat) for seed in space.seeds[:2] for seat in range(2)]
+        self.assertListEqual(pool.games, [(1,) + game for game in games] + [(0,) + game for game in games])
+        self.assertListEqual(WeightsSpace(pool, seed=1).seeds, space.seeds)
+
+    def test_is_better_by_paired_differences(self):
+        space = WeightsSpace(FakePool(), seed=1)
+        worse, better = space.evaluate_state({'skill': 0}), space.evaluate_state({'skill': 1})
+        # the luck of the games is much larger than the difference in skill, but it's the same luck
+        self.assertTrue(space.is_better(better, worse))
+        self.assertFalse(space.is_better(worse, better))
+        self.assertFalse(space.is_better(worse, worse))
+        # no difference is never clear, so the evaluation compared to itself played all its games
+        self.assertEqual(space.tester.games_count, 16 + 4)
+
+    def test_parallel_hill_climbing_takes_the_sequential_steps(self):
+        weights = {'skill': 0.0, 'other': 0.0}
+        sequential_space, parallel_space = WeightsSpace(FakePool(), seed=1), WeightsSpace(FakePool(), seed=1)
+        with ThreadPoolExecutor(4) as executor:
+            parallel_result = parallel_first_choice_hill_climbing(parallel_space, weights, executor, 4)
+        self.assertDictEqual(parallel_result, first_choice_hill_climbing(sequential_space, weights))
+        self.assertEqual(parallel_space.iterations_count, sequential_space.iterations_count)
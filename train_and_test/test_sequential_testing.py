@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from train_and_test.sequential_testing import SequentialTester, get_t_critical_value
+
+
+def play_game(task):
+    # the luck of game i is the same for every candidate, and much larger than the differences in skill
+    skill, noise, i = task
+    return (i * 7919 % 1000) + skill + noise * (1 if i % 2 == 0 else -1)
+
+
+class FakePool:
+    def __init__(self):
+        self.maps = []
+
+    def map(self, function, tasks):
+        tasks = list(tasks)
+        self.maps.append(tasks)
+        return [function(task) for task in tasks]
+
+
+class TestSequentialTesting(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = FakePool()
+        self.tester = SequentialTester(self.pool, 16, 4)
+
+    def create_evaluation(self, skill, noise=0):
+        return self.tester.create_evaluation(skill, play_game, lambda i: (skill, noise, i))
+
+    def test_clear_difference_stops_after_a_wave(self):
+        worse, better = self.create_evaluation(0), self.create_evaluation(1)
+        self.assertTrue(self.tester.is_better(better, worse))
+        # the games of both were played together, with the same seeds
+        self.assertListEqual(self.pool.maps, [[(1, 0, i) for i in range(4)] + [(0, 0, i) for i in range(4)]])
+        self.assertEqual(self.tester.games_count, 8)
+        self.assertEqual(self.tester.games_saved, 2 * 16 - 8)
+
+        # the played games are reused: a new candidate plays only its own games
+        self.assertFalse(self.tester.is_better(self.create_evaluation(-1), better))
+        self.assertEqual(self.tester.games_count, 12)
+        self.assertEqual(self.tester.games_saved, 3 * 16 - 12)
+
+    def test_unclear_difference_plays_the_maximum(self):
+        noisy = self.create_evaluation(1, noise=20)
+        self.assertFalse(self.tester.is_better(noisy, self.create_evaluation(0)))
+        self.assertEqual(len(self.pool.maps), 4)
+        self.assertEqual(self.tester.games_count, 2 * 16)
+        self.assertEqual(self.tester.games_saved, 0)
+
+    def test_known_results(self):
+        first = self.tester.create_evaluation(1, play_game, lambda i: (1, 0, i), results=[play_game((1, 0, i))
+                                                                                          for i in range(4)])
+        self.assertTrue(self.tester.is_better(first, self.create_evaluation(0)))
+        self.assertEqual(self.tester.games_count, 4)
+        self.assertEqual(self.tester.games_saved, 2 * 16 - 4 - 4)
+        self.assertFalse(self.tester.is_better(first, first))
+
+    def test_t_critical_values(self):
+        # the quantiles of Student's t-distribution tables
+        for alpha, degrees_of_freedom, critical_value in [(0.05, 1, 6.314), (0.05, 2, 2.920), (0.05, 3, 2.353),
+                                                          (0.025, 10, 2.228), (0.005, 15, 2.947), (0.05, 1000, 1.646)]:
+            self.assertAlmostEqual(get_t_critical_value(alpha, degrees_of_freedom), critical_value, places=3)
+
+    def test_early_looks_need_more_standard_errors(self):
+        # the mean of the differences is 3.5 standard errors above 0 after the first wave, which is clear in a single
+        # test, but not with 3 degrees of freedom at the first of 4 looks. it's clear after the second wave
+        tester = SequentialTester(self.pool, 16, 4)
+        first = tester.create_evaluation(1, play_game, lambda i: (1, 0, i),
+                                         results=[1 + play_game((0, 0, i)) + [0, 2, 0, 2][i] for i in range(4)])
+        second = tester.create_evaluation(0, play_game, lambda i: (0, 0, i), results=[play_game((0, 0, i))
+                                                                                      for i in range(4)])
+        self.assertGreater(tester._get_critical_value(4), 3)
+        self.assertTrue(tester.is_better(first, second))
+        self.assertEqual(tester.games_count, 2 * 4)
@@ -0,0 +1,68 @@
+import csv
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from players.random_player import RandomPlayer
+from train_and_test.tournament import PlayerSpec, GameTask, play_game, create_game_tasks, run_tournament
+
+
+class TestTournament(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.lineups = [[PlayerSpec(RandomPlayer)] * 2, [PlayerSpec(RandomPlayer)] * 3]
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_play_game_is_reproducible(self):
+        task = GameTask(0, 0, self.lineups[1], 3)
+        result = play_game(task)
+        self.assertEqual(result.players, ['RandomPlayer'] * 3)
+        self.assertGreaterEqual(result.scores[result.winner], 10)
+        self.assertEqual(play_game(task)[:-1], result[:-1])
+
+    def test_create_game_tasks(self):
+        tasks = list(create_game_tasks(self.lineups, 3, seeds=[5, 6]))
+        self.assertListEqual([task.game for task in tasks], list(range(6)))
+        self.assertListEqual([(task.lineup_index, task.seed) for task in tasks],
+                             [(0, 5), (1, 5), (0, 6), (1, 6), (0, 5), (1, 5)])
+
+    def test_run_tournament(self):
+        for extension in ['csv', 'jsonl']:
+            file_name = os.path.join(self.directory.name, 'results.' + extension)
+            summary = run_tournament(self.lineups, 2, file_name, seeds=[1, 2], processes=2)
+            self.assertEqual(summary.games_count, 4)
+            self.assertGreater(summary.games_per_hour, 0)
+            with open(file_name, newline='') as results_file:
+                if extension == 'csv':
+                    rows = list(csv.DictReader(results_file))
+                    self.assertEqual(rows[0]['player_0'], 'RandomPlayer')
+                else:
+                    rows = [json.loads(line) for line in results_file]
+                    self.assertEqual(rows[0]['players'][0], 'RandomPlayer')
+            self.assertListEqual(sorted(int(row['game']) for row in rows), list(range(4)))
+
+    def test_run_tournament_resumes(self):
+        # game 3 isn't played yet: its cut row mustn't count as played
+        incomplete_lines = {'csv': ['3,1,2,0,40,0.123', '5,1,2,'], 'jsonl': ['{"game": 3', '{"game": 1, "sec']}
+        for extension in ['csv', 'jsonl']:
+            file_name = os.path.join(self.directory.name, 'resumed.' + extension)
+            run_tournament(self.lineups, 1, file_name, seeds=[1, 2], processes=2)
+            for incomplete_line in incomplete_lines[extension]:
+                # an interrupted write leaves an incomplete last line, that's removed when the tournament resumes
+                with open(file_name, 'a', newline='') as results_file:
+                    results_file.write(incomplete_line)
+                summary = run_tournament(self.lineups, 2, file_name, seeds=[1, 2], processes=2)
+                self.assertEqual(summary.games_count, 2 if incomplete_line == incomplete_lines[extension][0] else 0)
+            with open(file_name, newline='') as results_file:
+                if extension == 'csv':
+                    rows = list(csv.DictReader(results_file))
+                    self.assertTrue(all(None not in row.values() for row in rows))
+                    games = [int(row['game']) for row in rows]
+                else:
+                    games = [json.loads(line)['game'] for line in results_file]
+            self.assertListEqual(sorted(games), list(range(4)))
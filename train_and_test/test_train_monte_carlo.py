@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from train_and_test import train_monte_carlo
+from train_and_test.sequential_testing import SequentialTester
+from train_and_test.test_sequential_testing import FakePool, play_game
+
+
+class TestTrainMonteCarlo(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = FakePool()
+        train_monte_carlo.tester = SequentialTester(self.pool, 16, 4)
+        train_monte_carlo.F, train_monte_carlo.G = [], []
+
+    def tearDown(self):
+        train_monte_carlo.tester = None
+        train_monte_carlo.F, train_monte_carlo.G = [], []
+        super().tearDown()
+
+    @staticmethod
+    def create_evaluation(branching_factor, skill, noise=0):
+        return train_monte_carlo.tester.create_evaluation(branching_factor, play_game, lambda i: (skill, noise, i))
+
+    def test_undecided_comparison_falls_back_to_the_averages(self):
+        # the evaluations are of the negated results, so the higher evaluation has the lower average result
+        for first_skill, second_skill, is_less in [(1, 0, True), (0, 1, False)]:
+            first = self.create_evaluation(10, first_skill, noise=20)
+            second = self.create_evaluation(20, second_skill)
+            self.assertEqual(train_monte_carlo.is_average_result_less(first, second), is_less)
+            self.assertEqual(train_monte_carlo.tester.games_count, 2 * 16)
+            train_monte_carlo.tester = SequentialTester(self.pool, 16, 4)
+
+    def test_clear_comparison_plays_no_more_games(self):
+        worse, better = self.create_evaluation(10, 0), self.create_evaluation(20, 1)
+        self.assertFalse(train_monte_carlo.is_average_result_less(worse, better))
+        self.assertEqual(train_monte_carlo.tester.games_count, 2 * 4)
+
+    def test_every_branching_factor_is_recorded_once(self):
+        first, second = self.create_evaluation(10, 0), self.create_evaluation(20, 1)
+        train_monte_carlo.is_average_result_less(first, second)
+        third = self.create_evaluation(30, 2)
+        train_monte_carlo.is_average_result_less(second, third)
+        self.assertListEqual(train_monte_carlo.F, [10, 20, 30])
+        self.assertListEqual(train_monte_carlo.G, [-first.mean, -second.mean, -third.mean])
@@ -0,0 +1,195 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from typing import Sequence, Dict, Iterable, Set
+
+from game.catan_state import CatanState
+from players.abstract_player import create_seeded_players
+from train_and_test.logger import logger
+
+"""
+Structure
+---------
+A tournament plays games of lineups of players on a pool of worker processes, that lives for the whole tournament.
+Every game is a picklable GameTask: the lineup (the specs of its players, created anew in the worker) and the seed
+of the game. Finished games come back as GameResults in the order they finish, and each is appended to the results
+file (and flushed) right away, so results aren't lost if the tournament is stopped, and can be watched as it runs.
+The results file is CSV or JSONL (a JSON object per line), by its extension.
+The results file is also the checkpoint of the tournament: games that are in it are skipped, so a tournament that
+is run again (with the same lineups, games count and seeds) plays only the games it didn't finish.
+"""
+
+
+class PlayerSpec(namedtuple('PlayerSpecTuple', ['player_class', 'kwargs'])):
+    """
+    A player of a lineup, created for every game in the worker that plays it. It has (in this order):
+     -the class of the player
+     -the arguments of the player's constructor, other than the seed (the seed is set per game, see GameTask)
+    """
+
+    def __new__(cls, player_class, kwargs: Dict = None):
+        return super().__new__(cls, player_class, kwargs or {})
+
+    @property
+    def name(self) -> str:
+        return self.player_class.__name__
+
+    def create(self, seed: int = None):
+        return self.player_class(seed, **self.kwargs)
+
+
+class GameTask(namedtuple('GameTaskTuple', ['game', 'lineup_index', 'lineup', 'seed'])):
+    """
+    A game to play. It has (in this order):
+     -the index of the game in the tournament
+     -the index of the lineup in the tournament
+     -the lineup, the specs of the players, in the order of their turns
+     -the seed of the game (the board and dice), or None. player i's seed is seed * len(lineup) + i
+    """
+
+
+class GameResult(namedtuple('GameResultTuple', ['game', 'lineup_index', 'seed', 'players', 'scores', 'winner',
+                                                'turns_count', 'seconds'])):
+    """
+    The result of a played game. It has (in this order):
+     -the index of the game in the tournament
+     -the index of the lineup in the tournament
+     -the seed of the game
+     -the names of the players, in the order of their turns
+     -the scores of the players
+     -the index of the winner
+     -the number of turns the game took
+     -the number of seconds the game took
+    """
+
+
+class TournamentSummary(namedtuple('TournamentSummaryTuple', ['games_count', 'seconds', 'games_per_hour'])):
+    """
+    The throughput of a tournament. It has (in this order):
+     -the number of games played
+     -the number of seconds the tournament took
+     -the number of games played per hour
+    """
+
+
+def play_game(task: GameTask) -> GameResult:
+    """
+    play a game to its end. a module-level function, so the workers of a pool can run it
+    :param task: the game to play
+    :return: GameResult, the result of the game
+    """
+    start_time = time.time()
+    players = create_seeded_players([spec.create for spec in task.lineup], task.seed)
+    state = CatanState(players, task.seed)
+    turns_count = 0
+    while not state.is_final():
+        state.make_move(state.get_current_player().choose_move(state))
+        state.make_random_move()
+        turns_count += 1
+    scores = [state.get_score_of_player(player) for player in players]
+    return GameResult(task.game, task.lineup_index, task.seed, [spec.name for spec in task.lineup], scores,
+                      scores.index(max(scores)), turns_count, time.time() - start_time)
+
+
+def create_game_tasks(lineups: Sequence[Sequence[PlayerSpec]], games_count: int, seeds: Sequence[int] = None) \
+        -> Iterable[GameTask]:
+    """
+    :param lineups: the lineups to play
+    :param games_count: the number of games to play with every lineup
+    :param seeds: the seeds of the games of every lineup, repeated if there are fewer than games_count of them.
+    every lineup plays the same seeds, so the lineups are compared on the same boards and dice.
+    if None, the games aren't seeded
+    :return: Iterable[GameTask], the games, a game of every lineup at a time
+    """
+    game = 0
+    for i in range(games_count):
+        seed = seeds[i % len(seeds)] if seeds else None
+        for lineup_index, lineup in enumerate(lineups):
+            yield GameTask(game, lineup_index, list(lineup), seed)
+            game += 1
+
+
+def run_tournament(lineups: Sequence[Sequence[PlayerSpec]], games_count: int, results_file_name: str,
+                   seeds: Sequence[int] = None, processes: int = None, pool=None) -> TournamentSummary:
+    """
+    play the games of a tournament in parallel, streaming the results to a file as the games finish.
+    games that are already in the file are skipped (see the Structure above)
+    :param lineups: the lineups to play
+    :param games_count: the number of games to play with every lineup
+    :param results_file_name: the file the results are appended to. .csv for CSV, otherwise JSONL
+    :param seeds: the seeds of the games (see create_game_tasks)
+    :param processes: the number of worker processes. the number of cpus if None
+    :param pool: optional multiprocessing.Pool to play on (e.g. to keep the workers between tournaments).
+    if None, a pool of processes workers is created for the tournament
+    :return: TournamentSummary, the throughput of the tournament
+    """
+    start_time = time.time()
+    played_games = _read_played_games(results_file_name)
+    if played_games:
+        logger.info('| resuming tournament: {} games are already played'.format(len(played_games)))
+    tasks = (task for task in create_game_tasks(lineups, games_count, seeds) if task.game not in played_games)
+    played_count = 0
+    tournament_pool = pool if pool is not None else multiprocessing.Pool(processes)
+    try:
+        with open(results_file_name, 'a', newline='') as results_file:
+            write_result = _create_results_writer(results_file_name, results_file,
+                                                  max(len(lineup) for lineup in lineups))
+            for result in tournament_pool.imap_unordered(play_game, tasks):
+                write_result(result)
+                results_file.flush()
+                played_count += 1
+                logger.info('| game {} of lineup {} done. scores: {}. {} games played'
+                            .format(result.game, result.lineup_index, result.scores, played_count))
+    finally:
+        if pool is None:
+            tournament_pool.terminate()
+
+    seconds = time.time() - start_time
+    summary = TournamentSummary(played_count, seconds, played_count * 3600 / seconds)
+    logger.info('| tournament done: {} games in {:.1f} seconds, {:.1f} games/hour'
+                .format(summary.games_count, summary.seconds, summary.games_per_hour))
+    return summary
+
+
+def _read_played_games(file_name: str) -> Set[int]:
+    """
+    :return: Set[int], the games in the results file. an incomplete last line (of an interrupted write) is removed
+    from the file, so its game is played again
+    """
+    if not os.path.exists(file_name):
+        return set()
+    with open(file_name, 'rb') as results_file:
+        data = results_file.read()
+    complete_size = data.rfind(b'\n') + 1
+    if complete_size < len(data):
+        os.truncate(file_name, complete_size)
+    lines = data[:complete_size].decode().splitlines(keepends=True)
+    if file_name.endswith('.csv'):
+        # the rows are written with all the columns (see _create_results_writer)
+        return {int(row['game']) for row in csv.DictReader(lines) if None not in row.values()}
+    return {json.loads(line)['game'] for line in lines if line.strip()}
+
+
+def _create_results_writer(file_name: str, results_file, players_count: int):
+    if not file_name.endswith('.csv'):
+        def write_jsonl(result: GameResult):
+            results_file.write(json.dumps(result._asdict()) + '\n')
+
+        return write_jsonl
+
+    writer = csv.writer(results_file)
+    if results_file.tell() == 0:
+        writer.writerow(['game', 'lineup_index', 'seed', 'winner', 'turns_count', 'seconds'] +
+                        ['{}{}'.format(column, i) for i in range(players_count) for column in ['player_', 'score_']])
+
+    def write_csv(result: GameResult):
+        # the columns of the players a lineup doesn't have are empty, so every complete row has all the columns
+        players_columns = [column for player_and_score in zip(result.players, result.scores)
+                           for column in player_and_score] + [''] * 2 * (players_count - len(result.players))
+        writer.writerow([result.game, result.lineup_index, result.seed, result.winner, result.turns_count,
+                         '{:.3f}'.format(result.seconds)] + players_columns)
+
+    return write_csv
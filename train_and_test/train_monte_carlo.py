@@ -1,17 +1,34 @@
 import math
+import multiprocessing
+import operator
 import time
+from typing import Any, Callable, Tuple
+
+import numpy as np
 
 from game.catan_state import CatanState
+from players.abstract_player import create_seeded_players
 from players.expectimax_baseline_player import ExpectimaxBaselinePlayer
 from players.monte_carlo_player import MonteCarloPlayer
 from players.random_player import RandomPlayer
+from train_and_test.checkpoint import Checkpoint
 from train_and_test.logger import fileLogger
+from train_and_test.sequential_testing import SequentialEvaluation, SequentialTester
 
 gr = (math.sqrt(5) + 1) / 2  # golden ratio
 tolerance = 100
 seed = None
 timeout_seconds = 5
-games_for_average = 4
+# whether to log how many moves the monte-carlo player chose from in its turns, to see how often it filters. counting
+# them costs as much as generating them, so it's off by default
+log_next_moves_counts = False
+# the games of a branching factor are played in waves, until it's clearly better or worse than the one it's compared to
+games_wave_size = 4
+max_games_for_average = 16
+checkpoint_file_name = 'train_monte_carlo_checkpoint'
+checkpoint = None
+tester = None
+games_seeds = None
 A, B, C, D, E, F, G = [], [], [], [], [], [], []
 
 
@@ -25,12 +42,20 @@ def excel_data_grabber(a, b, c, d, e):
 
 
 def excel_data_grabber2(f, g):
+    """
+    record the average g of branching factor f. a branching factor that's compared again (with more games) keeps
+    a single row, with its latest average
+    """
     global F, G
-    F.append(f)
-    G.append(g)
+    if f in F:
+        G[F.index(f)] = g
+    else:
+        F.append(f)
+        G.append(g)
 
 
-def golden_section_search(f, a, b, tol=tolerance):
+def golden_section_search(f, a, b, tol=tolerance, search_checkpoint: Checkpoint = None,
+                          is_less: Callable[[Any, Any], bool] = operator.lt):
     """
     golden section search
     to find the minimum of f on [a,b]
@@ -39,8 +64,14 @@ def golden_section_search(f, a, b, tol=tolerance):
     :param a: left edge x value
     :param b: right edge x value
     :param tol: error tolerance
+    :param search_checkpoint: optional checkpoint to keep the bounds in, after every step.
+    if it has bounds, the search continues from them, instead of from [a,b]
+    :param is_less: compares values of f. e.g. to compare evaluations, that f returns, by playing games of them
     :return: x value where f(x) is minimal
     """
+    if search_checkpoint is not None and 'bounds' in search_checkpoint:
+        a, b = search_checkpoint.get('bounds')
+        fileLogger.info('GSS: resuming from the checkpoint with a={}, b={}'.format(a, b))
     fileLogger.info('GSS: entered golden_section_search with a={}, b={}, tol={}'.format(a, b, tol))
     c = b - (b - a) / gr
     fileLogger.info('GSS: c = b - (b - a) / gr = {} - ({} - {}) / {} = {}'.format(b, b, a, gr, c))
@@ -48,14 +79,17 @@ def golden_section_search(f, a, b, tol=tolerance):
     fileLogger.info('GSS: d = a + (b - a) / gr = {} - ({} - {}) / {} = {}'.format(a, b, a, gr, d))
     while abs(c - d) > tol:
         f1 = f(c)
-        fileLogger.info('GSS: f(c) = f({}) = {}'.format(c, f1))
         f2 = f(d)
+        is_f1_less = is_less(f1, f2)
+        fileLogger.info('GSS: f(c) = f({}) = {}'.format(c, f1))
         fileLogger.info('GSS: f(d) = f({}) = {}'.format(d, f2))
-        if f1 < f2:
+        if is_f1_less:
             b = d
         else:
             a = c
         fileLogger.info('GSS: after assignment b={}, a={}'.format(b, a))
+        if search_checkpoint is not None:
+            search_checkpoint.save(bounds=(a, b))
 
         # we recompute both c and d here to avoid loss of precision which may lead to incorrect results or infinite loop
         c = b - (b - a) / gr
@@ -67,17 +101,27 @@ def golden_section_search(f, a, b, tol=tolerance):
     return (b + a) / 2
 
 
-def execute_game_given_monte_carlo_branching_factor(branching_factor):
-    fileLogger.info('EXEC_GAME: branching_factor={}'.format(branching_factor))
-    p0 = ExpectimaxBaselinePlayer(seed, timeout_seconds)  # RandomPlayer(seed)
-    p1 = MonteCarloPlayer(seed, timeout_seconds, int(branching_factor))
-    state = CatanState([p0, p1], seed)
+def execute_game_given_monte_carlo_branching_factor(branching_factor, game_seed=None):
+    fileLogger.info('EXEC_GAME: branching_factor={}, game_seed={}'.format(branching_factor, game_seed))
+    game_seed = seed if game_seed is None else game_seed
+    p0, p1 = create_seeded_players([
+        lambda player_seed: ExpectimaxBaselinePlayer(player_seed, timeout_seconds),  # RandomPlayer(player_seed)
+        lambda player_seed: MonteCarloPlayer(player_seed, timeout_seconds, int(branching_factor))], game_seed)
+    state = CatanState([p0, p1], game_seed)
 
     count_moves = 0
+    # the number of moves the monte-carlo player chose from in each of its turns (see log_next_moves_counts)
+    next_moves_counts = []
     while not state.is_final():
         count_moves += 1
+        if log_next_moves_counts and state.get_current_player() is p1:
+            next_moves_counts.append(state.count_next_moves().total)
         state.make_move(state.get_current_player().choose_move(state))
         state.make_random_move()
+    if next_moves_counts:
+        fileLogger.info('EXEC_GAME: next moves of p1: max={}, average={}, turns with more than branching_factor={}'
+                        .format(max(next_moves_counts), sum(next_moves_counts) / len(next_moves_counts),
+                                sum(count > branching_factor for count in next_moves_counts)))
 
     p0_score = state.get_scores_by_player()[p0]
     p1_score = state.get_scores_by_player()[p1]
@@ -92,35 +136,81 @@ def execute_game_given_monte_carlo_branching_factor(branching_factor):
     return res
 
 
-def calc_average_result(branching_factor: int):
-    global games_for_average
-    import multiprocessing
+def execute_seeded_game(task: Tuple[float, int]):
+    """
+    :param task: the branching factor, and the seed of the game
+    :return: the result of the game, negated: the result is lower for better branching factors, and evaluations
+    are higher for better candidates (see SequentialTester)
+    """
+    return -execute_game_given_monte_carlo_branching_factor(*task)
 
-    try:
-        cpus = multiprocessing.cpu_count()
-    except NotImplementedError:
-        cpus = 2  # arbitrary default
 
-    pool = multiprocessing.Pool(processes=cpus)
-    results = pool.map(execute_game_given_monte_carlo_branching_factor, [branching_factor] * games_for_average)
+def calc_average_result(branching_factor: float) -> SequentialEvaluation:
+    """
+    :return: SequentialEvaluation, the evaluation of the branching factor, whose games are played when it's compared
+    (see is_average_result_less). game i of every branching factor is played with the same seed
+    """
+    # the results are kept in the checkpoint, so a step of the search that was interrupted doesn't play them again
+    results = checkpoint.get('results', {}).get(branching_factor) if checkpoint is not None else None
+    if results:
+        fileLogger.info('AVERAGE: {} results of branching factor {} from the checkpoint'
+                        .format(len(results), branching_factor))
+    return tester.create_evaluation(branching_factor, execute_seeded_game,
+                                    lambda i: (branching_factor, games_seeds[i]), results)
+
 
-    # results = [execute_game_given_monte_carlo_branching_factor(branching_factor) for _ in range(games_for_average)]
-    average = sum(results) / len(results)
-    fileLogger.info('AVERAGE: average of {} games is {}'.format(len(results), average))
-    excel_data_grabber2(branching_factor, average)
-    return average
+def is_average_result_less(first: SequentialEvaluation, second: SequentialEvaluation) -> bool:
+    """
+    :return: True if the branching factor of first clearly gets lower results than that of second. if neither is
+    clearly better after all the games, True if the average result of first is lower
+    """
+    is_less = tester.is_better(first, second)
+    # when first isn't clearly better, this plays no more games: it's either clearly worse after the games already
+    # played, or both played all their games
+    if not is_less and not tester.is_better(second, first):
+        is_less = first.mean > second.mean
+        fileLogger.info('AVERAGE: no clear difference between branching factors {} and {}, the lower average is of {}'
+                        .format(first.candidate, second.candidate, (first if is_less else second).candidate))
+    for evaluation in [first, second]:
+        fileLogger.info('AVERAGE: average of {} games of branching factor {} is {}'
+                        .format(len(evaluation.results), evaluation.candidate, -evaluation.mean))
+        excel_data_grabber2(evaluation.candidate, -evaluation.mean)
+    if checkpoint is not None:
+        results = checkpoint.get('results', {})
+        results.update({evaluation.candidate: evaluation.results for evaluation in [first, second]})
+        checkpoint.save(results=results)
+    return is_less
 
 
 def train_monte_carlo():
-    global tolerance, seed, timeout_seconds, games_for_average
+    """
+    search the optimal branching factor. the progress (the bounds of the search and the results of the branching
+    factors evaluated) is kept in a checkpoint, so a restarted run continues from where it stopped.
+    the checkpoint is removed when the search is done
+    """
+    global tolerance, seed, timeout_seconds, max_games_for_average, checkpoint, tester, games_seeds
     global A, B, C, D, E, F, G
     fileLogger.info('MAIN: Train Monte Carlo: '
-                    'tolerance={}, seed={}, timeout_seconds={}, games_for_average={}         [{}]'
-                    .format(tolerance, seed, timeout_seconds, games_for_average, int(time.time())))
-
-    res = golden_section_search(calc_average_result, 1, 4000)
+                    'tolerance={}, seed={}, timeout_seconds={}, max_games_for_average={}         [{}]'
+                    .format(tolerance, seed, timeout_seconds, max_games_for_average, int(time.time())))
+
+    checkpoint = Checkpoint(checkpoint_file_name)
+    games_seeds = checkpoint.get('games_seeds')
+    if games_seeds is None:
+        games_seeds = np.random.RandomState(seed).randint(1, 2 ** 30, size=max_games_for_average).tolist()
+        checkpoint.save(games_seeds=games_seeds)
+    try:
+        cpus = multiprocessing.cpu_count()
+    except NotImplementedError:
+        cpus = 2  # arbitrary default
+    pool = multiprocessing.Pool(processes=cpus)
+    tester = SequentialTester(pool, max_games_for_average, games_wave_size)
+    res = golden_section_search(calc_average_result, 1, 4000, search_checkpoint=checkpoint,
+                                is_less=is_average_result_less)
+    pool.terminate()
 
-    fileLogger.info("MAIN: Optimal branching factor is : {}         [{}]".format(res, int(time.time())))
+    fileLogger.info("MAIN: Optimal branching factor is : {}. {} games played, {} saved by stopping comparisons "
+                    "early         [{}]".format(res, tester.games_count, tester.games_saved, int(time.time())))
     import pandas as pd
     df = pd.DataFrame({"p0_score": A, "p1_score": B, "count_moves": C, "res": D, "branching factor": E})
     writer = pd.ExcelWriter('train_monte_carlo_abcde_{}.xlsx'.format(int(time.time())), engine='xlsxwriter')
@@ -130,6 +220,7 @@ def train_monte_carlo():
     writer2 = pd.ExcelWriter('train_monte_carlo_fg____{}.xlsx'.format(int(time.time())), engine='xlsxwriter')
     df2.to_excel(writer2, sheet_name='monte_carlo')
     writer2.save()
+    checkpoint.remove()
 
 if __name__ == '__main__':
     train_monte_carlo()